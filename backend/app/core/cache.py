@@ -0,0 +1,190 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import functools
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .config import config
+from ..models import DatasetVersion
+
+# marks a cache miss, None is a valid cached value
+_MISSING = object()
+
+# approximate bytes of a number, date or other scalar field on the cache, close to its
+# size in json
+FIELD_SIZE_ESTIMATE = 24
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    version: int
+    size: int
+    expires_at: float
+
+
+@dataclass
+class DatasetVersionInfo:
+    versao: int
+    atualizado_em: datetime | None
+
+
+class ResponseCache:
+    """
+    Cache LRU das respostas da camada CRUD, limitado pelo tamanho estimado das
+    respostas. As entradas expiram após o TTL ou quando a versão dos dados muda
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, _CacheEntry] = OrderedDict()
+
+    def get(self, key: Hashable, version: int) -> Any:
+        entry = self._entries.get(key)
+        if (
+            entry is None
+            or entry.version != version
+            or entry.expires_at < time.monotonic()
+        ):
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: Hashable, version: int, value: Any, size: int):
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = _CacheEntry(
+            value=value,
+            version=version,
+            size=size,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        self.size += size
+
+        while self.size > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+
+
+response_cache = ResponseCache(config.CACHE_MAX_BYTES, config.CACHE_TTL_SECONDS)
+
+_dataset_version: DatasetVersionInfo | None = None
+_dataset_version_checked_at = float("-inf")
+
+
+async def get_dataset_version(
+    session_maker: async_sessionmaker[AsyncSession],
+) -> DatasetVersionInfo:
+    """
+    Versão atual dos dados, consultada no banco no máximo uma vez a cada
+    CACHE_VERSION_CHECK_SECONDS
+    """
+    global _dataset_version, _dataset_version_checked_at
+
+    now = time.monotonic()
+    if (
+        _dataset_version is not None
+        and now - _dataset_version_checked_at < config.CACHE_VERSION_CHECK_SECONDS
+    ):
+        return _dataset_version
+
+    async with session_maker() as session:
+        row = (
+            await session.execute(
+                select(DatasetVersion.versao, DatasetVersion.atualizado_em).order_by(
+                    DatasetVersion.id
+                )
+            )
+        ).first()
+
+    # the column stores naive UTC times
+    version = (
+        DatasetVersionInfo(
+            versao=row.versao,
+            atualizado_em=row.atualizado_em.replace(tzinfo=timezone.utc),
+        )
+        if row
+        else DatasetVersionInfo(versao=0, atualizado_em=None)
+    )
+    # entries of older versions would never be served again
+    if _dataset_version is not None and version.versao != _dataset_version.versao:
+        response_cache.clear()
+
+    _dataset_version = version
+    _dataset_version_checked_at = now
+    return version
+
+
+def cached[**P, T](
+    method: Callable[P, Awaitable[T]],
+) -> Callable[P, Awaitable[T]]:
+    """
+    Guarda em cache o retorno de um método de leitura de uma classe CRUD, usando o
+    nome do método e os argumentos recebidos como chave. O método deve pertencer a
+    uma instância com o atributo `_session_maker`
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if response_cache.max_bytes <= 0:
+            return await method(self, *args, **kwargs)
+
+        version = await get_dataset_version(self._session_maker)
+        key = (method.__qualname__, args, tuple(sorted(kwargs.items())))
+
+        value = response_cache.get(key, version.versao)
+        if value is not _MISSING:
+            return value
+
+        value = await method(self, *args, **kwargs)
+        response_cache.set(key, version.versao, value, _estimate_size(value))
+        return value
+
+    return wrapper
+
+
+def _estimate_size(value: Any) -> int:
+    # models are estimated from their fields, serializing them only to measure the
+    # size would double the cost of every cache miss
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    if isinstance(value, BaseModel):
+        return sum(_estimate_size(field) for field in value.__dict__.values())
+    if isinstance(value, dict):
+        return sum(len(str(key)) + _estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        # the rows of a page share the same shape
+        return len(value) * _estimate_size(value[0]) if value else 0
+    if hasattr(value, "table"):
+        # columnar pages keep their data on an arrow table
+        return value.table.nbytes
+    return FIELD_SIZE_ESTIMATE
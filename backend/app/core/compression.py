@@ -0,0 +1,230 @@
+import asyncio
+from typing import Callable
+import zlib
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import zstandard
+
+from .cache import response_cache
+from .config import config
+
+# encodings in order of preference when the client accepts more than one with the
+# same weight
+ENCODINGS = ["zstd", "br", "gzip"]
+
+# media types worth compressing, Parquet files are already compressed
+COMPRESSIBLE_MEDIA_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/vnd.apache.arrow.stream",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+
+# bodies smaller than this are compressed on the event loop, moving them to a thread
+# would cost more than compressing them
+THREAD_MINIMUM_SIZE = 64 * 1024
+
+# compressed bodies are cached by entity tag, which already changes with the dataset
+# version, so every entry is stored under the same version
+_COMPRESSED_BODY_VERSION = 0
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """
+    Codificação usada na resposta, a de maior peso no cabeçalho Accept-Encoding entre
+    as suportadas. Sem nenhuma aceita a resposta segue sem compressão
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for coding in accept_encoding.split(","):
+        name, *parameters = coding.split(";")
+        weight = 1.0
+        for parameter in parameters:
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    chosen, chosen_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > chosen_weight:
+            chosen, chosen_weight = encoding, weight
+    return chosen
+
+
+class Compressor:
+    """Compressão incremental de um corpo de resposta em uma das codificações"""
+
+    def __init__(self, encoding: str):
+        self._compress: Callable[[bytes], bytes]
+        self._flush: Callable[[], bytes]
+        self._finish: Callable[[], bytes]
+
+        if encoding == "gzip":
+            compressor = zlib.compressobj(config.GZIP_COMPRESSION_LEVEL, wbits=31)
+            self._compress = compressor.compress
+            self._flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = compressor.flush
+        elif encoding == "br":
+            compressor = brotli.Compressor(quality=config.BROTLI_COMPRESSION_LEVEL)
+            self._compress = compressor.process
+            self._flush = compressor.flush
+            self._finish = compressor.finish
+        elif encoding == "zstd":
+            compressor = zstandard.ZstdCompressor(
+                level=config.ZSTD_COMPRESSION_LEVEL
+            ).compressobj()
+            self._compress = compressor.compress
+            self._flush = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self._finish = compressor.flush
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, chunk: bytes) -> bytes:
+        # every chunk is flushed so streamed rows reach the client right away
+        return self._compress(chunk) + self._flush()
+
+    def finish(self, chunk: bytes = b"") -> bytes:
+        return self._compress(chunk) + self._finish()
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return Compressor(encoding).finish(body)
+
+
+class CompressionMiddleware:
+    """
+    Comprime as respostas com zstd, brotli ou gzip conforme o Accept-Encoding,
+    quando o corpo tem pelo menos COMPRESSION_MINIMUM_SIZE bytes. Os corpos
+    comprimidos de respostas com ETag ficam no cache de respostas, então a mesma
+    página é comprimida uma única vez por codificação. Respostas em streaming, como
+    as exportações, são comprimidas à medida que são enviadas
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self._send = send
+        self._encoding = encoding
+        self._minimum_size = minimum_size
+        self._start_message: Message | None = None
+        self._compressor: Compressor | None = None
+        self._passthrough = False
+
+    async def send(self, message: Message):
+        if self._passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "").split(";")[0].strip()
+            if (
+                "content-encoding" in headers
+                or media_type not in COMPRESSIBLE_MEDIA_TYPES
+            ):
+                self._passthrough = True
+                await self._send(message)
+            else:
+                # sent with the first body chunk, when the size is known
+                self._start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self._compressor is not None:
+            if more_body:
+                chunk = self._compressor.compress(body)
+            else:
+                chunk = self._compressor.finish(body)
+            await self._send(
+                {"type": "http.response.body", "body": chunk, "more_body": more_body}
+            )
+            return
+
+        assert self._start_message is not None
+        headers = MutableHeaders(raw=self._start_message["headers"])
+
+        if not more_body:
+            self._passthrough = True
+            if len(body) < self._minimum_size:
+                await self._send(self._start_message)
+                await self._send(message)
+                return
+
+            body = await self._compressed_body(body, headers.get("etag"))
+            self._set_encoding_headers(headers)
+            headers["Content-Length"] = str(len(body))
+            await self._send(self._start_message)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+
+        # streamed response, its final size is unknown
+        self._compressor = Compressor(self._encoding)
+        self._set_encoding_headers(headers)
+        del headers["Content-Length"]
+        await self._send(self._start_message)
+        await self._send(
+            {
+                "type": "http.response.body",
+                "body": self._compressor.compress(body),
+                "more_body": True,
+            }
+        )
+
+    async def _compressed_body(self, body: bytes, entity_tag: str | None) -> bytes:
+        if entity_tag is None:
+            return await self._compress(body)
+
+        key = ("compressed_body", entity_tag, self._encoding)
+        compressed = response_cache.get(key, _COMPRESSED_BODY_VERSION)
+        if isinstance(compressed, bytes):
+            return compressed
+
+        compressed = await self._compress(body)
+        response_cache.set(key, _COMPRESSED_BODY_VERSION, compressed, len(compressed))
+        return compressed
+
+    async def _compress(self, body: bytes) -> bytes:
+        # zlib, brotli and zstandard release the GIL while compressing
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await asyncio.to_thread(compress, body, self._encoding)
+        return compress(body, self._encoding)
+
+    def _set_encoding_headers(self, headers: MutableHeaders):
+        headers["Content-Encoding"] = self._encoding
+        vary = [value.strip().lower() for value in headers.get("vary", "").split(",")]
+        if "accept-encoding" not in vary:
+            headers.add_vary_header("Accept-Encoding")
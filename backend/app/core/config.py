@@ -22,10 +22,41 @@ class Config(BaseSettings):
             )
         return v
 
+    # connection pool shared by all requests
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_PRE_PING: bool = True
+
     AUTH0_DOMAIN: str
     AUTH0_ISSUER: str
     AUTH0_AUDIENCE: str
     AUTH0_ALGORITHM: str
+    # local JWKS file used instead of the Auth0 key set, for offline environments
+    AUTH0_JWKS_FILE: str | None = None
+    AUTH0_JWKS_REFRESH_SECONDS: float = 60 * 60
+    # verified tokens kept in memory until they expire
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+
+    # number of rows fetched from the database at a time when exporting full tables
+    EXPORT_BATCH_SIZE: int = 5000
+
+    # in-process response cache, a maximum size of zero disables it
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_TTL_SECONDS: float = 60 * 60
+    # interval between checks of the dataset version bumped by the loading script, for
+    # up to this long after a load the responses of the previous version may still be
+    # served from the cache; zero checks the version on every lookup
+    CACHE_VERSION_CHECK_SECONDS: float = 5
+    # time browsers may reuse a response without revalidating it, with zero every
+    # reuse is confirmed by a conditional request answered with 304
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 0
+
+    # responses smaller than this are sent without compression
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESSION_LEVEL: int = 6
+    BROTLI_COMPRESSION_LEVEL: int = 5
+    ZSTD_COMPRESSION_LEVEL: int = 3
 
 
 config = Config()  # type:ignore
@@ -1,9 +1,78 @@
+from typing import Any
+
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import exc, make_url
+from sqlalchemy.engine import URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 
 from .config import config
+from ..schemas import PoolMetrics
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Pool de conexões que também conta as requisições aguardando uma conexão livre e
+    as que desistiram por atingir o tempo limite
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+        self.timeouts = 0
+
+    def _do_get(self):
+        self.waiting += 1
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+
+def _is_memory_database(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
 
-engine = create_async_engine(config.DATABASE_URL.get_secret_value())
+
+def _pool_options(url: URL) -> dict[str, Any]:
+    # each connection to an in-memory SQLite database would see a different empty
+    # database, so a single connection is shared and the pool sizes don't apply
+    if _is_memory_database(url):
+        return {"poolclass": StaticPool}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config.DATABASE_POOL_SIZE,
+        "max_overflow": config.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": config.DATABASE_POOL_TIMEOUT,
+        "pool_pre_ping": config.DATABASE_POOL_PRE_PING,
+    }
+
+
+_url = make_url(config.DATABASE_URL.get_secret_value())
+engine = create_async_engine(_url, **_pool_options(_url))
+
+# a single factory shared by every request, bound to the engine's pool
+session_maker = async_sessionmaker(engine)
 
 
 def get_async_session() -> async_sessionmaker[AsyncSession]:
-    return async_sessionmaker(engine)
+    return session_maker
+
+
+def get_pool_metrics() -> PoolMetrics:
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return PoolMetrics(disponivel=False)
+    return PoolMetrics(
+        disponivel=True,
+        tamanho=pool.size(),
+        overflow_maximo=config.DATABASE_MAX_OVERFLOW,
+        em_uso=pool.checkedout(),
+        ociosas=pool.checkedin(),
+        overflow=max(pool.overflow(), 0),
+        aguardando=pool.waiting,
+        tempo_esgotado=pool.timeouts,
+    )
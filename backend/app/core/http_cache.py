@@ -0,0 +1,119 @@
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+from http import HTTPStatus
+from typing import Any, Callable, Coroutine
+
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+from .cache import get_dataset_version
+from .compression import negotiate_encoding
+from .config import config
+from ..deps import AsyncSessionMakerDep
+
+# headers that change the representation returned by the read routes
+VARY_HEADERS = "Accept, Accept-Encoding"
+
+
+class NotModifiedException(HTTPException):
+    def __init__(self, headers: dict[str, str]):
+        super().__init__(HTTPStatus.NOT_MODIFIED, headers=headers)
+
+
+async def check_not_modified(
+    request: Request, session_maker: AsyncSessionMakerDep
+) -> None:
+    """
+    Calcula os validadores da resposta a partir da versão dos dados e dos parâmetros
+    da requisição e responde 304 quando o cliente já tem a mesma versão, sem consultar
+    o banco nem serializar a resposta
+    """
+    version = await get_dataset_version(session_maker)
+    headers = {
+        "ETag": _entity_tag(request, version.versao),
+        "Cache-Control": _cache_control(),
+        "Vary": VARY_HEADERS,
+    }
+    if version.atualizado_em is not None:
+        headers["Last-Modified"] = format_datetime(version.atualizado_em, usegmt=True)
+    request.state.cache_headers = headers
+
+    if _is_not_modified(request, headers["ETag"], version.atualizado_em):
+        raise NotModifiedException(headers)
+
+
+class ConditionalRoute(APIRoute):
+    """
+    Rota de leitura com cache HTTP condicional. As respostas levam `ETag`,
+    `Last-Modified` e `Cache-Control`, e as requisições com `If-None-Match` ou
+    `If-Modified-Since` ainda válidos recebem 304. A verificação acontece depois das
+    dependências do roteador, como a validação do token
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs):
+        dependencies = list(kwargs.get("dependencies") or [])
+        # include_router builds the route again with the dependencies of the original
+        # one, which already check the validators
+        if not any(
+            dependency.dependency is check_not_modified for dependency in dependencies
+        ):
+            dependencies.append(Depends(check_not_modified))
+        kwargs["dependencies"] = dependencies
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def conditional_handler(request: Request) -> Response:
+            response = await handler(request)
+            cache_headers = getattr(request.state, "cache_headers", None)
+            if cache_headers and response.status_code == HTTPStatus.OK:
+                response.headers.update(cache_headers)
+            return response
+
+        return conditional_handler
+
+
+def _entity_tag(request: Request, version: int) -> str:
+    # the query parameters are sorted so their order does not change the tag, and the
+    # encoding is part of it because compressed bodies are different representations
+    key = "\n".join(
+        [
+            str(version),
+            request.url.path,
+            "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items())),
+            request.headers.get("accept", ""),
+            negotiate_encoding(request.headers.get("accept-encoding")) or "",
+        ]
+    )
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def _cache_control() -> str:
+    # authenticated responses are only kept by the browser, never by shared caches
+    if config.HTTP_CACHE_MAX_AGE_SECONDS > 0:
+        return f"private, max-age={config.HTTP_CACHE_MAX_AGE_SECONDS}"
+    return "private, no-cache"
+
+
+def _is_not_modified(
+    request: Request, entity_tag: str, updated_at: datetime | None
+) -> bool:
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110, 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or entity_tag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or updated_at is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    # the header has a resolution of seconds
+    return updated_at.replace(microsecond=0) <= since
@@ -0,0 +1,82 @@
+import base64
+import binascii
+import json
+from datetime import date, time
+from typing import NamedTuple, Sequence
+
+from sqlalchemy import ColumnElement, Select, tuple_
+
+from ..exceptions.query import InvalidArgumentException
+
+
+class CursorKey(NamedTuple):
+    """
+    Chave de ordenação das séries temporais, o cursor aponta para a última linha
+    retornada na página anterior. Nas respostas em formato largo a chave não tem o
+    subsistema
+    """
+
+    data: date
+    hora: time | None
+    id_subsistema: str | None
+
+
+def encode_cursor(data: date, hora: time | None, id_subsistema: str | None) -> str:
+    payload = json.dumps(
+        [data.isoformat(), hora.isoformat() if hora else None, id_subsistema],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> CursorKey:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        data, hora, id_subsistema = json.loads(
+            base64.urlsafe_b64decode(cursor + padding)
+        )
+        return CursorKey(
+            data=date.fromisoformat(data),
+            hora=time.fromisoformat(hora) if hora else None,
+            id_subsistema=str(id_subsistema) if id_subsistema is not None else None,
+        )
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise InvalidArgumentException(f"Cursor inválido: '{cursor}'")
+
+
+def paginate(
+    statement: Select,
+    key_columns: Sequence[ColumnElement],
+    limit: int,
+    offset: int,
+    cursor: str | None,
+) -> Select:
+    """
+    Ordena a consulta pela chave da série temporal e aplica o cursor, quando informado,
+    ou o deslocamento. Uma linha a mais é buscada para indicar se existe próxima página
+    """
+    statement = statement.order_by(*key_columns).limit(limit + 1)
+    if not cursor:
+        return statement.offset(offset)
+
+    key = decode_cursor(cursor)
+    # the key columns are a subset of (data, hora, id_subsistema), tables without a
+    # time column are keyed by (data, id_subsistema) and wide pages by (data, hora)
+    key_values = [getattr(key, column.key) for column in key_columns]
+    if None in key_values:
+        raise InvalidArgumentException(f"Cursor inválido: '{cursor}'")
+    return statement.where(tuple_(*key_columns) > tuple_(*key_values))
+
+
+def next_page_cursor(rows: Sequence, limit: int) -> str | None:
+    """
+    Cursor da próxima página a partir das linhas retornadas por uma consulta paginada,
+    que incluem a linha extra buscada por `paginate`
+    """
+    if len(rows) <= limit:
+        return None
+
+    last = rows[limit - 1]
+    return encode_cursor(
+        last.data, getattr(last, "hora", None), getattr(last, "id_subsistema", None)
+    )
@@ -0,0 +1,92 @@
+from datetime import date
+from enum import StrEnum
+from typing import AsyncIterator
+
+from fastapi.responses import Response, StreamingResponse
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ..crud.columnar import ColumnarPage
+from ..schemas import ExportFormat
+
+media_type_for_format = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+
+def export_response(
+    content: AsyncIterator[str],
+    export_format: ExportFormat,
+    table_name: str,
+    start_date: date,
+    end_date: date,
+) -> StreamingResponse:
+    filename = (
+        f"{table_name}_{start_date.isoformat()}_{end_date.isoformat()}.{export_format}"
+    )
+    return StreamingResponse(
+        content,
+        media_type=media_type_for_format[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+class ColumnarFormat(StrEnum):
+    ARROW = "application/vnd.apache.arrow.stream"
+    PARQUET = "application/x-parquet"
+
+
+# documents the alternative content types of the time series routes on OpenAPI
+columnar_responses: dict[int | str, dict] = {
+    200: {"content": {columnar_format.value: {} for columnar_format in ColumnarFormat}}
+}
+
+
+def columnar_format_from_accept(accept: str | None) -> ColumnarFormat | None:
+    """
+    Formato colunar pedido no cabeçalho Accept, as demais requisições continuam sendo
+    respondidas em JSON
+    """
+    if not accept:
+        return None
+
+    for media_range in accept.split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        if media_type in ColumnarFormat:
+            return ColumnarFormat(media_type)
+    return None
+
+
+def columnar_response(page: ColumnarPage, columnar_format: ColumnarFormat) -> Response:
+    sink = pa.BufferOutputStream()
+    if columnar_format == ColumnarFormat.ARROW:
+        with pa.ipc.new_stream(sink, page.table.schema) as writer:
+            writer.write_table(page.table)
+    else:
+        pq.write_table(page.table, sink)
+
+    headers = {}
+    if page.total_registros is not None:
+        headers["X-Total-Registros"] = str(page.total_registros)
+    if page.proximo_cursor:
+        headers["X-Proximo-Cursor"] = page.proximo_cursor
+
+    return Response(
+        content=sink.getvalue().to_pybytes(),
+        media_type=columnar_format.value,
+        headers=headers,
+    )
+
+
+def page_response(
+    page: bytes | ColumnarPage, columnar_format: ColumnarFormat | None
+) -> Response:
+    """
+    Resposta de uma página de série temporal, no formato colunar pedido ou em JSON já
+    serializado pela camada CRUD
+    """
+    if isinstance(page, ColumnarPage):
+        assert columnar_format is not None
+        return columnar_response(page, columnar_format)
+    return Response(content=page, media_type="application/json")
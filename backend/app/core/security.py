@@ -1,3 +1,10 @@
+import asyncio
+from collections import OrderedDict
+import hashlib
+import logging
+from pathlib import Path
+import time
+
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, SecurityScopes
 from fastapi import Depends
 import jwt
@@ -6,33 +13,154 @@ from ..exceptions.auth import UnauthenticatedException
 
 # source: https://auth0.com/blog/build-and-secure-fastapi-server-with-auth0/
 
+logger = logging.getLogger(__name__)
+
 token_auth_scheme = HTTPBearer()
 
 jwks_url = f"https://{config.AUTH0_DOMAIN}/.well-known/jwks.json"
 # Validating web keys over Auth0's key set
-jwks_client = jwt.PyJWKClient(jwks_url)
+jwks_client = jwt.PyJWKClient(jwks_url, cache_jwk_set=False)
+
+# minimum interval between key set fetches triggered by tokens with an unknown key id
+UNKNOWN_KEY_REFRESH_SECONDS = 30
+
+
+class SigningKeys:
+    """
+    Chaves de assinatura dos tokens, carregadas do Auth0 ou de um arquivo JWKS local e
+    mantidas em memória. A busca das chaves acontece na inicialização da API e em
+    segundo plano, fora do caminho das requisições
+    """
+
+    def __init__(self):
+        self._keys: dict[str | None, jwt.PyJWK] = {}
+        self._loaded_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def load(self):
+        if config.AUTH0_JWKS_FILE:
+            key_set = jwt.PyJWKSet.from_json(Path(config.AUTH0_JWKS_FILE).read_text())
+        else:
+            key_set = jwks_client.get_jwk_set()
+
+        self._keys = {key.key_id: key for key in key_set.keys}
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(self._keys)} signing keys")
+
+    async def refresh(self):
+        async with self._lock:
+            await asyncio.to_thread(self.load)
+
+    async def get(self, key_id: str | None) -> jwt.PyJWK:
+        key = self._keys.get(key_id)
+        if (
+            key is None
+            and time.monotonic() - self._loaded_at > UNKNOWN_KEY_REFRESH_SECONDS
+        ):
+            async with self._lock:
+                # requests waiting on the lock find the key loaded by the first one
+                # instead of fetching the key set again
+                key = self._keys.get(key_id)
+                if (
+                    key is None
+                    and time.monotonic() - self._loaded_at > UNKNOWN_KEY_REFRESH_SECONDS
+                ):
+                    # the key set may have been rotated since the last fetch
+                    try:
+                        await asyncio.to_thread(self.load)
+                    except (OSError, jwt.exceptions.PyJWTError) as error:
+                        raise UnauthenticatedException(str(error))
+                    key = self._keys.get(key_id)
+
+        if key is None:
+            raise UnauthenticatedException(
+                f"Unable to find a signing key that matches: '{key_id}'"
+            )
+        return key
+
+
+class VerifiedTokenCache:
+    """
+    Claims dos tokens já validados, indexadas pelo hash do token e mantidas até a
+    expiração do token. Quando o limite de entradas é atingido os tokens usados há
+    mais tempo são removidos
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, dict] = OrderedDict()
 
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        claims = self._entries.get(key)
+        if claims is None:
+            return None
 
-def validate_token(
+        if claims["exp"] <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return claims
+
+    def set(self, token: str, claims: dict):
+        # tokens without an expiration are verified on every request
+        if self.max_entries <= 0 or "exp" not in claims:
+            return
+
+        self._entries[self._key(token)] = claims
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+
+signing_keys = SigningKeys()
+verified_tokens = VerifiedTokenCache(config.TOKEN_CACHE_MAX_ENTRIES)
+
+
+async def refresh_signing_keys_periodically():
+    while True:
+        await asyncio.sleep(config.AUTH0_JWKS_REFRESH_SECONDS)
+        try:
+            await signing_keys.refresh()
+        except Exception:
+            logger.exception("Error refreshing signing keys, keeping the current ones")
+
+
+async def validate_token(
     security_scopes: SecurityScopes,
     token: HTTPAuthorizationCredentials | None = Depends(token_auth_scheme),
 ):
     if not token:
         raise UnauthenticatedException("Authorization header not found")
 
+    claims = verified_tokens.get(token.credentials)
+    if claims is not None:
+        return claims
+
     try:
-        signing_key = jwks_client.get_signing_key_from_jwt(token.credentials).key
-    except (jwt.exceptions.PyJWKClientError, jwt.exceptions.DecodeError) as error:
+        key_id = jwt.get_unverified_header(token.credentials).get("kid")
+    except jwt.exceptions.DecodeError as error:
         raise UnauthenticatedException(str(error))
 
+    signing_key = await signing_keys.get(key_id)
+
     try:
         payload = jwt.decode(
             token.credentials,
-            signing_key,
+            signing_key.key,
             algorithms=config.AUTH0_ALGORITHM,
             audience=config.AUTH0_AUDIENCE,
             issuer=config.AUTH0_ISSUER,
         )
-        return payload
     except Exception as error:
         raise UnauthenticatedException(str(error))
+
+    verified_tokens.set(token.credentials, payload)
+    return payload
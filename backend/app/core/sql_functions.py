@@ -0,0 +1,52 @@
+from sqlalchemy import Date
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+from ..schemas import Resolution
+
+
+class period_start(FunctionElement):
+    """
+    Primeiro dia do período (dia, semana, mês ou ano) que contém a data informada, as
+    semanas começam na segunda-feira como no padrão ISO
+    """
+
+    type = Date()
+    inherit_cache = True
+    # the resolution changes the generated SQL, so it must be part of the cache key
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ("resolution", InternalTraversal.dp_string)
+    ]
+
+    def __init__(self, column, resolution: Resolution):
+        self.resolution = resolution
+        super().__init__(column)
+
+
+@compiles(period_start, "postgresql")
+def _period_start_postgresql(element: period_start, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    if element.resolution == Resolution.DIA:
+        return column
+
+    unit = {
+        Resolution.SEMANA: "week",
+        Resolution.MES: "month",
+        Resolution.ANO: "year",
+    }[element.resolution]
+    return f"CAST(date_trunc('{unit}', {column}) AS DATE)"
+
+
+@compiles(period_start, "sqlite")
+def _period_start_sqlite(element: period_start, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    modifiers = {
+        Resolution.DIA: "",
+        # going back six days and then forward to the next monday lands on the monday
+        # of the same week
+        Resolution.SEMANA: ", '-6 days', 'weekday 1'",
+        Resolution.MES: ", 'start of month'",
+        Resolution.ANO: ", 'start of year'",
+    }[element.resolution]
+    return f"date({column}{modifiers})"
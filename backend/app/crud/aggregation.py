@@ -0,0 +1,205 @@
+from datetime import date, timedelta
+
+from sqlalchemy import Select, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..core.sql_functions import period_start
+from ..exceptions.database import NotFoundException
+from ..models import (
+    Base,
+    DailySeriesRollup,
+    HalfHourlySubSystemMarginalCost,
+    HalfHourlySubSystemProductionStatement,
+    HourlySubSystemProductionStatement,
+    MonthlySeriesRollup,
+    SeriesRollup,
+)
+from ..schemas import (
+    AggregatedTimeSeries,
+    AggregatedTimeSeriesResponse,
+    AggregatedValue,
+    Resolution,
+)
+
+# sub-daily tables with daily and monthly rollups maintained by the loading script
+rolled_up_models: set[type[Base]] = {
+    HourlySubSystemProductionStatement,
+    HalfHourlySubSystemProductionStatement,
+    HalfHourlySubSystemMarginalCost,
+}
+
+
+async def get_aggregated_time_series(
+    session_maker: async_sessionmaker[AsyncSession],
+    model: type[Base],
+    value_columns: list[str],
+    start_date: date,
+    end_date: date,
+    resolution: Resolution,
+    limit: int,
+    offset: int,
+    description: str,
+    subsystems: tuple[str, ...] | None = None,
+) -> AggregatedTimeSeriesResponse:
+    """
+    Agrega no banco as medições de uma série temporal por subsistema e período,
+    calculando soma, média, mínimo e máximo de cada coluna de valores. As tabelas com
+    agregados diários e mensais são consultadas pelo agregado mais grosso que atende à
+    resolução e ao intervalo pedidos
+    """
+    if model in rolled_up_models:
+        grouped_statement = _rollup_grouped_statement(
+            _rollup_for(resolution, start_date, end_date),
+            model,
+            value_columns,
+            start_date,
+            end_date,
+            resolution,
+        )
+    else:
+        grouped_statement = _grouped_statement(
+            model, value_columns, start_date, end_date, resolution
+        )
+
+    if subsystems:
+        grouped_statement = grouped_statement.where(
+            grouped_statement.selected_columns.id_subsistema.in_(subsystems)
+        )
+
+    count_statement = select(func.count()).select_from(grouped_statement.subquery())
+
+    periodo, id_subsistema = grouped_statement.selected_columns[:2]
+    list_statement = (
+        grouped_statement.order_by(periodo, id_subsistema).limit(limit).offset(offset)
+    )
+
+    async with session_maker() as session:
+        result = (await session.execute(list_statement)).mappings().all()
+
+        if not result:
+            raise NotFoundException(
+                f"Nenhuma medição de {description} disponível entre as datas {start_date.strftime('%d-%m-%Y')} e {end_date.strftime('%d-%m-%Y')}"
+            )
+
+        count_result = (await session.execute(count_statement)).scalar_one()
+
+    return AggregatedTimeSeriesResponse(
+        total_registros=count_result,
+        data_inicial=start_date,
+        data_final=end_date,
+        resolucao=resolution,
+        dados=[
+            AggregatedTimeSeries(
+                id_subsistema=row["id_subsistema"],
+                periodo=row["periodo"],
+                total_medicoes=row["total_medicoes"],
+                valores={
+                    column_name: AggregatedValue(
+                        soma=row[f"{column_name}_soma"],
+                        media=row[f"{column_name}_media"],
+                        minimo=row[f"{column_name}_minimo"],
+                        maximo=row[f"{column_name}_maximo"],
+                    )
+                    for column_name in value_columns
+                },
+            )
+            for row in result
+        ],
+    )
+
+
+def _grouped_statement(
+    model: type[Base],
+    value_columns: list[str],
+    start_date: date,
+    end_date: date,
+    resolution: Resolution,
+) -> Select:
+    period = period_start(model.data, resolution).label("periodo")
+
+    aggregations = []
+    for column_name in value_columns:
+        column = getattr(model, column_name)
+        aggregations.extend(
+            [
+                func.sum(column).label(f"{column_name}_soma"),
+                func.avg(column).label(f"{column_name}_media"),
+                func.min(column).label(f"{column_name}_minimo"),
+                func.max(column).label(f"{column_name}_maximo"),
+            ]
+        )
+
+    return (
+        select(
+            period,
+            model.id_subsistema,
+            func.count().label("total_medicoes"),
+            *aggregations,
+        )
+        .where(model.data.between(start_date, end_date))
+        .group_by(period, model.id_subsistema)
+    )
+
+
+def _rollup_for(
+    resolution: Resolution, start_date: date, end_date: date
+) -> type[SeriesRollup]:
+    """
+    Agregado mensal quando a resolução é de meses ou anos e o intervalo cobre meses
+    inteiros, nos demais casos o diário
+    """
+    whole_months = start_date.day == 1 and (end_date + timedelta(days=1)).day == 1
+    if resolution in (Resolution.MES, Resolution.ANO) and whole_months:
+        return MonthlySeriesRollup
+    return DailySeriesRollup
+
+
+def _rollup_grouped_statement(
+    rollup: type[SeriesRollup],
+    model: type[Base],
+    value_columns: list[str],
+    start_date: date,
+    end_date: date,
+    resolution: Resolution,
+) -> Select:
+    period = period_start(rollup.periodo, resolution).label("periodo")
+
+    # the rollup has a row per value column, pivoted back to one column per aggregate
+    aggregations = []
+    for column_name in value_columns:
+        is_column = rollup.coluna == column_name
+        total = func.sum(case((is_column, rollup.soma)))
+        aggregations.extend(
+            [
+                total.label(f"{column_name}_soma"),
+                (
+                    total
+                    / func.nullif(func.sum(case((is_column, rollup.quantidade))), 0)
+                ).label(f"{column_name}_media"),
+                func.min(case((is_column, rollup.minimo))).label(
+                    f"{column_name}_minimo"
+                ),
+                func.max(case((is_column, rollup.maximo))).label(
+                    f"{column_name}_maximo"
+                ),
+            ]
+        )
+
+    # every value column has the same number of rows in the period
+    total_rows = func.sum(
+        case((rollup.coluna == value_columns[0], rollup.total_medicoes))
+    )
+
+    return (
+        select(
+            period,
+            rollup.id_subsistema,
+            total_rows.label("total_medicoes"),
+            *aggregations,
+        )
+        .where(
+            rollup.tabela == model.__tablename__,
+            rollup.periodo.between(start_date, end_date),
+        )
+        .group_by(period, rollup.id_subsistema)
+    )
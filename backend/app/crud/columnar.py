@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+
+import pyarrow as pa
+from sqlalchemy import Column, Date, Float, Integer, Select, String, Time
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..core.pagination import next_page_cursor
+from ..models import Base
+
+arrow_type_for_sql_type = {
+    Date: pa.date32(),
+    Time: pa.time64("us"),
+    String: pa.string(),
+    Float: pa.float64(),
+    Integer: pa.int64(),
+}
+
+
+@dataclass
+class ColumnarPage:
+    table: pa.Table
+    total_registros: int | None
+    proximo_cursor: str | None
+
+
+def data_columns(model: type[Base]) -> list[Column]:
+    """Colunas de uma tabela de medições, sem o identificador gerado pelo banco"""
+    return [column for column in model.__table__.columns if column.name != "id"]
+
+
+async def fetch_columnar_page(
+    session_maker: async_sessionmaker[AsyncSession],
+    count_statement: Select | None,
+    list_statement: Select,
+    limit: int,
+) -> ColumnarPage:
+    """
+    Executa uma consulta paginada de colunas e monta uma tabela Arrow diretamente com
+    as tuplas retornadas pelo banco, sem instanciar entidades do ORM ou modelos Pydantic.
+    Sem a consulta de contagem o total de registros não é calculado
+    """
+    async with session_maker() as session:
+        rows = (await session.execute(list_statement)).all()
+        count_result = (
+            (await session.execute(count_statement)).scalar_one()
+            if count_statement is not None
+            else None
+        )
+
+    schema = pa.schema(
+        [
+            pa.field(column.name, _arrow_type(column.type))
+            for column in list_statement.selected_columns
+        ]
+    )
+    page_rows = rows[:limit]
+    column_values = list(zip(*page_rows)) or [[] for _ in schema]
+    table = pa.Table.from_arrays(
+        [
+            pa.array(values, type=field.type)
+            for values, field in zip(column_values, schema)
+        ],
+        schema=schema,
+    )
+
+    return ColumnarPage(
+        table=table,
+        total_registros=count_result,
+        proximo_cursor=next_page_cursor(rows, limit),
+    )
+
+
+def _arrow_type(sql_type) -> pa.DataType:
+    for type_class, arrow_type in arrow_type_for_sql_type.items():
+        if isinstance(sql_type, type_class):
+            return arrow_type
+    raise ValueError(f"No arrow type for column type {sql_type}")
@@ -0,0 +1,38 @@
+from datetime import date
+
+from sqlalchemy import Select, func, select
+
+from ..models import Base, DailyRowCount
+
+
+def row_count_statement(
+    model: type[Base],
+    start_date: date,
+    end_date: date,
+    subsystems: tuple[str, ...] | None = None,
+) -> Select:
+    """
+    Total de medições de uma tabela entre duas datas, somando as contagens diárias
+    mantidas pelo script de carga. Enquanto as contagens da tabela não forem
+    calculadas, ou quando apenas alguns subsistemas são pedidos, as linhas são
+    contadas diretamente
+    """
+    daily_total = (
+        select(func.sum(DailyRowCount.quantidade))
+        .where(
+            DailyRowCount.tabela == model.__tablename__,
+            DailyRowCount.data.between(start_date, end_date),
+        )
+        .scalar_subquery()
+    )
+    full_count = (
+        select(func.count())
+        .select_from(model)
+        .where(model.data.between(start_date, end_date))
+    )
+    if subsystems:
+        # the daily counts include every subsystem, the subsystem index serves the count
+        return full_count.where(model.id_subsistema.in_(subsystems))
+
+    # coalesce only evaluates the full count when the daily counts are missing
+    return select(func.coalesce(daily_total, full_count.scalar_subquery()))
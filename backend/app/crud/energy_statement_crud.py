@@ -1,15 +1,20 @@
 from datetime import date
 import logging
-from sqlalchemy import func, select
+from typing import AsyncIterator
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.exceptions.database import NotFoundException
-
+from ..core.cache import cached
+from .aggregation import get_aggregated_time_series
+from .columnar import ColumnarPage
+from .export import stream_time_series
+from .time_series import TimeSeries, fetch_time_series_page
 from ..schemas import (
-    EnergyStatementResponse,
-    HalfHourlyEnergyStatementResponse,
+    AggregatedTimeSeriesResponse,
+    ExportFormat,
     HalfHourlyEnergyStatement,
     HourlyEnergyStatement,
+    Resolution,
+    TableLayout,
 )
 
 from ..models import (
@@ -18,108 +23,205 @@ from ..models import (
 )
 from ..deps import AsyncSessionMakerDep
 
+hourly_value_columns = [
+    "geracao_eolica",
+    "geracao_termica",
+    "geracao_solar",
+    "geracao_hidraulica",
+    "valor_carga",
+    "valor_intercambio",
+]
+
+half_hourly_value_columns = [
+    "geracao_eolica",
+    "geracao_termica",
+    "geracao_solar",
+    "geracao_hidraulica",
+    "geracao_hidraulica_pequena_usina",
+    "geracao_termica_pequena_usina",
+]
+
+hourly_energy_statements = TimeSeries(
+    model=HourlySubSystemProductionStatement,
+    schema=HourlyEnergyStatement,
+    value_columns=hourly_value_columns,
+    description="energia horária",
+)
+
+half_hourly_energy_statements = TimeSeries(
+    model=HalfHourlySubSystemProductionStatement,
+    schema=HalfHourlyEnergyStatement,
+    value_columns=half_hourly_value_columns,
+    description="energia semihorário",
+)
+
 
 class EnergyStatementCrud:
     def __init__(self, session_maker: AsyncSessionMakerDep):
         self._session_maker: async_sessionmaker[AsyncSession] = session_maker
 
+    @cached
     async def get_hourly_energy_statements(
         self,
         data_inicial: date,
         data_final: date,
         limit: int,
         offset: int,
-    ) -> EnergyStatementResponse:
+        cursor: str | None = None,
+        count: bool = True,
+        subsystems: tuple[str, ...] | None = None,
+        layout: TableLayout = TableLayout.LONGO,
+        columnar: bool = False,
+    ) -> bytes | ColumnarPage:
         """
         Retorna o balanço de energia geral com os dados de todos os subsistemas agrupados
         por data e hora de medição. Utiliza as medições no padrão antigo, medidas de hora em
-        hora
+        hora. Quando um cursor é informado a paginação é feita a partir da chave
+        (data, hora, id_subsistema) e o deslocamento é ignorado. Com `count` falso o
+        total de registros não é calculado. No layout largo cada linha traz um instante
+        com as medições de cada subsistema em colunas. A página é serializada em JSON
+        diretamente das colunas do banco ou, com `columnar`, retornada em uma tabela Arrow
         """
-        async with self._session_maker() as session:
-            count_statement = select(
-                func.count(HourlySubSystemProductionStatement.id)
-            ).filter(
-                HourlySubSystemProductionStatement.data.between(
-                    data_inicial, data_final
-                )
-            )
-
-            list_statement = (
-                select(HourlySubSystemProductionStatement)
-                .filter(
-                    HourlySubSystemProductionStatement.data.between(
-                        data_inicial, data_final
-                    )
-                )
-                .order_by(
-                    HourlySubSystemProductionStatement.data,
-                    HourlySubSystemProductionStatement.hora,
-                )
-                .limit(limit)
-                .offset(offset)
-            )
-
-            result = (await session.execute(list_statement)).scalars().all()
-
-            if not result:
-                raise NotFoundException(
-                    f"Nenhuma medição de energia horária disponível entre as datas {data_inicial.strftime('%d-%m-%Y')} e {data_final.strftime('%d-%m-%Y')}"
-                )
-
-            count_result = (await session.execute(count_statement)).scalar_one()
-
-        return EnergyStatementResponse(
-            total_registros=count_result,
-            data_inicial=data_inicial,
-            data_final=data_final,
-            dados=[
-                HourlyEnergyStatement.model_validate(
-                    energy_statement, from_attributes=True
-                )
-                for energy_statement in result
-            ],
+        return await fetch_time_series_page(
+            self._session_maker,
+            hourly_energy_statements,
+            data_inicial,
+            data_final,
+            limit,
+            offset,
+            cursor,
+            count,
+            subsystems,
+            layout,
+            columnar,
         )
 
+    @cached
     async def get_half_hourly_energy_statements(
         self,
         data_inicial: date,
         data_final: date,
         limit: int = 100,
         offset: int = 0,
-    ) -> HalfHourlyEnergyStatementResponse:
+        cursor: str | None = None,
+        count: bool = True,
+        subsystems: tuple[str, ...] | None = None,
+        layout: TableLayout = TableLayout.LONGO,
+        columnar: bool = False,
+    ) -> bytes | ColumnarPage:
         """
         Retorna o balanço de energia geral com os dados de todos os subsistemas. Utiliza
-        as medições no padrão DESSEM, medidas a cada meia hora
+        as medições no padrão DESSEM, medidas a cada meia hora. Quando um cursor é
+        informado a paginação é feita a partir da chave (data, hora, id_subsistema) e o
+        deslocamento é ignorado. Com `count` falso o total de registros não é calculado.
+        No layout largo cada linha traz um instante com as medições de cada subsistema
+        em colunas. A página é serializada em JSON diretamente das colunas do banco ou,
+        com `columnar`, retornada em uma tabela Arrow
+        """
+        return await fetch_time_series_page(
+            self._session_maker,
+            half_hourly_energy_statements,
+            data_inicial,
+            data_final,
+            limit,
+            offset,
+            cursor,
+            count,
+            subsystems,
+            layout,
+            columnar,
+        )
+
+    @cached
+    async def get_aggregated_hourly_energy_statements(
+        self,
+        data_inicial: date,
+        data_final: date,
+        resolution: Resolution,
+        limit: int,
+        offset: int,
+        subsystems: tuple[str, ...] | None = None,
+    ) -> AggregatedTimeSeriesResponse:
+        """
+        Retorna o balanço de energia horário de cada subsistema agregado por dia, semana,
+        mês ou ano, com a soma, média, mínimo e máximo de cada medição no período
         """
-        async with self._session_maker() as session:
-            statement = (
-                select(HalfHourlySubSystemProductionStatement)
-                .filter(HalfHourlySubSystemProductionStatement.data >= data_inicial)
-                .filter(HalfHourlySubSystemProductionStatement.data <= data_final)
-                .order_by(
-                    HalfHourlySubSystemProductionStatement.data,
-                    HalfHourlySubSystemProductionStatement.hora,
-                )
-                .limit(limit)
-                .offset(offset)
-            )
-            result = (await session.execute(statement)).scalars().all()
+        return await get_aggregated_time_series(
+            self._session_maker,
+            hourly_energy_statements.model,
+            hourly_energy_statements.value_columns,
+            start_date=data_inicial,
+            end_date=data_final,
+            resolution=resolution,
+            limit=limit,
+            offset=offset,
+            subsystems=subsystems,
+            description=hourly_energy_statements.description,
+        )
 
-            count_result = (await session.execute(count_statement)).scalar_one()
+    @cached
+    async def get_aggregated_half_hourly_energy_statements(
+        self,
+        data_inicial: date,
+        data_final: date,
+        resolution: Resolution,
+        limit: int,
+        offset: int,
+        subsystems: tuple[str, ...] | None = None,
+    ) -> AggregatedTimeSeriesResponse:
+        """
+        Retorna o balanço de energia semihorário de cada subsistema agregado por dia,
+        semana, mês ou ano, com a soma, média, mínimo e máximo de cada medição no período
+        """
+        return await get_aggregated_time_series(
+            self._session_maker,
+            half_hourly_energy_statements.model,
+            half_hourly_energy_statements.value_columns,
+            start_date=data_inicial,
+            end_date=data_final,
+            resolution=resolution,
+            limit=limit,
+            offset=offset,
+            subsystems=subsystems,
+            description=half_hourly_energy_statements.description,
+        )
 
-            if not result:
-                raise NotFoundException(
-                    f"Nenhuma medição de energia semihorário disponível entre as datas {data_inicial.strftime('%d-%m-%Y')} e {data_final.strftime('%d-%m-%Y')}"
-                )
+    def stream_hourly_energy_statements(
+        self,
+        data_inicial: date,
+        data_final: date,
+        export_format: ExportFormat,
+        subsystems: tuple[str, ...] | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Exporta todas as medições horárias do intervalo em blocos, lidos do banco com
+        um cursor no servidor
+        """
+        return stream_time_series(
+            self._session_maker,
+            hourly_energy_statements.model,
+            start_date=data_inicial,
+            end_date=data_final,
+            export_format=export_format,
+            subsystems=subsystems,
+        )
 
-            return HalfHourlyEnergyStatementResponse(
-                total_registros=len(result),
-                data_inicial=data_inicial,
-                data_final=data_final,
-                dados=[
-                    HalfHourlyEnergyStatement.model_validate(
-                        energy_statement, from_attributes=True
-                    )
-                    for energy_statement in result
-                ],
-            )
+    def stream_half_hourly_energy_statements(
+        self,
+        data_inicial: date,
+        data_final: date,
+        export_format: ExportFormat,
+        subsystems: tuple[str, ...] | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Exporta todas as medições semihorárias do intervalo em blocos, lidos do banco
+        com um cursor no servidor
+        """
+        return stream_time_series(
+            self._session_maker,
+            half_hourly_energy_statements.model,
+            start_date=data_inicial,
+            end_date=data_final,
+            export_format=export_format,
+            subsystems=subsystems,
+        )
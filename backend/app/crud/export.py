@@ -0,0 +1,66 @@
+import csv
+from datetime import date
+import io
+import json
+from typing import AsyncIterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..core.config import config
+from .columnar import data_columns
+from ..models import Base
+from ..schemas import ExportFormat
+
+
+async def stream_time_series(
+    session_maker: async_sessionmaker[AsyncSession],
+    model: type[Base],
+    start_date: date,
+    end_date: date,
+    export_format: ExportFormat,
+    subsystems: tuple[str, ...] | None = None,
+) -> AsyncIterator[str]:
+    """
+    Lê as medições de uma série temporal com um cursor no servidor e as devolve em
+    blocos já formatados, sem carregar o intervalo completo em memória
+    """
+    table = model.__table__
+    columns = data_columns(model)
+    column_names = [column.name for column in columns]
+    order_columns = [
+        table.c[name] for name in ("data", "hora", "id_subsistema") if name in table.c
+    ]
+
+    # selecting plain columns instead of entities keeps the session identity map empty
+    statement = (
+        select(*columns)
+        .where(table.c.data.between(start_date, end_date))
+        .order_by(*order_columns)
+        .execution_options(yield_per=config.EXPORT_BATCH_SIZE)
+    )
+    if subsystems:
+        statement = statement.where(table.c.id_subsistema.in_(subsystems))
+
+    if export_format == ExportFormat.CSV:
+        yield ",".join(column_names) + "\n"
+
+    async with session_maker() as session:
+        result = await session.stream(statement)
+        async for partition in result.partitions():
+            if export_format == ExportFormat.CSV:
+                yield _encode_csv(partition)
+            else:
+                yield _encode_ndjson(partition, column_names)
+
+
+def _encode_csv(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
+
+
+def _encode_ndjson(rows, column_names: list[str]) -> str:
+    return "".join(
+        json.dumps(dict(zip(column_names, row)), default=str) + "\n" for row in rows
+    )
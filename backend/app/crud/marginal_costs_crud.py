@@ -1,92 +1,385 @@
 from datetime import date
-from sqlalchemy import func, select
+from typing import AsyncIterator
+from sqlalchemy import ColumnElement, Float, Select, and_, case, func, literal, select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.exceptions.database import NotFoundException
 
+from ..core.cache import cached
+from ..core.pagination import next_page_cursor, paginate
+from .aggregation import get_aggregated_time_series
+from .energy_statement_crud import (
+    half_hourly_value_columns as energy_statement_value_columns,
+)
+from .columnar import ColumnarPage
+from .export import stream_time_series
+from .time_series import TimeSeries, fetch_time_series_page
 from ..schemas import (
-    HalfHourlySubSystemMarginalCostResponse,
+    AggregatedTimeSeriesResponse,
+    CostAndEnergySummary,
+    ExportFormat,
+    HalfHourlyCostAndEnergyStatement,
+    HalfHourlyCostAndEnergyStatementResponse,
     HalfHourlySubSystemMarginalCostSchema,
-    WeeklySubSystemMarginalCostResponse,
+    Resolution,
+    TableLayout,
     WeeklySubSystemMarginalCostSchema,
 )
 
-from ..models import HalfHourlySubSystemMarginalCost, WeeklySubSystemMarginalCost
+from ..models import (
+    HalfHourlySubSystemMarginalCost,
+    HalfHourlySubSystemProductionStatement,
+    WeeklySubSystemMarginalCost,
+)
 from ..deps import AsyncSessionMakerDep
 
+weekly_value_columns = [
+    "custo_marginal_operacao_semanal",
+    "custo_marginal_operacao_semanal_carga_leve",
+    "custo_marginal_operacao_semanal_carga_media",
+    "custo_marginal_operacao_semanal_carga_pesada",
+]
+
+half_hourly_value_columns = ["custo_marginal_operacao"]
+
+weekly_costs = TimeSeries(
+    model=WeeklySubSystemMarginalCost,
+    schema=WeeklySubSystemMarginalCostSchema,
+    value_columns=weekly_value_columns,
+    description="custo marginal de operação semanal",
+)
+
+half_hourly_costs = TimeSeries(
+    model=HalfHourlySubSystemMarginalCost,
+    schema=HalfHourlySubSystemMarginalCostSchema,
+    value_columns=half_hourly_value_columns,
+    description="custo marginal de operação semihorário",
+)
+
 
 class CostCrud:
     def __init__(self, session_maker: AsyncSessionMakerDep):
         self._session_maker: async_sessionmaker[AsyncSession] = session_maker
 
+    @cached
     async def get_all_weekly(
-        self, start_date: date, end_date: date, limit: int, offset: int
-    ) -> WeeklySubSystemMarginalCostResponse:
-        async with self._session_maker() as session:
-            count_statement = select(func.count(WeeklySubSystemMarginalCost.id)).where(
-                WeeklySubSystemMarginalCost.data.between(start_date, end_date)
-            )
+        self,
+        start_date: date,
+        end_date: date,
+        limit: int,
+        offset: int,
+        cursor: str | None = None,
+        count: bool = True,
+        subsystems: tuple[str, ...] | None = None,
+        layout: TableLayout = TableLayout.LONGO,
+        columnar: bool = False,
+    ) -> bytes | ColumnarPage:
+        """
+        Custo marginal de operação semanal de cada subsistema, paginado pela chave
+        (data, id_subsistema). No layout largo cada linha traz uma semana com os custos
+        de cada subsistema em colunas `<coluna>_<id_subsistema>`
+        """
+        return await fetch_time_series_page(
+            self._session_maker,
+            weekly_costs,
+            start_date,
+            end_date,
+            limit,
+            offset,
+            cursor,
+            count,
+            subsystems,
+            layout,
+            columnar,
+        )
 
-            list_statement = (
-                select(WeeklySubSystemMarginalCost)
-                .where(WeeklySubSystemMarginalCost.data.between(start_date, end_date))
-                .limit(limit)
-                .offset(offset)
-            )
-            result = (await session.execute(list_statement)).scalars().all()
-
-            if not result:
-                raise NotFoundException(
-                    f"Nenhuma medição de custo marginal de operação semanal disponível entre as datas {start_date.strftime('%d-%m-%Y')} e {end_date.strftime('%d-%m-%Y')}"
-                )
-
-            count_result = (await session.execute(count_statement)).scalar_one()
-
-            return WeeklySubSystemMarginalCostResponse(
-                total_registros=count_result,
-                data_inicial=start_date,
-                data_final=end_date,
-                dados=[
-                    WeeklySubSystemMarginalCostSchema.model_validate(
-                        row, from_attributes=True
-                    )
-                    for row in result
+    @cached
+    async def get_all_half_hourly(
+        self,
+        start_date: date,
+        end_date: date,
+        limit: int,
+        offset: int,
+        cursor: str | None = None,
+        count: bool = True,
+        subsystems: tuple[str, ...] | None = None,
+        layout: TableLayout = TableLayout.LONGO,
+        columnar: bool = False,
+    ) -> bytes | ColumnarPage:
+        """
+        Custo marginal de operação semihorário de cada subsistema, paginado pela chave
+        (data, hora, id_subsistema). No layout largo cada linha traz um instante com os
+        custos de cada subsistema em colunas `<coluna>_<id_subsistema>`
+        """
+        return await fetch_time_series_page(
+            self._session_maker,
+            half_hourly_costs,
+            start_date,
+            end_date,
+            limit,
+            offset,
+            cursor,
+            count,
+            subsystems,
+            layout,
+            columnar,
+        )
+
+    @cached
+    async def get_half_hourly_with_energy_statements(
+        self,
+        start_date: date,
+        end_date: date,
+        limit: int,
+        offset: int,
+        cursor: str | None = None,
+        count: bool = True,
+        subsystems: tuple[str, ...] | None = None,
+        high_cost: float | None = None,
+    ) -> HalfHourlyCostAndEnergyStatementResponse:
+        """
+        Custo marginal de operação semihorário junto do balanço de energia semihorário
+        do mesmo instante e subsistema, unidos no banco pela chave
+        (data, hora, id_subsistema). A página, o resumo de cada subsistema no intervalo
+        e o total de registros vêm de uma única consulta. Sem `high_cost` o CMO é
+        considerado alto acima da média do subsistema no período
+        """
+        joined = self._joined_with_energy_statements(start_date, end_date, subsystems)
+        total_generation = _total_generation()
+        thermal_generation = _thermal_generation()
+
+        list_statement = paginate(
+            joined.with_only_columns(
+                HalfHourlySubSystemMarginalCost.id_subsistema,
+                HalfHourlySubSystemMarginalCost.data,
+                HalfHourlySubSystemMarginalCost.hora,
+                HalfHourlySubSystemMarginalCost.custo_marginal_operacao,
+                *[
+                    getattr(HalfHourlySubSystemProductionStatement, column_name)
+                    for column_name in energy_statement_value_columns
                 ],
+                total_generation.label("geracao_total"),
+                (thermal_generation / func.nullif(total_generation, 0)).label(
+                    "participacao_termica"
+                ),
+            ),
+            key_columns=(
+                HalfHourlySubSystemMarginalCost.data,
+                HalfHourlySubSystemMarginalCost.hora,
+                HalfHourlySubSystemMarginalCost.id_subsistema,
+            ),
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+        )
+
+        # the average cost of each subsystem is a window over the joined rows, so the
+        # high cost intervals are known without a second pass over the tables
+        intervals = joined.with_only_columns(
+            HalfHourlySubSystemMarginalCost.id_subsistema,
+            HalfHourlySubSystemMarginalCost.custo_marginal_operacao.label("cmo"),
+            total_generation.label("geracao_total"),
+            thermal_generation.label("geracao_termica"),
+            func.avg(HalfHourlySubSystemMarginalCost.custo_marginal_operacao)
+            .over(partition_by=HalfHourlySubSystemMarginalCost.id_subsistema)
+            .label("cmo_medio"),
+        ).subquery()
+        threshold = (
+            literal(high_cost, Float)
+            if high_cost is not None
+            else intervals.c.cmo_medio
+        )
+        is_high_cost = intervals.c.cmo > threshold
+        summary = (
+            select(
+                intervals.c.id_subsistema,
+                func.count().label("intervalos"),
+                func.avg(intervals.c.cmo).label("custo_marginal_operacao_medio"),
+                (
+                    func.sum(intervals.c.cmo * intervals.c.geracao_total)
+                    / func.nullif(func.sum(intervals.c.geracao_total), 0)
+                ).label("custo_marginal_operacao_ponderado"),
+                func.min(threshold).label("limite_cmo_alto"),
+                func.count(case((is_high_cost, 1))).label("intervalos_cmo_alto"),
+                (
+                    func.sum(case((is_high_cost, intervals.c.geracao_termica)))
+                    / func.nullif(
+                        func.sum(case((is_high_cost, intervals.c.geracao_total))), 0
+                    )
+                ).label("participacao_termica_cmo_alto"),
             )
+            .group_by(intervals.c.id_subsistema)
+            .cte("resumo")
+        )
+
+        # the page and the summary come in a single round trip: every row of the page
+        # is joined to the summary of its subsystem, and the subsystems without rows on
+        # the page come once with the page columns empty. The total is the sum of the
+        # intervals of the summary
+        page = list_statement.cte("pagina")
+        statement = select(
+            summary,
+            *[column for column in page.c if column.name != "id_subsistema"],
+        ).select_from(
+            summary.outerjoin(page, page.c.id_subsistema == summary.c.id_subsistema)
+        )
 
-    async def get_all_half_hourly(
-        self, start_date: date, end_date: date, limit: int, offset: int
-    ) -> HalfHourlySubSystemMarginalCostResponse:
         async with self._session_maker() as session:
-            count_statement = select(
-                func.count(HalfHourlySubSystemMarginalCost.id)
-            ).where(HalfHourlySubSystemMarginalCost.data.between(start_date, end_date))
-
-            list_statement = (
-                select(HalfHourlySubSystemMarginalCost)
-                .where(
-                    HalfHourlySubSystemMarginalCost.data.between(start_date, end_date)
-                )
-                .limit(limit)
-                .offset(offset)
+            rows = (await session.execute(statement)).all()
+
+        result = sorted(
+            (row for row in rows if row.data is not None),
+            key=lambda row: (row.data, row.hora, row.id_subsistema),
+        )
+        if not result:
+            raise NotFoundException(
+                f"Nenhuma medição de custo marginal de operação e balanço de energia semihorários disponível entre as datas {start_date.strftime('%d-%m-%Y')} e {end_date.strftime('%d-%m-%Y')}"
             )
-            result = (await session.execute(list_statement)).scalars().all()
-
-            if not result:
-                raise NotFoundException(
-                    f"Nenhuma medição de custo marginal de operação semanal disponível entre as datas {start_date.strftime('%d-%m-%Y')} e {end_date.strftime('%d-%m-%Y')}"
-                )
-
-            count_result = (await session.execute(count_statement)).scalar_one()
-
-            return HalfHourlySubSystemMarginalCostResponse(
-                total_registros=count_result,
-                data_inicial=start_date,
-                data_final=end_date,
-                dados=[
-                    HalfHourlySubSystemMarginalCostSchema.model_validate(
-                        row, from_attributes=True
-                    )
-                    for row in result
-                ],
+        summary_rows = sorted(
+            {row.id_subsistema: row for row in rows}.values(),
+            key=lambda row: row.id_subsistema,
+        )
+
+        return HalfHourlyCostAndEnergyStatementResponse(
+            total_registros=(
+                sum(row.intervalos for row in summary_rows) if count else None
+            ),
+            data_inicial=start_date,
+            data_final=end_date,
+            resumo=[
+                CostAndEnergySummary.model_validate(row._mapping)
+                for row in summary_rows
+            ],
+            dados=[
+                HalfHourlyCostAndEnergyStatement.model_validate(row._mapping)
+                for row in result[:limit]
+            ],
+            proximo_cursor=next_page_cursor(result, limit),
+        )
+
+    def _joined_with_energy_statements(
+        self,
+        start_date: date,
+        end_date: date,
+        subsystems: tuple[str, ...] | None,
+    ) -> Select:
+        cost = HalfHourlySubSystemMarginalCost
+        energy_statement = HalfHourlySubSystemProductionStatement
+
+        # both tables are filtered by date so each one is read by its own index, and on
+        # Postgres only the partitions of the requested years are scanned
+        statement = (
+            select(cost)
+            .join(
+                energy_statement,
+                and_(
+                    energy_statement.data == cost.data,
+                    energy_statement.hora == cost.hora,
+                    energy_statement.id_subsistema == cost.id_subsistema,
+                ),
+            )
+            .where(
+                cost.data.between(start_date, end_date),
+                energy_statement.data.between(start_date, end_date),
             )
+        )
+        if subsystems:
+            statement = statement.where(cost.id_subsistema.in_(subsystems))
+        return statement
+
+    @cached
+    async def get_aggregated_weekly(
+        self,
+        start_date: date,
+        end_date: date,
+        resolution: Resolution,
+        limit: int,
+        offset: int,
+        subsystems: tuple[str, ...] | None = None,
+    ) -> AggregatedTimeSeriesResponse:
+        return await get_aggregated_time_series(
+            self._session_maker,
+            weekly_costs.model,
+            weekly_costs.value_columns,
+            start_date=start_date,
+            end_date=end_date,
+            resolution=resolution,
+            limit=limit,
+            offset=offset,
+            subsystems=subsystems,
+            description=weekly_costs.description,
+        )
+
+    @cached
+    async def get_aggregated_half_hourly(
+        self,
+        start_date: date,
+        end_date: date,
+        resolution: Resolution,
+        limit: int,
+        offset: int,
+        subsystems: tuple[str, ...] | None = None,
+    ) -> AggregatedTimeSeriesResponse:
+        return await get_aggregated_time_series(
+            self._session_maker,
+            half_hourly_costs.model,
+            half_hourly_costs.value_columns,
+            start_date=start_date,
+            end_date=end_date,
+            resolution=resolution,
+            limit=limit,
+            offset=offset,
+            subsystems=subsystems,
+            description=half_hourly_costs.description,
+        )
+
+    def stream_weekly(
+        self,
+        start_date: date,
+        end_date: date,
+        export_format: ExportFormat,
+        subsystems: tuple[str, ...] | None = None,
+    ) -> AsyncIterator[str]:
+        return stream_time_series(
+            self._session_maker,
+            weekly_costs.model,
+            start_date=start_date,
+            end_date=end_date,
+            export_format=export_format,
+            subsystems=subsystems,
+        )
+
+    def stream_half_hourly(
+        self,
+        start_date: date,
+        end_date: date,
+        export_format: ExportFormat,
+        subsystems: tuple[str, ...] | None = None,
+    ) -> AsyncIterator[str]:
+        return stream_time_series(
+            self._session_maker,
+            half_hourly_costs.model,
+            start_date=start_date,
+            end_date=end_date,
+            export_format=export_format,
+            subsystems=subsystems,
+        )
+
+
+def _total_generation() -> ColumnElement[float]:
+    # a source without a measurement in the interval counts as no generation
+    total = None
+    for column_name in energy_statement_value_columns:
+        generation = func.coalesce(
+            getattr(HalfHourlySubSystemProductionStatement, column_name), 0
+        )
+        total = generation if total is None else total + generation
+    return total
+
+
+def _thermal_generation() -> ColumnElement[float]:
+    return func.coalesce(
+        HalfHourlySubSystemProductionStatement.geracao_termica, 0
+    ) + func.coalesce(
+        HalfHourlySubSystemProductionStatement.geracao_termica_pequena_usina, 0
+    )
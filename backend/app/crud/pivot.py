@@ -0,0 +1,37 @@
+from sqlalchemy import ColumnElement, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..models import Base, SubSystem
+
+
+async def pivoted_columns(
+    session_maker: async_sessionmaker[AsyncSession],
+    model: type[Base],
+    value_columns: list[str],
+    subsystems: tuple[str, ...] | None,
+) -> list[ColumnElement]:
+    """
+    Colunas `<coluna>_<id_subsistema>` de uma série temporal em formato largo, uma por
+    subsistema e medição. O pivô é feito no banco, agrupando as medições de cada
+    instante. Sem filtro todos os subsistemas cadastrados viram colunas
+    """
+    columns_for_subsystems = subsystems
+    if not columns_for_subsystems:
+        async with session_maker() as session:
+            columns_for_subsystems = tuple(
+                (
+                    await session.execute(
+                        select(SubSystem.id_subsistema).order_by(
+                            SubSystem.id_subsistema
+                        )
+                    )
+                ).scalars()
+            )
+
+    return [
+        func.max(
+            case((model.id_subsistema == id_subsistema, getattr(model, column_name)))
+        ).label(f"{column_name}_{id_subsistema}")
+        for id_subsistema in columns_for_subsystems
+        for column_name in value_columns
+    ]
@@ -0,0 +1,192 @@
+from datetime import date
+import re
+
+from sqlalchemy import Select, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..core.cache import cached
+from ..deps import AsyncSessionMakerDep
+from ..exceptions.database import NotFoundException
+from ..models import PowerPlant as PowerPlantTable, PowerPlantVariableCost, search_name
+from ..schemas import (
+    MeritOrderPowerPlant,
+    MeritOrderResponse,
+    OperativeWeek,
+    PowerPlant,
+    PowerPlantCost,
+    PowerPlantCostHistoryResponse,
+)
+from .power_plant_search import (
+    get_power_plant_name_index,
+    has_trigram_index,
+    normalize,
+)
+
+
+class PowerPlantCrud:
+    def __init__(self, session_maker: AsyncSessionMakerDep):
+        self._session_maker: async_sessionmaker[AsyncSession] = session_maker
+
+    @cached
+    async def get_operative_weeks(self) -> list[OperativeWeek]:
+        """Semanas operativas com custo variável unitário das usinas térmicas"""
+        statement = (
+            select(
+                PowerPlantVariableCost.semana_operativa,
+                func.min(PowerPlantVariableCost.data_inicio).label("data_inicio"),
+                func.max(PowerPlantVariableCost.data_fim).label("data_fim"),
+                func.count().label("usinas"),
+            )
+            .group_by(PowerPlantVariableCost.semana_operativa)
+            .order_by(PowerPlantVariableCost.semana_operativa)
+        )
+        async with self._session_maker() as session:
+            result = (await session.execute(statement)).mappings().all()
+
+        if not result:
+            raise NotFoundException(
+                "Nenhum custo variável unitário de usinas térmicas disponível"
+            )
+        return [OperativeWeek.model_validate(row) for row in result]
+
+    @cached
+    async def get_merit_order(
+        self,
+        operative_week: str,
+        subsystems: tuple[str, ...] | None = None,
+    ) -> MeritOrderResponse:
+        """
+        Usinas térmicas de cada subsistema na semana operativa ordenadas pelo custo
+        variável unitário, a ordem de mérito. A posição e a fração acumulada de cada
+        usina são calculadas no banco com funções de janela sobre o índice
+        (semana_operativa, id_subsistema, custo_variavel_unitario, id_modelo_usina)
+        """
+        merit_order = {
+            "partition_by": PowerPlantVariableCost.id_subsistema,
+            "order_by": PowerPlantVariableCost.custo_variavel_unitario,
+        }
+        statement = (
+            select(
+                PowerPlantVariableCost.id_subsistema,
+                PowerPlantVariableCost.id_modelo_usina,
+                PowerPlantVariableCost.usina,
+                PowerPlantVariableCost.custo_variavel_unitario,
+                PowerPlantVariableCost.data_inicio,
+                PowerPlantVariableCost.data_fim,
+                func.rank().over(**merit_order).label("posicao"),
+                func.cume_dist().over(**merit_order).label("fracao_acumulada"),
+            ).where(PowerPlantVariableCost.semana_operativa == operative_week)
+            # same order of the window, so the rows are not sorted again, plants with
+            # the same cost come in the order of the index, by plant id
+            .order_by(
+                PowerPlantVariableCost.id_subsistema,
+                PowerPlantVariableCost.custo_variavel_unitario,
+            )
+        )
+        if subsystems:
+            statement = statement.where(
+                PowerPlantVariableCost.id_subsistema.in_(subsystems)
+            )
+
+        async with self._session_maker() as session:
+            result = (await session.execute(statement)).mappings().all()
+
+        if not result:
+            raise NotFoundException(
+                f"Nenhum custo variável unitário de usinas térmicas disponível na semana operativa '{operative_week}'"
+            )
+
+        return MeritOrderResponse(
+            semana_operativa=operative_week,
+            data_inicio=min(row["data_inicio"] for row in result),
+            data_fim=max(row["data_fim"] for row in result),
+            dados=[MeritOrderPowerPlant.model_validate(row) for row in result],
+        )
+
+    @cached
+    async def get_cost_history(
+        self,
+        power_plant_id: str,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> PowerPlantCostHistoryResponse:
+        """
+        Custo variável unitário de uma usina em cada semana operativa, ordenado pelo
+        início da semana. As datas filtram as semanas iniciadas no intervalo
+        """
+        statement = (
+            select(
+                PowerPlantVariableCost.semana_operativa,
+                PowerPlantVariableCost.data_inicio,
+                PowerPlantVariableCost.data_fim,
+                PowerPlantVariableCost.usina,
+                PowerPlantVariableCost.id_subsistema,
+                PowerPlantVariableCost.custo_variavel_unitario,
+            )
+            .where(PowerPlantVariableCost.id_modelo_usina == power_plant_id)
+            .order_by(PowerPlantVariableCost.data_inicio)
+        )
+        if start_date:
+            statement = statement.where(
+                PowerPlantVariableCost.data_inicio >= start_date
+            )
+        if end_date:
+            statement = statement.where(PowerPlantVariableCost.data_inicio <= end_date)
+
+        async with self._session_maker() as session:
+            result = (await session.execute(statement)).mappings().all()
+
+        if not result:
+            raise NotFoundException(
+                f"Nenhum custo variável unitário disponível para a usina '{power_plant_id}'"
+            )
+
+        return PowerPlantCostHistoryResponse(
+            id_modelo_usina=power_plant_id,
+            total_registros=len(result),
+            dados=[PowerPlantCost.model_validate(row) for row in result],
+        )
+
+    @cached
+    async def search(self, term: str, limit: int) -> list[PowerPlant]:
+        """
+        Usinas com uma palavra do nome começando pelo termo, primeiro as que começam
+        pelo termo, seguidas pelas de nome parecido pela similaridade de trigramas. No
+        Postgres com pg_trgm a busca usa o índice de trigramas do nome, nos demais
+        bancos um índice em memória
+        """
+        async with self._session_maker() as session:
+            if await has_trigram_index(session):
+                result = (
+                    (await session.execute(_trigram_search_statement(term, limit)))
+                    .scalars()
+                    .all()
+                )
+                return [
+                    PowerPlant.model_validate(power_plant, from_attributes=True)
+                    for power_plant in result
+                ]
+
+        index = await get_power_plant_name_index(self._session_maker)
+        return index.search(term, limit)
+
+
+def _trigram_search_statement(term: str, limit: int) -> Select:
+    # the name and the term are compared without accents and in lowercase, like on the
+    # in-memory index
+    name = search_name(PowerPlantTable.usina)
+    term = normalize(term)
+    # the regular expression and the similarity operator are both served by the
+    # trigram index of the normalized name
+    word_start = name.regexp_match(literal("(^|[^[:alnum:]])") + re.escape(term))
+    return (
+        select(PowerPlantTable)
+        .where(word_start | name.bool_op("%")(term))
+        .order_by(
+            name.startswith(term, autoescape=True).desc(),
+            word_start.desc(),
+            func.similarity(name, term).desc(),
+            name,
+        )
+        .limit(limit)
+    )
@@ -0,0 +1,170 @@
+import asyncio
+from bisect import bisect_left
+import unicodedata
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..core.cache import get_dataset_version
+from ..models import PowerPlant as PowerPlantTable
+from ..schemas import PowerPlant
+
+# minimum similarity of a name to be returned when it has no word starting with the
+# searched term, the default threshold of the pg_trgm `%` operator
+SIMILARITY_THRESHOLD = 0.3
+
+
+class PowerPlantNameIndex:
+    """
+    Índice em memória dos nomes das usinas térmicas, usado na busca quando o banco não
+    tem índices de trigramas. O início de cada palavra dos nomes fica em uma lista
+    ordenada, encontrada por busca binária, e os nomes sem palavras com o prefixo
+    buscado são comparados pela similaridade de trigramas, como no pg_trgm
+    """
+
+    def __init__(self, power_plants: list[PowerPlant]):
+        self._power_plants = power_plants
+        self._names = [normalize(power_plant.usina) for power_plant in power_plants]
+        self._trigrams = [trigrams(name) for name in self._names]
+
+        word_starts = sorted(
+            (name[start:], position)
+            for position, name in enumerate(self._names)
+            for start in _word_starts(name)
+        )
+        self._word_start_keys = [key for key, _ in word_starts]
+        self._word_start_positions = [position for _, position in word_starts]
+
+    def search(self, term: str, limit: int) -> list[PowerPlant]:
+        """
+        Usinas com uma palavra do nome começando pelo termo, primeiro as que começam
+        pelo termo, seguidas pelas mais parecidas com ele
+        """
+        term = normalize(term)
+        if not term or limit <= 0:
+            return []
+
+        matches: dict[int, None] = {}
+        index = bisect_left(self._word_start_keys, term)
+        while index < len(self._word_start_keys) and self._word_start_keys[
+            index
+        ].startswith(term):
+            matches[self._word_start_positions[index]] = None
+            index += 1
+
+        ranked = sorted(
+            matches,
+            key=lambda position: (
+                not self._names[position].startswith(term),
+                self._names[position],
+            ),
+        )
+        if len(ranked) < limit:
+            term_trigrams = trigrams(term)
+            similar = []
+            for position, name_trigrams in enumerate(self._trigrams):
+                if position in matches:
+                    continue
+                score = similarity(term_trigrams, name_trigrams)
+                if score >= SIMILARITY_THRESHOLD:
+                    similar.append((-score, self._names[position], position))
+            ranked.extend(position for _, _, position in sorted(similar))
+
+        return [self._power_plants[position] for position in ranked[:limit]]
+
+    def __len__(self) -> int:
+        return len(self._power_plants)
+
+
+def normalize(text: str) -> str:
+    """Texto em minúsculas e sem acentos"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def trigrams(text: str) -> frozenset[str]:
+    # same trigrams of pg_trgm, every word is padded with two spaces before and one after
+    result = set()
+    for word in "".join(char if char.isalnum() else " " for char in text).split():
+        padded = f"  {word} "
+        result.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+def similarity(first: frozenset[str], second: frozenset[str]) -> float:
+    if not first or not second:
+        return 0.0
+    shared = len(first & second)
+    return shared / (len(first) + len(second) - shared)
+
+
+def _word_starts(name: str) -> list[int]:
+    return [
+        position
+        for position, char in enumerate(name)
+        if char.isalnum() and (position == 0 or not name[position - 1].isalnum())
+    ]
+
+
+_trigram_index: bool | None = None
+
+
+async def has_trigram_index(session: AsyncSession) -> bool:
+    """
+    Se o nome das usinas tem o índice de trigramas, criado pela migração junto da
+    função `normalizar_busca` quando o banco é Postgres e tem a extensão pg_trgm
+    """
+    global _trigram_index
+
+    if _trigram_index is None:
+        _trigram_index = session.get_bind().dialect.name == "postgresql" and bool(
+            (
+                await session.execute(
+                    text(
+                        "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm' AND "
+                        "EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'normalizar_busca')"
+                    )
+                )
+            ).first()
+        )
+    return _trigram_index
+
+
+_index: PowerPlantNameIndex | None = None
+_index_version: int | None = None
+_index_lock = asyncio.Lock()
+
+
+async def get_power_plant_name_index(
+    session_maker: async_sessionmaker[AsyncSession],
+) -> PowerPlantNameIndex:
+    """
+    Índice dos nomes das usinas, montado na primeira busca e novamente quando a versão
+    dos dados muda
+    """
+    global _index, _index_version
+
+    version = (await get_dataset_version(session_maker)).versao
+    if _index is not None and _index_version == version:
+        return _index
+
+    async with _index_lock:
+        if _index is None or _index_version != version:
+            async with session_maker() as session:
+                result = (
+                    (
+                        await session.execute(
+                            select(PowerPlantTable).order_by(PowerPlantTable.usina)
+                        )
+                    )
+                    .scalars()
+                    .all()
+                )
+            _index = PowerPlantNameIndex(
+                [
+                    PowerPlant.model_validate(power_plant, from_attributes=True)
+                    for power_plant in result
+                ]
+            )
+            _index_version = version
+    return _index
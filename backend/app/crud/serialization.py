@@ -0,0 +1,92 @@
+from datetime import date, time
+import json
+import re
+from typing import Sequence
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import Column, Row, Select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..core.pagination import next_page_cursor
+from ..models import Base
+
+# orjson writes floats below 1e-4 differently from the json module used by FastAPI,
+# the dates and ids on a page never match this pattern
+_SMALL_FLOAT = re.compile(rb"(?<!\d)0\.0000|e-")
+
+
+def schema_columns(model: type[Base], schema: type[BaseModel]) -> list[Column]:
+    """Colunas da tabela presentes no schema, na ordem dos campos do schema"""
+    table_columns = model.__table__.columns
+    return [
+        table_columns[name] for name in schema.model_fields if name in table_columns
+    ]
+
+
+async def fetch_json_page(
+    session_maker: async_sessionmaker[AsyncSession],
+    count_statement: Select | None,
+    list_statement: Select,
+    limit: int,
+    schema: type[BaseModel] | None,
+    start_date: date,
+    end_date: date,
+) -> bytes | None:
+    """
+    Executa uma consulta paginada de colunas e serializa a resposta diretamente das
+    tuplas retornadas pelo banco, com o mesmo JSON gerado pelo FastAPI a partir dos
+    modelos Pydantic. Sem schema cada linha é serializada apenas com as colunas da
+    consulta. Retorna None quando a página não tem linhas
+    """
+    async with session_maker() as session:
+        rows = (await session.execute(list_statement)).all()
+
+        if not rows:
+            return None
+
+        count_result = (
+            (await session.execute(count_statement)).scalar_one()
+            if count_statement is not None
+            else None
+        )
+
+    return orjson.dumps(
+        {
+            "total_registros": count_result,
+            "data_inicial": start_date,
+            "data_final": end_date,
+            "dados": orjson.Fragment(_encode_rows(schema, rows[:limit])),
+            "proximo_cursor": next_page_cursor(rows, limit),
+        }
+    )
+
+
+def _encode_rows(schema: type[BaseModel] | None, rows: Sequence[Row]) -> bytes:
+    # fields without a column keep their default value, as in model_validate
+    template = (
+        {name: field.default for name, field in schema.model_fields.items()}
+        if schema is not None
+        else {}
+    )
+    column_names = rows[0]._fields
+    records = []
+    for row in rows:
+        record = template.copy()
+        record.update(zip(column_names, row))
+        records.append(record)
+
+    content = orjson.dumps(records)
+    if _SMALL_FLOAT.search(content):
+        content = json.dumps(
+            records,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+            default=_isoformat,
+        ).encode()
+    return content
+
+
+def _isoformat(value: date | time) -> str:
+    return value.isoformat()
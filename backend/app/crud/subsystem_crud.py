@@ -1,4 +1,5 @@
 from sqlalchemy import func, select
+from ..core.cache import cached
 from ..deps import AsyncSessionMakerDep
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
@@ -11,6 +12,7 @@ class SubSystemCrud:
     def __init__(self, session_maker: AsyncSessionMakerDep):
         self._session_maker: async_sessionmaker[AsyncSession] = session_maker
 
+    @cached
     async def get(self, id: str) -> SubSystem:
         async with self._session_maker() as session:
             result = await session.get(SubSystemTable, id)
@@ -20,6 +22,7 @@ class SubSystemCrud:
                 )
             return SubSystem.model_validate(result, from_attributes=True)
 
+    @cached
     async def get_all(self) -> list[SubSystem]:
         async with self._session_maker() as session:
             list_statement = select(SubSystemTable).order_by(
@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+from datetime import date
+
+from pydantic import BaseModel
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.exceptions.database import NotFoundException
+
+from ..core.pagination import paginate
+from .columnar import ColumnarPage, data_columns, fetch_columnar_page
+from .counting import row_count_statement
+from .pivot import pivoted_columns
+from .serialization import fetch_json_page, schema_columns
+from ..models import Base
+from ..schemas import TableLayout
+
+
+@dataclass(frozen=True)
+class TimeSeries:
+    """
+    Tabela de medições por subsistema listada pela API: o modelo, o schema de uma
+    linha da resposta em JSON, as colunas de medições e a descrição usada nas
+    mensagens de erro
+    """
+
+    model: type[Base]
+    schema: type[BaseModel]
+    value_columns: list[str]
+    description: str
+
+    @property
+    def time_columns(self) -> list[InstrumentedAttribute]:
+        # the weekly table has no time column, its rows are keyed only by date
+        columns = [self.model.data]
+        if "hora" in self.model.__table__.columns:
+            columns.append(self.model.hora)
+        return columns
+
+
+async def time_series_statements(
+    session_maker: async_sessionmaker[AsyncSession],
+    series: TimeSeries,
+    start_date: date,
+    end_date: date,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+    subsystems: tuple[str, ...] | None,
+    layout: TableLayout,
+    columnar: bool,
+) -> tuple[Select, Select]:
+    """
+    Consultas de contagem e de listagem de uma página de série temporal. Os filtros são
+    os mesmos nos dois layouts: no longo cada medição é uma linha, paginada pela chave
+    (data, hora, id_subsistema); no largo as medições de cada instante são pivotadas
+    em colunas `<coluna>_<id_subsistema>` e a paginação e o total contam instantes
+    """
+    model = series.model
+    statement = select(model).where(model.data.between(start_date, end_date))
+    if subsystems:
+        statement = statement.where(model.id_subsistema.in_(subsystems))
+
+    if layout == TableLayout.LARGO:
+        key_columns = series.time_columns
+        statement = statement.with_only_columns(
+            *key_columns,
+            *await pivoted_columns(
+                session_maker, model, series.value_columns, subsystems
+            ),
+        ).group_by(*key_columns)
+        count_statement = select(func.count()).select_from(statement.subquery())
+    else:
+        key_columns = [*series.time_columns, model.id_subsistema]
+        statement = statement.with_only_columns(
+            *(data_columns(model) if columnar else schema_columns(model, series.schema))
+        )
+        count_statement = row_count_statement(model, start_date, end_date, subsystems)
+
+    list_statement = paginate(
+        statement,
+        key_columns=key_columns,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+    )
+    return count_statement, list_statement
+
+
+async def fetch_time_series_page(
+    session_maker: async_sessionmaker[AsyncSession],
+    series: TimeSeries,
+    start_date: date,
+    end_date: date,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+    count: bool,
+    subsystems: tuple[str, ...] | None,
+    layout: TableLayout,
+    columnar: bool,
+) -> bytes | ColumnarPage:
+    """
+    Executa a consulta de uma página de série temporal e a serializa em JSON ou, com
+    `columnar`, em uma tabela Arrow. A mesma consulta atende aos dois formatos, apenas
+    a serialização muda. Com `count` falso o total de registros não é calculado. Sem
+    linhas na página a medição é dada como não encontrada
+    """
+    count_statement, list_statement = await time_series_statements(
+        session_maker,
+        series,
+        start_date,
+        end_date,
+        limit,
+        offset,
+        cursor,
+        subsystems,
+        layout,
+        columnar,
+    )
+    if not count:
+        count_statement = None
+
+    page: bytes | ColumnarPage | None
+    if columnar:
+        page = await fetch_columnar_page(
+            session_maker, count_statement, list_statement, limit
+        )
+        if not page.table.num_rows:
+            page = None
+    else:
+        page = await fetch_json_page(
+            session_maker,
+            count_statement,
+            list_statement,
+            limit,
+            # the wide columns are not in a schema, the rows are serialized as read
+            series.schema if layout == TableLayout.LONGO else None,
+            start_date,
+            end_date,
+        )
+
+    if page is None:
+        raise NotFoundException(
+            f"Nenhuma medição de {series.description} disponível entre as datas {start_date.strftime('%d-%m-%Y')} e {end_date.strftime('%d-%m-%Y')}"
+        )
+    return page
@@ -1,6 +1,6 @@
 from typing import Annotated
 
-from fastapi import Depends
+from fastapi import Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from .core.database import get_async_session
@@ -8,3 +8,16 @@ from .core.database import get_async_session
 AsyncSessionMakerDep = Annotated[
     async_sessionmaker[AsyncSession], Depends(get_async_session)
 ]
+
+
+def get_subsystem_filter(
+    id_subsistema: Annotated[
+        list[str] | None,
+        Query(description="Subsistemas retornados, pode ser repetido"),
+    ] = None,
+) -> tuple[str, ...] | None:
+    # sorted without repetitions so the same filter always hits the same cache entry
+    return tuple(sorted(set(id_subsistema))) if id_subsistema else None
+
+
+SubSystemFilterDep = Annotated[tuple[str, ...] | None, Depends(get_subsystem_filter)]
@@ -1,9 +1,38 @@
+import asyncio
+from contextlib import asynccontextmanager
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routes import subsystems, energy_statements, marginal_costs
+from .core.compression import CompressionMiddleware
+from .core.config import config
+from .core.security import refresh_signing_keys_periodically, signing_keys
+from .routes import (
+    subsystems,
+    energy_statements,
+    marginal_costs,
+    metrics,
+    power_plants,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await signing_keys.refresh()
+    except Exception:
+        # the keys are fetched again when the first token arrives
+        logger.exception("Error prefetching signing keys")
 
-app = FastAPI(title="SIN Dashboard API")
+    refresh_task = asyncio.create_task(refresh_signing_keys_periodically())
+    yield
+    refresh_task.cancel()
+
+
+app = FastAPI(title="SIN Dashboard API", lifespan=lifespan)
 
 origins = ["http://localhost:3000", "http://localhost:5173"]
 
@@ -13,7 +42,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # pagination metadata of the columnar (Arrow/Parquet) responses
+    expose_headers=["X-Total-Registros", "X-Proximo-Cursor"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=config.COMPRESSION_MINIMUM_SIZE)
 
 app.include_router(subsystems.router, prefix="/subsistemas", tags=["Subsistemas"])
 app.include_router(
@@ -22,3 +54,7 @@ app.include_router(
 app.include_router(
     marginal_costs.router, prefix="/cmo", tags=["Custo Marginal de Operação"]
 )
+app.include_router(
+    power_plants.router, prefix="/usinas-termicas", tags=["Usinas Térmicas"]
+)
+app.include_router(metrics.router, prefix="/metricas", tags=["Métricas"])
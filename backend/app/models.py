@@ -1,6 +1,14 @@
-from datetime import date, time
-
-from sqlalchemy import ForeignKey, MetaData
+from datetime import date, datetime, time
+
+from sqlalchemy import (
+    ColumnElement,
+    ForeignKey,
+    Index,
+    MetaData,
+    String,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -32,6 +40,14 @@ class SubSystem(Base):
 
 class WeeklySubSystemMarginalCost(Base):
     __tablename__ = "custo_marginal_operacao_semanal"
+    # the natural key also backs the date range filters and the ordering of the series,
+    # the subsystem index the queries filtered by subsystem
+    __table_args__ = (
+        UniqueConstraint("data", "id_subsistema"),
+        Index(
+            "ix_custo_marginal_operacao_semanal_id_subsistema", "id_subsistema", "data"
+        ),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, init=False)
     id_subsistema: Mapped[int] = mapped_column(ForeignKey("subsistema.id_subsistema"))
 
@@ -45,6 +61,15 @@ class WeeklySubSystemMarginalCost(Base):
 
 class HalfHourlySubSystemMarginalCost(Base):
     __tablename__ = "custo_marginal_operacao_semihorario"
+    __table_args__ = (
+        UniqueConstraint("data", "hora", "id_subsistema"),
+        Index(
+            "ix_custo_marginal_operacao_semihorario_id_subsistema",
+            "id_subsistema",
+            "data",
+            "hora",
+        ),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, init=False)
     id_subsistema: Mapped[str] = mapped_column(ForeignKey("subsistema.id_subsistema"))
 
@@ -56,6 +81,16 @@ class HalfHourlySubSystemMarginalCost(Base):
 
 class PowerPlantVariableCost(Base):
     __tablename__ = "custo_variavel_unitario_usinas_termicas"
+    __table_args__ = (
+        Index(
+            "ix_custo_variavel_unitario_usinas_termicas_semana_operativa",
+            "semana_operativa",
+            "id_subsistema",
+            "custo_variavel_unitario",
+            "id_modelo_usina",
+        ),
+        UniqueConstraint("id_modelo_usina", "data_inicio"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, init=False)
     id_subsistema: Mapped[str] = mapped_column(ForeignKey("subsistema.id_subsistema"))
     id_modelo_usina: Mapped[str] = mapped_column()
@@ -67,6 +102,35 @@ class PowerPlantVariableCost(Base):
     data_fim: Mapped[date] = mapped_column()
 
 
+class PowerPlant(Base):
+    """
+    Usinas térmicas com o nome e o subsistema da semana operativa mais recente,
+    recalculadas pelo script de carga para a busca por nome. No Postgres com a
+    extensão pg_trgm o nome sem acentos e em minúsculas tem um índice de trigramas
+    """
+
+    __tablename__ = "usina_termica"
+    id_modelo_usina: Mapped[str] = mapped_column(primary_key=True)
+    usina: Mapped[str] = mapped_column()
+    id_subsistema: Mapped[str] = mapped_column(ForeignKey("subsistema.id_subsistema"))
+
+
+def search_name(name: ColumnElement[str]) -> ColumnElement[str]:
+    """
+    Nome sem acentos e em minúsculas, pela função `normalizar_busca` criada pela
+    migração no Postgres com pg_trgm, a mesma normalização da busca em memória
+    """
+    return func.normalizar_busca(name, type_=String)
+
+
+Index(
+    "ix_usina_termica_usina",
+    search_name(PowerPlant.__table__.c.usina).label("nome_busca"),
+    postgresql_using="gin",
+    postgresql_ops={"nome_busca": "gin_trgm_ops"},
+)
+
+
 class SubSystemProductionStatement(Base):
     __abstract__ = True
     id: Mapped[int] = mapped_column(primary_key=True, init=False)
@@ -83,11 +147,90 @@ class SubSystemProductionStatement(Base):
 
 class HourlySubSystemProductionStatement(SubSystemProductionStatement):
     __tablename__ = "balanco_subsistema_horario"
+    __table_args__ = (
+        UniqueConstraint("data", "hora", "id_subsistema"),
+        Index(
+            "ix_balanco_subsistema_horario_id_subsistema",
+            "id_subsistema",
+            "data",
+            "hora",
+        ),
+    )
     valor_carga: Mapped[float | None] = mapped_column()
     valor_intercambio: Mapped[float | None] = mapped_column()
 
 
 class HalfHourlySubSystemProductionStatement(SubSystemProductionStatement):
     __tablename__ = "balanco_subsistema_semihorario"
+    __table_args__ = (
+        UniqueConstraint("data", "hora", "id_subsistema"),
+        Index(
+            "ix_balanco_subsistema_semihorario_id_subsistema",
+            "id_subsistema",
+            "data",
+            "hora",
+        ),
+    )
     geracao_hidraulica_pequena_usina: Mapped[float] = mapped_column()
     geracao_termica_pequena_usina: Mapped[float] = mapped_column()
+
+
+class DatasetVersion(Base):
+    """
+    Versão dos dados carregados, incrementada a cada execução do script de carga para
+    invalidar as respostas em cache
+    """
+
+    __tablename__ = "versao_dados"
+    id: Mapped[int] = mapped_column(primary_key=True, init=False)
+    versao: Mapped[int] = mapped_column()
+    # naive UTC time of the last load
+    atualizado_em: Mapped[datetime] = mapped_column()
+
+
+class DailyRowCount(Base):
+    """
+    Quantidade de medições de cada tabela de série temporal por dia, recalculada pelo
+    script de carga para evitar contagens sobre todo o intervalo consultado
+    """
+
+    __tablename__ = "contagem_diaria"
+    __table_args__ = (UniqueConstraint("tabela", "data"),)
+    id: Mapped[int] = mapped_column(primary_key=True, init=False)
+    tabela: Mapped[str] = mapped_column()
+    data: Mapped[date] = mapped_column()
+    quantidade: Mapped[int] = mapped_column()
+
+
+class SeriesRollup(Base):
+    """
+    Soma, mínimo, máximo e quantidade de medições de uma coluna de valores de uma
+    tabela de série temporal por subsistema e período, recalculados pelo script de
+    carga para que as agregações não percorram todas as medições do intervalo
+    """
+
+    __abstract__ = True
+    id: Mapped[int] = mapped_column(primary_key=True, init=False)
+    tabela: Mapped[str] = mapped_column()
+    coluna: Mapped[str] = mapped_column()
+    id_subsistema: Mapped[str] = mapped_column(ForeignKey("subsistema.id_subsistema"))
+    periodo: Mapped[date] = mapped_column()
+
+    # rows of the period, including the ones without a value on the column
+    total_medicoes: Mapped[int] = mapped_column()
+    # rows with a value on the column, used to calculate the average
+    quantidade: Mapped[int] = mapped_column()
+    soma: Mapped[float | None] = mapped_column()
+    minimo: Mapped[float | None] = mapped_column()
+    maximo: Mapped[float | None] = mapped_column()
+
+
+class DailySeriesRollup(SeriesRollup):
+    __tablename__ = "agregado_diario"
+    # the unique key also backs the date range filters of each table
+    __table_args__ = (UniqueConstraint("tabela", "periodo", "id_subsistema", "coluna"),)
+
+
+class MonthlySeriesRollup(SeriesRollup):
+    __tablename__ = "agregado_mensal"
+    __table_args__ = (UniqueConstraint("tabela", "periodo", "id_subsistema", "coluna"),)
@@ -1,58 +1,154 @@
 from datetime import date
-from fastapi import APIRouter, Security
+from typing import Annotated
+
+from fastapi import APIRouter, Header, Response, Security
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy import select
 
+from ..core.responses import (
+    columnar_format_from_accept,
+    columnar_responses,
+    export_response,
+    page_response,
+)
+from ..core.http_cache import ConditionalRoute
 from ..core.security import validate_token
 from ..crud.energy_statement_crud import EnergyStatementCrud
 
 from ..exceptions.query import InvalidArgumentException
 
 
-from ..deps import AsyncSessionMakerDep
+from ..deps import AsyncSessionMakerDep, SubSystemFilterDep
 
-from ..schemas import EnergyStatementResponse, HalfHourlyEnergyStatementResponse
+from ..schemas import (
+    AggregatedTimeSeriesResponse,
+    EnergyStatementResponse,
+    ExportFormat,
+    HalfHourlyEnergyStatementResponse,
+    Resolution,
+    TableLayout,
+)
 
-router = APIRouter(dependencies=[Security(validate_token)])
+router = APIRouter(
+    dependencies=[Security(validate_token)], route_class=ConditionalRoute
+)
 
 
-@router.get("/horario")
+@router.get(
+    "/horario",
+    response_model=EnergyStatementResponse,
+    response_class=JSONResponse,
+    responses=columnar_responses,
+)
 async def get_hourly_energy_statements(
     data_inicial: date,
     data_final: date,
     session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
     limite: int = 500,
     deslocamento: int = 0,
-) -> EnergyStatementResponse:
+    cursor: str | None = None,
+    contar: bool = True,
+    formato: TableLayout = TableLayout.LONGO,
+    accept: Annotated[str | None, Header()] = None,
+) -> Response:
     """
     Retorna o balanço de energia geral com os dados de todos os subsistemas agrupados
     por data e hora de medição. Utiliza as medições no padrão antigo, medidas de hora em
-    hora. Medidos desde primeiro de janeiro de 2000 até 13 de março de 2025
+    hora. Medidos desde primeiro de janeiro de 2000 até 13 de março de 2025.
+    Para páginas profundas informe no parâmetro `cursor` o `proximo_cursor` da página
+    anterior, nesse caso o deslocamento é ignorado. Com o cabeçalho `Accept` igual a
+    `application/vnd.apache.arrow.stream` ou `application/x-parquet` a página é
+    retornada em formato colunar, com o total e o próximo cursor nos cabeçalhos
+    `X-Total-Registros` e `X-Proximo-Cursor`. Clientes que apenas avançam pelas
+    páginas podem informar `contar=false` para não calcular o total de registros.
+    Com `formato=largo` a página tem uma linha por data e hora e uma coluna
+    `<coluna>_<id_subsistema>` por subsistema, pivotada no banco
     """
     if data_inicial > data_final:
         raise InvalidArgumentException(
             "Data inicial não pode ser posterior à data final"
         )
-    crud = EnergyStatementCrud(session_maker)
-    return await crud.get_hourly_energy_statements(
+    columnar_format = columnar_format_from_accept(accept)
+    page = await EnergyStatementCrud(session_maker).get_hourly_energy_statements(
         data_inicial=data_inicial,
         data_final=data_final,
         limit=limite,
         offset=deslocamento,
+        cursor=cursor,
+        count=contar,
+        subsystems=subsistemas,
+        layout=formato,
+        columnar=columnar_format is not None,
     )
+    return page_response(page, columnar_format)
 
 
-@router.get("/semihorario")
+@router.get(
+    "/semihorario",
+    response_model=HalfHourlyEnergyStatementResponse,
+    response_class=JSONResponse,
+    responses=columnar_responses,
+)
 async def get_half_hourly_energy_statements(
     data_inicial: date,
     data_final: date,
     session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
     limite: int = 500,
     deslocamento: int = 0,
-) -> HalfHourlyEnergyStatementResponse:
+    cursor: str | None = None,
+    contar: bool = True,
+    formato: TableLayout = TableLayout.LONGO,
+    accept: Annotated[str | None, Header()] = None,
+) -> Response:
     """
     Retorna o balanço de energia geral com os dados de todos os subsistemas agrupados
     por data e hora de medição. Utiliza as medições no padrão DESSEM, medidas a cada
-    meia hora. Os dados estão disponíveis de 2023-08-15 até 2024-03-03
+    meia hora. Os dados estão disponíveis de 2023-08-15 até 2024-03-03.
+    Para páginas profundas informe no parâmetro `cursor` o `proximo_cursor` da página
+    anterior, nesse caso o deslocamento é ignorado. Com o cabeçalho `Accept` igual a
+    `application/vnd.apache.arrow.stream` ou `application/x-parquet` a página é
+    retornada em formato colunar, com o total e o próximo cursor nos cabeçalhos
+    `X-Total-Registros` e `X-Proximo-Cursor`. Clientes que apenas avançam pelas
+    páginas podem informar `contar=false` para não calcular o total de registros.
+    Com `formato=largo` a página tem uma linha por data e hora e uma coluna
+    `<coluna>_<id_subsistema>` por subsistema, pivotada no banco
+    """
+    if data_inicial > data_final:
+        raise InvalidArgumentException(
+            "Data inicial não pode ser posterior à data final"
+        )
+
+    columnar_format = columnar_format_from_accept(accept)
+    page = await EnergyStatementCrud(session_maker).get_half_hourly_energy_statements(
+        data_inicial=data_inicial,
+        data_final=data_final,
+        limit=limite,
+        offset=deslocamento,
+        cursor=cursor,
+        count=contar,
+        subsystems=subsistemas,
+        layout=formato,
+        columnar=columnar_format is not None,
+    )
+    return page_response(page, columnar_format)
+
+
+@router.get("/horario/agregado")
+async def get_aggregated_hourly_energy_statements(
+    data_inicial: date,
+    data_final: date,
+    resolucao: Resolution,
+    session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
+    limite: int = 500,
+    deslocamento: int = 0,
+) -> AggregatedTimeSeriesResponse:
+    """
+    Retorna o balanço de energia horário de cada subsistema agregado por dia, semana,
+    mês ou ano, com a soma, média, mínimo e máximo de cada medição no período. A
+    agregação é feita no banco, evitando o envio das medições individuais
     """
     if data_inicial > data_final:
         raise InvalidArgumentException(
@@ -60,9 +156,107 @@ async def get_half_hourly_energy_statements(
         )
 
     crud = EnergyStatementCrud(session_maker)
-    return await crud.get_half_hourly_energy_statements(
+    return await crud.get_aggregated_hourly_energy_statements(
         data_inicial=data_inicial,
         data_final=data_final,
+        resolution=resolucao,
         limit=limite,
         offset=deslocamento,
+        subsystems=subsistemas,
+    )
+
+
+@router.get("/semihorario/agregado")
+async def get_aggregated_half_hourly_energy_statements(
+    data_inicial: date,
+    data_final: date,
+    resolucao: Resolution,
+    session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
+    limite: int = 500,
+    deslocamento: int = 0,
+) -> AggregatedTimeSeriesResponse:
+    """
+    Retorna o balanço de energia semihorário de cada subsistema agregado por dia,
+    semana, mês ou ano, com a soma, média, mínimo e máximo de cada medição no período
+    """
+    if data_inicial > data_final:
+        raise InvalidArgumentException(
+            "Data inicial não pode ser posterior à data final"
+        )
+
+    crud = EnergyStatementCrud(session_maker)
+    return await crud.get_aggregated_half_hourly_energy_statements(
+        data_inicial=data_inicial,
+        data_final=data_final,
+        resolution=resolucao,
+        limit=limite,
+        offset=deslocamento,
+        subsystems=subsistemas,
+    )
+
+
+@router.get("/horario/exportar")
+async def export_hourly_energy_statements(
+    data_inicial: date,
+    data_final: date,
+    session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
+    formato: ExportFormat = ExportFormat.CSV,
+) -> StreamingResponse:
+    """
+    Exporta todas as medições horárias do balanço de energia no intervalo, em CSV ou
+    NDJSON. As linhas são enviadas à medida que são lidas do banco, sem o limite de
+    registros das rotas paginadas
+    """
+    if data_inicial > data_final:
+        raise InvalidArgumentException(
+            "Data inicial não pode ser posterior à data final"
+        )
+
+    crud = EnergyStatementCrud(session_maker)
+    return export_response(
+        crud.stream_hourly_energy_statements(
+            data_inicial=data_inicial,
+            data_final=data_final,
+            export_format=formato,
+            subsystems=subsistemas,
+        ),
+        export_format=formato,
+        table_name="balanco_subsistema_horario",
+        start_date=data_inicial,
+        end_date=data_final,
+    )
+
+
+@router.get("/semihorario/exportar")
+async def export_half_hourly_energy_statements(
+    data_inicial: date,
+    data_final: date,
+    session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
+    formato: ExportFormat = ExportFormat.CSV,
+) -> StreamingResponse:
+    """
+    Exporta todas as medições semihorárias do balanço de energia no intervalo, em CSV
+    ou NDJSON. As linhas são enviadas à medida que são lidas do banco, sem o limite de
+    registros das rotas paginadas
+    """
+    if data_inicial > data_final:
+        raise InvalidArgumentException(
+            "Data inicial não pode ser posterior à data final"
+        )
+
+    crud = EnergyStatementCrud(session_maker)
+    return export_response(
+        crud.stream_half_hourly_energy_statements(
+            data_inicial=data_inicial,
+            data_final=data_final,
+            export_format=formato,
+            subsystems=subsistemas,
+        ),
+        export_format=formato,
+        table_name="balanco_subsistema_semihorario",
+        start_date=data_inicial,
+        end_date=data_final,
     )
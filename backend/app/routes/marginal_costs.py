@@ -1,32 +1,67 @@
 from datetime import date
-from fastapi import APIRouter, Security
+from typing import Annotated
 
+from fastapi import APIRouter, Header, Response, Security
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from ..core.responses import (
+    columnar_format_from_accept,
+    columnar_responses,
+    export_response,
+    page_response,
+)
+from ..core.http_cache import ConditionalRoute
 from ..core.security import validate_token
 
 from ..exceptions.query import InvalidArgumentException
 
 from ..crud.marginal_costs_crud import CostCrud
-from ..deps import AsyncSessionMakerDep
+from ..deps import AsyncSessionMakerDep, SubSystemFilterDep
 from ..schemas import (
+    AggregatedTimeSeriesResponse,
+    ExportFormat,
+    HalfHourlyCostAndEnergyStatementResponse,
     HalfHourlySubSystemMarginalCostResponse,
+    Resolution,
+    TableLayout,
     WeeklySubSystemMarginalCostResponse,
 )
 
-router = APIRouter(dependencies=[Security(validate_token)])
+router = APIRouter(
+    dependencies=[Security(validate_token)], route_class=ConditionalRoute
+)
 
 
-@router.get("/semanal")
+@router.get(
+    "/semanal",
+    response_model=WeeklySubSystemMarginalCostResponse,
+    response_class=JSONResponse,
+    responses=columnar_responses,
+)
 async def get_weekly_costs(
     data_inicial: date,
     data_final: date,
     session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
     limite: int = 500,
     deslocamento: int = 0,
-) -> WeeklySubSystemMarginalCostResponse:
+    cursor: str | None = None,
+    contar: bool = True,
+    formato: TableLayout = TableLayout.LONGO,
+    accept: Annotated[str | None, Header()] = None,
+) -> Response:
     """
     Retorna informações do Custo Marginal de Operação de todos os subsistemas agrupadas
     pela semana de medição. Os dados estão disponíveis da primeira semana de 2005
     (07/01/2005) até a primeira semana de março em 2024 (08/03/2024).
+    Para páginas profundas informe no parâmetro `cursor` o `proximo_cursor` da página
+    anterior, nesse caso o deslocamento é ignorado. Com o cabeçalho `Accept` igual a
+    `application/vnd.apache.arrow.stream` ou `application/x-parquet` a página é
+    retornada em formato colunar, com o total e o próximo cursor nos cabeçalhos
+    `X-Total-Registros` e `X-Proximo-Cursor`. Clientes que apenas avançam pelas
+    páginas podem informar `contar=false` para não calcular o total de registros.
+    Com `formato=largo` a página tem uma linha por semana e uma coluna
+    `<coluna>_<id_subsistema>` por subsistema, pivotada no banco
     """
 
     if data_inicial > data_final:
@@ -34,24 +69,213 @@ async def get_weekly_costs(
             "Data inicial não pode ser posterior à data final"
         )
 
-    crud = CostCrud(session_maker)
-    return await crud.get_all_weekly(
-        start_date=data_inicial, end_date=data_final, limit=limite, offset=deslocamento
+    columnar_format = columnar_format_from_accept(accept)
+    page = await CostCrud(session_maker).get_all_weekly(
+        start_date=data_inicial,
+        end_date=data_final,
+        limit=limite,
+        offset=deslocamento,
+        cursor=cursor,
+        count=contar,
+        subsystems=subsistemas,
+        layout=formato,
+        columnar=columnar_format is not None,
     )
+    return page_response(page, columnar_format)
 
 
-@router.get("/semihorario")
+@router.get(
+    "/semihorario",
+    response_model=HalfHourlySubSystemMarginalCostResponse,
+    response_class=JSONResponse,
+    responses=columnar_responses,
+)
 async def get_half_hourly_costs(
     data_inicial: date,
     data_final: date,
     session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
     limite: int = 500,
     deslocamento: int = 0,
-) -> HalfHourlySubSystemMarginalCostResponse:
+    cursor: str | None = None,
+    contar: bool = True,
+    formato: TableLayout = TableLayout.LONGO,
+    accept: Annotated[str | None, Header()] = None,
+) -> Response:
     """
     Retorna o valor do Custo Marginal de Operação de todos os subsistemas agrupados
     pela data e hora da medição, os intervalos de medição são de 30 minutos. Os dados
-    estão disponíveis de 1º de janeiro de 2020 (01/01/2020) até 3 de março de 2024 (03/03/2024)
+    estão disponíveis de 1º de janeiro de 2020 (01/01/2020) até 3 de março de 2024 (03/03/2024).
+    Para páginas profundas informe no parâmetro `cursor` o `proximo_cursor` da página
+    anterior, nesse caso o deslocamento é ignorado. Com o cabeçalho `Accept` igual a
+    `application/vnd.apache.arrow.stream` ou `application/x-parquet` a página é
+    retornada em formato colunar, com o total e o próximo cursor nos cabeçalhos
+    `X-Total-Registros` e `X-Proximo-Cursor`. Clientes que apenas avançam pelas
+    páginas podem informar `contar=false` para não calcular o total de registros.
+    Com `formato=largo` a página tem uma linha por data e hora e uma coluna
+    `<coluna>_<id_subsistema>` por subsistema, pivotada no banco
+    """
+    if data_inicial > data_final:
+        raise InvalidArgumentException(
+            "Data inicial não pode ser posterior à data final"
+        )
+
+    columnar_format = columnar_format_from_accept(accept)
+    page = await CostCrud(session_maker).get_all_half_hourly(
+        start_date=data_inicial,
+        end_date=data_final,
+        limit=limite,
+        offset=deslocamento,
+        cursor=cursor,
+        count=contar,
+        subsystems=subsistemas,
+        layout=formato,
+        columnar=columnar_format is not None,
+    )
+    return page_response(page, columnar_format)
+
+
+@router.get("/semihorario/balanco-energia")
+async def get_half_hourly_costs_with_energy_statements(
+    data_inicial: date,
+    data_final: date,
+    session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
+    limite: int = 500,
+    deslocamento: int = 0,
+    cursor: str | None = None,
+    contar: bool = True,
+    cmo_alto: float | None = None,
+) -> HalfHourlyCostAndEnergyStatementResponse:
+    """
+    Retorna o Custo Marginal de Operação semihorário de cada subsistema junto do
+    balanço de energia semihorário do mesmo instante, unidos no banco, com a geração
+    total e a participação térmica de cada intervalo. O resumo traz por subsistema o
+    CMO médio, o CMO ponderado pela geração e a participação térmica nos intervalos
+    de CMO alto, acima de `cmo_alto` ou, quando não informado, da média do
+    subsistema no período. A paginação segue as rotas de listagem
+    """
+    if data_inicial > data_final:
+        raise InvalidArgumentException(
+            "Data inicial não pode ser posterior à data final"
+        )
+
+    crud = CostCrud(session_maker)
+    return await crud.get_half_hourly_with_energy_statements(
+        start_date=data_inicial,
+        end_date=data_final,
+        limit=limite,
+        offset=deslocamento,
+        cursor=cursor,
+        count=contar,
+        subsystems=subsistemas,
+        high_cost=cmo_alto,
+    )
+
+
+@router.get("/semanal/agregado")
+async def get_aggregated_weekly_costs(
+    data_inicial: date,
+    data_final: date,
+    resolucao: Resolution,
+    session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
+    limite: int = 500,
+    deslocamento: int = 0,
+) -> AggregatedTimeSeriesResponse:
+    """
+    Retorna o Custo Marginal de Operação semanal de cada subsistema agregado por
+    semana, mês ou ano, com a soma, média, mínimo e máximo de cada custo no período
+    """
+    if data_inicial > data_final:
+        raise InvalidArgumentException(
+            "Data inicial não pode ser posterior à data final"
+        )
+
+    crud = CostCrud(session_maker)
+    return await crud.get_aggregated_weekly(
+        start_date=data_inicial,
+        end_date=data_final,
+        resolution=resolucao,
+        limit=limite,
+        offset=deslocamento,
+        subsystems=subsistemas,
+    )
+
+
+@router.get("/semihorario/agregado")
+async def get_aggregated_half_hourly_costs(
+    data_inicial: date,
+    data_final: date,
+    resolucao: Resolution,
+    session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
+    limite: int = 500,
+    deslocamento: int = 0,
+) -> AggregatedTimeSeriesResponse:
+    """
+    Retorna o Custo Marginal de Operação semihorário de cada subsistema agregado por
+    dia, semana, mês ou ano, com a soma, média, mínimo e máximo do custo no período
+    """
+    if data_inicial > data_final:
+        raise InvalidArgumentException(
+            "Data inicial não pode ser posterior à data final"
+        )
+
+    crud = CostCrud(session_maker)
+    return await crud.get_aggregated_half_hourly(
+        start_date=data_inicial,
+        end_date=data_final,
+        resolution=resolucao,
+        limit=limite,
+        offset=deslocamento,
+        subsystems=subsistemas,
+    )
+
+
+@router.get("/semanal/exportar")
+async def export_weekly_costs(
+    data_inicial: date,
+    data_final: date,
+    session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
+    formato: ExportFormat = ExportFormat.CSV,
+) -> StreamingResponse:
+    """
+    Exporta todos os registros do Custo Marginal de Operação semanal no intervalo, em
+    CSV ou NDJSON. As linhas são enviadas à medida que são lidas do banco
+    """
+    if data_inicial > data_final:
+        raise InvalidArgumentException(
+            "Data inicial não pode ser posterior à data final"
+        )
+
+    crud = CostCrud(session_maker)
+    return export_response(
+        crud.stream_weekly(
+            start_date=data_inicial,
+            end_date=data_final,
+            export_format=formato,
+            subsystems=subsistemas,
+        ),
+        export_format=formato,
+        table_name="custo_marginal_operacao_semanal",
+        start_date=data_inicial,
+        end_date=data_final,
+    )
+
+
+@router.get("/semihorario/exportar")
+async def export_half_hourly_costs(
+    data_inicial: date,
+    data_final: date,
+    session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
+    formato: ExportFormat = ExportFormat.CSV,
+) -> StreamingResponse:
+    """
+    Exporta todos os registros do Custo Marginal de Operação semihorário no intervalo,
+    em CSV ou NDJSON. As linhas são enviadas à medida que são lidas do banco
     """
     if data_inicial > data_final:
         raise InvalidArgumentException(
@@ -59,6 +283,15 @@ async def get_half_hourly_costs(
         )
 
     crud = CostCrud(session_maker)
-    return await crud.get_all_half_hourly(
-        start_date=data_inicial, end_date=data_final, limit=limite, offset=deslocamento
+    return export_response(
+        crud.stream_half_hourly(
+            start_date=data_inicial,
+            end_date=data_final,
+            export_format=formato,
+            subsystems=subsistemas,
+        ),
+        export_format=formato,
+        table_name="custo_marginal_operacao_semihorario",
+        start_date=data_inicial,
+        end_date=data_final,
     )
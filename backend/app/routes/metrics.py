@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Security
+
+from ..core.database import get_pool_metrics
+from ..core.security import validate_token
+from ..schemas import PoolMetrics
+
+router = APIRouter(dependencies=[Security(validate_token)])
+
+
+@router.get("/pool")
+async def get_connection_pool_metrics() -> PoolMetrics:
+    """
+    Retorna a situação do pool de conexões com o banco, com as conexões em uso,
+    ociosas e as requisições aguardando uma conexão livre. No SQLite em memória,
+    com uma única conexão compartilhada, as contagens não estão disponíveis
+    """
+    return get_pool_metrics()
@@ -0,0 +1,90 @@
+from datetime import date
+from typing import Annotated
+
+from fastapi import APIRouter, Query, Security
+
+from ..core.http_cache import ConditionalRoute
+from ..core.security import validate_token
+from ..crud.power_plant_crud import PowerPlantCrud
+from ..deps import AsyncSessionMakerDep, SubSystemFilterDep
+from ..exceptions.query import InvalidArgumentException
+from ..schemas import (
+    MeritOrderResponse,
+    OperativeWeek,
+    PowerPlant,
+    PowerPlantCostHistoryResponse,
+)
+
+router = APIRouter(
+    dependencies=[Security(validate_token)], route_class=ConditionalRoute
+)
+
+
+@router.get("/semanas-operativas")
+async def list_operative_weeks(
+    session_maker: AsyncSessionMakerDep,
+) -> list[OperativeWeek]:
+    """
+    Retorna as semanas operativas com custo variável unitário das usinas térmicas,
+    com o período de cada semana e a quantidade de usinas
+    """
+    crud = PowerPlantCrud(session_maker)
+    return await crud.get_operative_weeks()
+
+
+@router.get("/ordem-merito")
+async def get_merit_order(
+    semana_operativa: str,
+    session_maker: AsyncSessionMakerDep,
+    subsistemas: SubSystemFilterDep,
+) -> MeritOrderResponse:
+    """
+    Retorna a curva de ordem de mérito da semana operativa: as usinas térmicas de cada
+    subsistema ordenadas pelo custo variável unitário, com a posição de cada usina e a
+    fração acumulada das usinas do subsistema até ela
+    """
+    crud = PowerPlantCrud(session_maker)
+    return await crud.get_merit_order(
+        operative_week=semana_operativa, subsystems=subsistemas
+    )
+
+
+@router.get("/busca")
+async def search_power_plants(
+    nome: str,
+    session_maker: AsyncSessionMakerDep,
+    limite: Annotated[int, Query(ge=1, le=50)] = 10,
+) -> list[PowerPlant]:
+    """
+    Busca usinas térmicas pelo nome para o preenchimento automático: primeiro as
+    usinas cujo nome começa pelo termo, depois as que têm uma palavra começando por
+    ele e por fim as de nome parecido
+    """
+    if not nome.strip():
+        raise InvalidArgumentException("O nome buscado não pode ser vazio")
+
+    crud = PowerPlantCrud(session_maker)
+    return await crud.search(term=nome.strip(), limit=limite)
+
+
+@router.get("/{id_modelo_usina}/custos")
+async def get_power_plant_cost_history(
+    id_modelo_usina: str,
+    session_maker: AsyncSessionMakerDep,
+    data_inicial: date | None = None,
+    data_final: date | None = None,
+) -> PowerPlantCostHistoryResponse:
+    """
+    Retorna o custo variável unitário da usina térmica em cada semana operativa,
+    ordenado pelo início da semana. As datas, opcionais, filtram as semanas iniciadas
+    no intervalo
+    """
+    if data_inicial and data_final and data_inicial > data_final:
+        raise InvalidArgumentException(
+            "Data inicial não pode ser posterior à data final"
+        )
+
+    crud = PowerPlantCrud(session_maker)
+    return await crud.get_cost_history(
+        power_plant_id=id_modelo_usina, start_date=data_inicial, end_date=data_final
+    )
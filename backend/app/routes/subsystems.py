@@ -6,10 +6,12 @@ from ..crud.subsystem_crud import SubSystemCrud
 from ..deps import AsyncSessionMakerDep
 
 from ..schemas import SubSystem
+from ..core.http_cache import ConditionalRoute
 from ..core.security import validate_token
 
-
-router = APIRouter(dependencies=[Security(validate_token)])
+router = APIRouter(
+    dependencies=[Security(validate_token)], route_class=ConditionalRoute
+)
 
 
 @router.get("/")
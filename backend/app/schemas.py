@@ -1,4 +1,5 @@
 from datetime import date, time
+from enum import StrEnum
 from pydantic import BaseModel, Field
 
 
@@ -34,17 +35,19 @@ class HalfHourlyEnergyStatement(BaseModel):
 
 
 class EnergyStatementResponse(BaseModel):
-    total_registros: int
+    total_registros: int | None
     data_inicial: date
     data_final: date
     dados: list[HourlyEnergyStatement]
+    proximo_cursor: str | None = None
 
 
 class HalfHourlyEnergyStatementResponse(BaseModel):
-    total_registros: int
+    total_registros: int | None
     data_inicial: date
     data_final: date
     dados: list[HalfHourlyEnergyStatement]
+    proximo_cursor: str | None = None
 
 
 class WeeklySubSystemMarginalCostSchema(BaseModel):
@@ -57,10 +60,11 @@ class WeeklySubSystemMarginalCostSchema(BaseModel):
 
 
 class WeeklySubSystemMarginalCostResponse(BaseModel):
-    total_registros: int
+    total_registros: int | None
     data_inicial: date
     data_final: date
     dados: list[WeeklySubSystemMarginalCostSchema]
+    proximo_cursor: str | None = None
 
 
 class HalfHourlySubSystemMarginalCostSchema(BaseModel):
@@ -71,7 +75,170 @@ class HalfHourlySubSystemMarginalCostSchema(BaseModel):
 
 
 class HalfHourlySubSystemMarginalCostResponse(BaseModel):
-    total_registros: int
+    total_registros: int | None
     data_inicial: date
     data_final: date
     dados: list[HalfHourlySubSystemMarginalCostSchema]
+    proximo_cursor: str | None = None
+
+
+class HalfHourlyCostAndEnergyStatement(BaseModel):
+    id_subsistema: str
+    data: date
+    hora: time
+    custo_marginal_operacao: float
+    geracao_eolica: float | None = None
+    geracao_termica: float | None = None
+    geracao_solar: float | None = None
+    geracao_hidraulica: float | None = None
+    geracao_hidraulica_pequena_usina: float | None = None
+    geracao_termica_pequena_usina: float | None = None
+    geracao_total: float = Field(description="Soma das gerações do intervalo")
+    participacao_termica: float | None = Field(
+        default=None,
+        description="Fração da geração total vinda de usinas térmicas, incluindo as pequenas usinas",
+    )
+
+
+class CostAndEnergySummary(BaseModel):
+    id_subsistema: str
+    intervalos: int
+    custo_marginal_operacao_medio: float
+    custo_marginal_operacao_ponderado: float | None = Field(
+        default=None,
+        description="Custo marginal de operação médio ponderado pela geração total de cada intervalo",
+    )
+    limite_cmo_alto: float = Field(
+        description="Custo marginal de operação a partir do qual o intervalo é considerado de CMO alto"
+    )
+    intervalos_cmo_alto: int
+    participacao_termica_cmo_alto: float | None = Field(
+        default=None,
+        description="Fração da geração total vinda de usinas térmicas nos intervalos de CMO alto",
+    )
+
+
+class HalfHourlyCostAndEnergyStatementResponse(BaseModel):
+    total_registros: int | None
+    data_inicial: date
+    data_final: date
+    resumo: list[CostAndEnergySummary]
+    dados: list[HalfHourlyCostAndEnergyStatement]
+    proximo_cursor: str | None = None
+
+
+class PowerPlant(BaseModel):
+    id_modelo_usina: str
+    usina: str
+    id_subsistema: str
+
+
+class PowerPlantCost(BaseModel):
+    semana_operativa: str
+    data_inicio: date
+    data_fim: date
+    usina: str
+    id_subsistema: str
+    custo_variavel_unitario: float
+
+
+class PowerPlantCostHistoryResponse(BaseModel):
+    id_modelo_usina: str
+    total_registros: int
+    dados: list[PowerPlantCost]
+
+
+class OperativeWeek(BaseModel):
+    semana_operativa: str
+    data_inicio: date
+    data_fim: date
+    usinas: int = Field(description="Usinas térmicas com custo informado na semana")
+
+
+class MeritOrderPowerPlant(BaseModel):
+    id_subsistema: str
+    id_modelo_usina: str
+    usina: str
+    custo_variavel_unitario: float
+    posicao: int = Field(
+        description="Posição da usina na ordem de mérito do subsistema, usinas de mesmo custo dividem a posição"
+    )
+    fracao_acumulada: float = Field(
+        description="Fração das usinas do subsistema com custo menor ou igual ao da usina"
+    )
+
+
+class MeritOrderResponse(BaseModel):
+    semana_operativa: str
+    data_inicio: date
+    data_fim: date
+    dados: list[MeritOrderPowerPlant]
+
+
+class Resolution(StrEnum):
+    DIA = "dia"
+    SEMANA = "semana"
+    MES = "mes"
+    ANO = "ano"
+
+
+class TableLayout(StrEnum):
+    LONGO = "longo"
+    LARGO = "largo"
+
+
+class ExportFormat(StrEnum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class AggregatedValue(BaseModel):
+    soma: float | None = None
+    media: float | None = None
+    minimo: float | None = None
+    maximo: float | None = None
+
+
+class AggregatedTimeSeries(BaseModel):
+    id_subsistema: str
+    periodo: date = Field(description="Primeiro dia do período agregado")
+    total_medicoes: int
+    valores: dict[str, AggregatedValue]
+
+
+class AggregatedTimeSeriesResponse(BaseModel):
+    total_registros: int
+    data_inicial: date
+    data_final: date
+    resolucao: Resolution
+    dados: list[AggregatedTimeSeries]
+
+
+class PoolMetrics(BaseModel):
+    disponivel: bool = Field(
+        description="Se o pool conta as conexões, falso no SQLite em memória, que "
+        "usa uma única conexão"
+    )
+    tamanho: int | None = Field(
+        default=None, description="Conexões mantidas abertas pelo pool"
+    )
+    overflow_maximo: int | None = Field(
+        default=None,
+        description="Conexões extras que podem ser abertas além do tamanho do pool",
+    )
+    em_uso: int | None = Field(
+        default=None, description="Conexões em uso por requisições"
+    )
+    ociosas: int | None = Field(
+        default=None, description="Conexões abertas disponíveis no pool"
+    )
+    overflow: int | None = Field(
+        default=None, description="Conexões extras abertas no momento"
+    )
+    aguardando: int | None = Field(
+        default=None, description="Requisições aguardando uma conexão"
+    )
+    tempo_esgotado: int | None = Field(
+        default=None,
+        description="Requisições que desistiram de aguardar uma conexão desde o início da API",
+    )
@@ -0,0 +1,77 @@
+"""add (data, hora, id_subsistema) unique indexes on the time series tables
+
+Revision ID: 5b1f3c9a7d42
+Revises: 26f388924d06
+Create Date: 2025-03-24 10:12:31.402117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1f3c9a7d42"
+down_revision: Union[str, None] = "26f388924d06"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# natural key of each time series table, leading with the date so range filters and
+# the ordering used by the API are served by the index
+natural_keys = {
+    "balanco_subsistema_horario": ["data", "hora", "id_subsistema"],
+    "balanco_subsistema_semihorario": ["data", "hora", "id_subsistema"],
+    "custo_marginal_operacao_semanal": ["data", "id_subsistema"],
+    "custo_marginal_operacao_semihorario": ["data", "hora", "id_subsistema"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # previous loads could insert the same measurement twice, only the first one is kept
+    for table_name, columns in natural_keys.items():
+        op.execute(
+            sa.text(
+                f"DELETE FROM {table_name} WHERE id NOT IN "
+                f"(SELECT min(id) FROM {table_name} GROUP BY {', '.join(columns)})"
+            )
+        )
+
+    if op.get_bind().dialect.name == "postgresql":
+        # building the indexes concurrently avoids locking the tables for writes, the
+        # constraints are then attached to the already built indexes
+        with op.get_context().autocommit_block():
+            for table_name, columns in natural_keys.items():
+                op.create_index(
+                    op.f(f"uq_{table_name}_data"),
+                    table_name,
+                    columns,
+                    unique=True,
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+        for table_name in natural_keys:
+            constraint_name = op.f(f"uq_{table_name}_data")
+            op.execute(
+                sa.text(
+                    f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} "
+                    f"UNIQUE USING INDEX {constraint_name}"
+                )
+            )
+    else:
+        for table_name, columns in natural_keys.items():
+            with op.batch_alter_table(table_name, schema=None) as batch_op:
+                batch_op.create_unique_constraint(
+                    batch_op.f(f"uq_{table_name}_data"), columns
+                )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in reversed(natural_keys):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_constraint(
+                batch_op.f(f"uq_{table_name}_data"), type_="unique"
+            )
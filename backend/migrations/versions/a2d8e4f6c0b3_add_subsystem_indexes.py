@@ -0,0 +1,40 @@
+"""add indexes leading with the subsystem on the time series tables
+
+Revision ID: a2d8e4f6c0b3
+Revises: f3a9c5e1b7d2
+Create Date: 2025-04-01 11:32:48.609127
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a2d8e4f6c0b3"
+down_revision: Union[str, None] = "f3a9c5e1b7d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# the subsystem comes first so queries filtered by subsystem read only its rows, already
+# ordered by date and time
+subsystem_indexes = {
+    "balanco_subsistema_horario": ["id_subsistema", "data", "hora"],
+    "balanco_subsistema_semihorario": ["id_subsistema", "data", "hora"],
+    "custo_marginal_operacao_semanal": ["id_subsistema", "data"],
+    "custo_marginal_operacao_semihorario": ["id_subsistema", "data", "hora"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the indexes of the partitioned tables are created on every yearly partition
+    for table_name, columns in subsystem_indexes.items():
+        op.create_index(op.f(f"ix_{table_name}_id_subsistema"), table_name, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in reversed(subsystem_indexes):
+        op.drop_index(op.f(f"ix_{table_name}_id_subsistema"), table_name=table_name)
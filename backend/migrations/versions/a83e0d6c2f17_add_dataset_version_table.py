@@ -0,0 +1,46 @@
+"""add dataset version table
+
+Revision ID: a83e0d6c2f17
+Revises: 5b1f3c9a7d42
+Create Date: 2025-03-26 14:03:52.118406
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a83e0d6c2f17"
+down_revision: Union[str, None] = "5b1f3c9a7d42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dataset_version = op.create_table(
+        "versao_dados",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("versao", sa.Integer(), nullable=False),
+        sa.Column("atualizado_em", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_versao_dados")),
+    )
+    # single row updated by the loading script
+    op.bulk_insert(
+        dataset_version,
+        [
+            {
+                "id": 1,
+                "versao": 1,
+                "atualizado_em": datetime.now(timezone.utc).replace(tzinfo=None),
+            }
+        ],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("versao_dados")
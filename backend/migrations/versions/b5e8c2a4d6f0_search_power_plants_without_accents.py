@@ -0,0 +1,85 @@
+"""search the thermal power plant names without accents
+
+Revision ID: b5e8c2a4d6f0
+Revises: d1b7f4c9e3a5
+Create Date: 2025-04-09 15:06:31.417092
+
+"""
+
+from typing import Sequence, Union
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b5e8c2a4d6f0"
+down_revision: Union[str, None] = "d1b7f4c9e3a5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # without the trigram extension the api searches the names in memory, where they
+    # are already compared without accents
+    if not _trigram_extension_installed():
+        return
+
+    # translate and lower are immutable, unlike unaccent, so the function can back
+    # an index. Every latin letter with diacritics is replaced by its base letter
+    accented, plain = _accent_translation()
+    op.execute(
+        sa.text(
+            "CREATE FUNCTION normalizar_busca(nome text) RETURNS text "
+            "LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE "
+            f"AS $$ SELECT lower(translate(nome, '{accented}', '{plain}')) $$"
+        )
+    )
+    op.drop_index(op.f("ix_usina_termica_usina"), table_name="usina_termica")
+    op.execute(
+        sa.text(
+            "CREATE INDEX ix_usina_termica_usina ON usina_termica "
+            "USING gin (normalizar_busca(usina) gin_trgm_ops)"
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not _trigram_extension_installed():
+        return
+
+    op.drop_index(op.f("ix_usina_termica_usina"), table_name="usina_termica")
+    op.create_index(
+        op.f("ix_usina_termica_usina"),
+        "usina_termica",
+        ["usina"],
+        postgresql_using="gin",
+        postgresql_ops={"usina": "gin_trgm_ops"},
+    )
+    op.execute(sa.text("DROP FUNCTION normalizar_busca(text)"))
+
+
+def _trigram_extension_installed() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    return bool(
+        bind.execute(
+            sa.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        ).first()
+    )
+
+
+def _accent_translation() -> tuple[str, str]:
+    # the same decomposition the api applies to the names searched in memory, limited
+    # to the latin letters that lose their diacritics into a single ascii letter
+    accented, plain = "", ""
+    for char in map(chr, range(0xC0, 0x250)):
+        decomposed = unicodedata.normalize("NFKD", char.casefold())
+        base = "".join(part for part in decomposed if not unicodedata.combining(part))
+        if len(base) == 1 and base.isascii():
+            accented += char
+            plain += base
+    return accented, plain
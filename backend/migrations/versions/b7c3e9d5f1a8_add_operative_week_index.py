@@ -0,0 +1,41 @@
+"""add an index by operative week on the thermal plant unit costs
+
+Revision ID: b7c3e9d5f1a8
+Revises: a2d8e4f6c0b3
+Create Date: 2025-04-02 15:06:21.418392
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7c3e9d5f1a8"
+down_revision: Union[str, None] = "a2d8e4f6c0b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the merit order of a week and subsystem is read from the index already sorted by
+    # unit cost, with the plant id breaking ties
+    op.create_index(
+        op.f("ix_custo_variavel_unitario_usinas_termicas_semana_operativa"),
+        "custo_variavel_unitario_usinas_termicas",
+        [
+            "semana_operativa",
+            "id_subsistema",
+            "custo_variavel_unitario",
+            "id_modelo_usina",
+        ],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_custo_variavel_unitario_usinas_termicas_semana_operativa"),
+        table_name="custo_variavel_unitario_usinas_termicas",
+    )
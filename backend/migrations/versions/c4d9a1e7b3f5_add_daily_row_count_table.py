@@ -0,0 +1,55 @@
+"""add daily row count table
+
+Revision ID: c4d9a1e7b3f5
+Revises: a83e0d6c2f17
+Create Date: 2025-03-27 10:21:37.504218
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c4d9a1e7b3f5"
+down_revision: Union[str, None] = "a83e0d6c2f17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+counted_tables = [
+    "balanco_subsistema_horario",
+    "balanco_subsistema_semihorario",
+    "custo_marginal_operacao_semanal",
+    "custo_marginal_operacao_semihorario",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    daily_row_count = op.create_table(
+        "contagem_diaria",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("tabela", sa.String(), nullable=False),
+        sa.Column("data", sa.Date(), nullable=False),
+        sa.Column("quantidade", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_contagem_diaria")),
+        sa.UniqueConstraint("tabela", "data", name=op.f("uq_contagem_diaria_tabela")),
+    )
+
+    # counts of the data already loaded, later loads recalculate them
+    for table_name in counted_tables:
+        table = sa.table(table_name, sa.column("data", sa.Date()))
+        op.execute(
+            daily_row_count.insert().from_select(
+                ["tabela", "data", "quantidade"],
+                sa.select(
+                    sa.literal(table_name, sa.String()), table.c.data, sa.func.count()
+                ).group_by(table.c.data),
+            )
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("contagem_diaria")
@@ -0,0 +1,106 @@
+"""add the thermal power plants table searched by name
+
+Revision ID: c8e4a2f6b9d1
+Revises: b7c3e9d5f1a8
+Create Date: 2025-04-03 10:22:57.304816
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c8e4a2f6b9d1"
+down_revision: Union[str, None] = "b7c3e9d5f1a8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the history of a plant is read by plant id, ordered by the operative week
+    op.create_index(
+        op.f("ix_custo_variavel_unitario_usinas_termicas_id_modelo_usina"),
+        "custo_variavel_unitario_usinas_termicas",
+        ["id_modelo_usina", "data_inicio"],
+    )
+
+    power_plants = op.create_table(
+        "usina_termica",
+        sa.Column("id_modelo_usina", sa.String(), nullable=False),
+        sa.Column("usina", sa.String(), nullable=False),
+        sa.Column("id_subsistema", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["id_subsistema"],
+            ["subsistema.id_subsistema"],
+            name=op.f("usina_termica_id_subsistema_fkey"),
+        ),
+        sa.PrimaryKeyConstraint("id_modelo_usina", name=op.f("pk_usina_termica")),
+    )
+
+    # without the trigram extension the name gets a plain index and the api searches
+    # the names in memory, as on SQLite
+    if _trigram_extension_available():
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            op.f("ix_usina_termica_usina"),
+            "usina_termica",
+            ["usina"],
+            postgresql_using="gin",
+            postgresql_ops={"usina": "gin_trgm_ops"},
+        )
+    else:
+        op.create_index(op.f("ix_usina_termica_usina"), "usina_termica", ["usina"])
+
+    # plants of the costs already loaded, later loads recalculate them
+    costs = sa.table(
+        "custo_variavel_unitario_usinas_termicas",
+        sa.column("id_modelo_usina", sa.String()),
+        sa.column("usina", sa.String()),
+        sa.column("id_subsistema", sa.String()),
+        sa.column("data_inicio", sa.Date()),
+    )
+    latest_costs = sa.select(
+        costs.c.id_modelo_usina,
+        costs.c.usina,
+        costs.c.id_subsistema,
+        sa.func.row_number()
+        .over(
+            partition_by=costs.c.id_modelo_usina,
+            order_by=costs.c.data_inicio.desc(),
+        )
+        .label("ordem"),
+    ).subquery()
+    op.execute(
+        power_plants.insert().from_select(
+            ["id_modelo_usina", "usina", "id_subsistema"],
+            sa.select(
+                latest_costs.c.id_modelo_usina,
+                latest_costs.c.usina,
+                latest_costs.c.id_subsistema,
+            ).where(latest_costs.c.ordem == 1),
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_usina_termica_usina"), table_name="usina_termica")
+    op.drop_table("usina_termica")
+    op.drop_index(
+        op.f("ix_custo_variavel_unitario_usinas_termicas_id_modelo_usina"),
+        table_name="custo_variavel_unitario_usinas_termicas",
+    )
+
+
+def _trigram_extension_available() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    return bool(
+        bind.execute(
+            sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        ).first()
+    )
@@ -0,0 +1,75 @@
+"""add (id_modelo_usina, data_inicio) unique index on the thermal plant costs
+
+Revision ID: d1b7f4c9e3a5
+Revises: c8e4a2f6b9d1
+Create Date: 2025-04-07 09:41:12.583204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d1b7f4c9e3a5"
+down_revision: Union[str, None] = "c8e4a2f6b9d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+table_name = "custo_variavel_unitario_usinas_termicas"
+# a plant has a single cost on each operative week
+columns = ["id_modelo_usina", "data_inicio"]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # previous loads inserted the costs again on every run, the last one loaded is kept
+    op.execute(
+        sa.text(
+            f"DELETE FROM {table_name} WHERE id NOT IN "
+            f"(SELECT max(id) FROM {table_name} GROUP BY {', '.join(columns)})"
+        )
+    )
+
+    # the unique index also serves the history of a plant, replacing the plain one
+    op.drop_index(
+        op.f("ix_custo_variavel_unitario_usinas_termicas_id_modelo_usina"),
+        table_name=table_name,
+    )
+
+    constraint_name = op.f(f"uq_{table_name}_id_modelo_usina")
+    if op.get_bind().dialect.name == "postgresql":
+        # building the index concurrently avoids locking the table for writes, the
+        # constraint is then attached to the already built index
+        with op.get_context().autocommit_block():
+            op.create_index(
+                constraint_name,
+                table_name,
+                columns,
+                unique=True,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        op.execute(
+            sa.text(
+                f"ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} "
+                f"UNIQUE USING INDEX {constraint_name}"
+            )
+        )
+    else:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.create_unique_constraint(constraint_name, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table(table_name, schema=None) as batch_op:
+        batch_op.drop_constraint(
+            batch_op.f(f"uq_{table_name}_id_modelo_usina"), type_="unique"
+        )
+    op.create_index(
+        op.f("ix_custo_variavel_unitario_usinas_termicas_id_modelo_usina"),
+        table_name,
+        columns,
+    )
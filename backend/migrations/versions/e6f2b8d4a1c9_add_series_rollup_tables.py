@@ -0,0 +1,148 @@
+"""add daily and monthly series rollup tables
+
+Revision ID: e6f2b8d4a1c9
+Revises: c4d9a1e7b3f5
+Create Date: 2025-03-28 16:47:09.231574
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e6f2b8d4a1c9"
+down_revision: Union[str, None] = "c4d9a1e7b3f5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# value columns of the sub-daily time series tables
+rolled_up_columns = {
+    "balanco_subsistema_horario": [
+        "geracao_eolica",
+        "geracao_termica",
+        "geracao_solar",
+        "geracao_hidraulica",
+        "valor_carga",
+        "valor_intercambio",
+    ],
+    "balanco_subsistema_semihorario": [
+        "geracao_eolica",
+        "geracao_termica",
+        "geracao_solar",
+        "geracao_hidraulica",
+        "geracao_hidraulica_pequena_usina",
+        "geracao_termica_pequena_usina",
+    ],
+    "custo_marginal_operacao_semihorario": ["custo_marginal_operacao"],
+}
+
+rollup_columns = [
+    "tabela",
+    "coluna",
+    "id_subsistema",
+    "periodo",
+    "total_medicoes",
+    "quantidade",
+    "soma",
+    "minimo",
+    "maximo",
+]
+
+
+def _create_rollup_table(table_name: str) -> sa.Table:
+    return op.create_table(
+        table_name,
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("tabela", sa.String(), nullable=False),
+        sa.Column("coluna", sa.String(), nullable=False),
+        sa.Column("id_subsistema", sa.String(), nullable=False),
+        sa.Column("periodo", sa.Date(), nullable=False),
+        sa.Column("total_medicoes", sa.Integer(), nullable=False),
+        sa.Column("quantidade", sa.Integer(), nullable=False),
+        sa.Column("soma", sa.Float(), nullable=True),
+        sa.Column("minimo", sa.Float(), nullable=True),
+        sa.Column("maximo", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["id_subsistema"],
+            ["subsistema.id_subsistema"],
+            name=op.f(f"{table_name}_id_subsistema_fkey"),
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f(f"pk_{table_name}")),
+        sa.UniqueConstraint(
+            "tabela",
+            "periodo",
+            "id_subsistema",
+            "coluna",
+            name=op.f(f"uq_{table_name}_tabela"),
+        ),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    daily_rollup = _create_rollup_table("agregado_diario")
+    monthly_rollup = _create_rollup_table("agregado_mensal")
+
+    if op.get_bind().dialect.name == "postgresql":
+        month_start = sa.cast(
+            sa.func.date_trunc("month", daily_rollup.c.periodo), sa.Date()
+        )
+    else:
+        month_start = sa.func.date(daily_rollup.c.periodo, "start of month")
+
+    # rollups of the data already loaded, later loads recalculate them
+    for table_name, value_columns in rolled_up_columns.items():
+        for column_name in value_columns:
+            table = sa.table(
+                table_name,
+                sa.column("id_subsistema", sa.String()),
+                sa.column("data", sa.Date()),
+                sa.column(column_name, sa.Float()),
+            )
+            column = table.c[column_name]
+            op.execute(
+                daily_rollup.insert().from_select(
+                    rollup_columns,
+                    sa.select(
+                        sa.literal(table_name, sa.String()),
+                        sa.literal(column_name, sa.String()),
+                        table.c.id_subsistema,
+                        table.c.data,
+                        sa.func.count(),
+                        sa.func.count(column),
+                        sa.func.sum(column),
+                        sa.func.min(column),
+                        sa.func.max(column),
+                    ).group_by(table.c.id_subsistema, table.c.data),
+                )
+            )
+
+    op.execute(
+        monthly_rollup.insert().from_select(
+            rollup_columns,
+            sa.select(
+                daily_rollup.c.tabela,
+                daily_rollup.c.coluna,
+                daily_rollup.c.id_subsistema,
+                month_start,
+                sa.func.sum(daily_rollup.c.total_medicoes),
+                sa.func.sum(daily_rollup.c.quantidade),
+                sa.func.sum(daily_rollup.c.soma),
+                sa.func.min(daily_rollup.c.minimo),
+                sa.func.max(daily_rollup.c.maximo),
+            ).group_by(
+                daily_rollup.c.tabela,
+                daily_rollup.c.coluna,
+                daily_rollup.c.id_subsistema,
+                month_start,
+            ),
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("agregado_mensal")
+    op.drop_table("agregado_diario")
@@ -0,0 +1,94 @@
+"""partition the hourly and half-hourly fact tables by year on postgres
+
+Revision ID: f3a9c5e1b7d2
+Revises: e6f2b8d4a1c9
+Create Date: 2025-03-31 09:14:26.870351
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a9c5e1b7d2"
+down_revision: Union[str, None] = "e6f2b8d4a1c9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# natural key of each partitioned table, it already contains the partition key
+partitioned_tables = {
+    "balanco_subsistema_horario": ["data", "hora", "id_subsistema"],
+    "balanco_subsistema_semihorario": ["data", "hora", "id_subsistema"],
+    "custo_marginal_operacao_semihorario": ["data", "hora", "id_subsistema"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite has no table partitioning, the tables are kept as they are
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for table_name, natural_key in partitioned_tables.items():
+        previous_table = f"{table_name}_antiga"
+        op.execute(f"ALTER TABLE {table_name} RENAME TO {previous_table}")
+        op.execute(
+            f"CREATE TABLE {table_name} (LIKE {previous_table} INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (data)"
+        )
+        op.execute(f"ALTER SEQUENCE {table_name}_id_seq OWNED BY {table_name}.id")
+
+        years = op.get_bind().execute(
+            sa.text(
+                f"SELECT DISTINCT CAST(extract(year FROM data) AS INTEGER) "
+                f"FROM {previous_table}"
+            )
+        )
+        for year in years.scalars():
+            _create_year_partition(table_name, year)
+
+        op.execute(f"INSERT INTO {table_name} SELECT * FROM {previous_table}")
+        op.execute(f"DROP TABLE {previous_table}")
+
+        # the indexes are built after the rows are copied, every unique constraint
+        # of a partitioned table must include the partition key
+        _add_constraints(table_name, ["id", "data"], natural_key)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for table_name, natural_key in partitioned_tables.items():
+        partitioned_table = f"{table_name}_particionada"
+        op.execute(f"ALTER TABLE {table_name} RENAME TO {partitioned_table}")
+        op.execute(
+            f"CREATE TABLE {table_name} (LIKE {partitioned_table} INCLUDING DEFAULTS)"
+        )
+        op.execute(f"ALTER SEQUENCE {table_name}_id_seq OWNED BY {table_name}.id")
+        op.execute(f"INSERT INTO {table_name} SELECT * FROM {partitioned_table}")
+        op.execute(f"DROP TABLE {partitioned_table}")
+
+        _add_constraints(table_name, ["id"], natural_key)
+
+
+def _create_year_partition(table_name: str, year: int):
+    op.execute(
+        f"CREATE TABLE {table_name}_{year} PARTITION OF {table_name} "
+        f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+    )
+
+
+def _add_constraints(table_name: str, primary_key: list[str], natural_key: list[str]):
+    op.create_primary_key(op.f(f"pk_{table_name}"), table_name, primary_key)
+    op.create_unique_constraint(op.f(f"uq_{table_name}_data"), table_name, natural_key)
+    op.create_foreign_key(
+        op.f(f"{table_name}_id_subsistema_fkey"),
+        table_name,
+        "subsistema",
+        ["id_subsistema"],
+        ["id_subsistema"],
+    )
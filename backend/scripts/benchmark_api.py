@@ -0,0 +1,641 @@
+"""
+Load test of the API over synthetic data with the shape of the ONS tables. With --semear
+the empty database of DATABASE_URL is migrated and filled through the loading script with
+--escala times the real volume: the tables keep the real date ranges and each scale adds
+copies of the four subsystems, so the same time window returns proportionally more rows.
+Every read route is then requested concurrently through an in-process ASGI client, with
+the token validation stubbed out, and the p50/p95/p99 latency, throughput and memory of
+each route are reported. The data and the requests are generated from fixed seeds, so the
+results saved with --saida can be compared across commits with --comparar. Must be
+executed from the backend folder:
+
+    DATABASE_URL=sqlite+aiosqlite:///benchmark_1x.db \\
+        python -m scripts.benchmark_api --semear --escala 1 --saida benchmark_1x.json
+    DATABASE_URL=sqlite+aiosqlite:///benchmark_1x.db \\
+        python -m scripts.benchmark_api --escala 1 --comparar benchmark_1x.json
+"""
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from typing import AsyncIterator, Callable, Iterator
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
+import httpx
+import polars as pl
+from sqlalchemy import func, select
+
+from app.core.cache import response_cache
+from app.core.database import engine, session_maker
+from app.core.security import validate_token
+from app.main import app
+from app.models import SubSystem
+from scripts.load_tables import save_tables
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(levelname)s [%(asctime)s] %(filename)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+
+logger = logging.getLogger(__name__)
+
+SUBSYSTEMS = {"N": "NORTE", "NE": "NORDESTE", "S": "SUL", "SE": "SUDESTE"}
+
+# date ranges of the published tables, at scale 1 the seeded tables have their volume
+HOURLY_STATEMENTS_RANGE = (date(2000, 1, 1), date(2025, 3, 13))
+HALF_HOURLY_STATEMENTS_RANGE = (date(2023, 8, 15), date(2024, 3, 3))
+WEEKLY_COSTS_RANGE = (date(2005, 1, 7), date(2024, 3, 8))
+HALF_HOURLY_COSTS_RANGE = (date(2020, 1, 1), date(2024, 3, 3))
+POWER_PLANT_COSTS_RANGE = (date(2018, 1, 5), date(2024, 3, 8))
+
+# thermal power plants of each subsystem with a unit cost every operative week
+POWER_PLANTS_PER_SUBSYSTEM = 40
+POWER_PLANT_NAMES = [
+    "ARAUCÁRIA",
+    "CANDIOTA",
+    "CUIABÁ",
+    "FLUMINENSE",
+    "ITAQUI",
+    "JORGE LACERDA",
+    "MARANHÃO",
+    "NORTE FLUMINENSE",
+    "PAMPA SUL",
+    "PARNAÍBA",
+    "PECÉM",
+    "PORTO DE SERGIPE",
+    "SANTA CRUZ",
+    "SEPÉ TIARAJU",
+    "TERMOBAHIA",
+    "TERMOPERNAMBUCO",
+    "URUGUAIANA",
+    "VIANA",
+]
+
+# default header of the browsers, the responses are compressed like on the dashboards
+ACCEPT_ENCODING = "gzip, deflate, br, zstd"
+
+BenchmarkRequest = tuple[str, dict[str, str]]
+
+
+@dataclass
+class BenchmarkRoute:
+    name: str
+    # builds the url and headers of each request from the random generator
+    request: Callable[[random.Random], BenchmarkRequest]
+
+
+@dataclass
+class RouteResult:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    response_bytes: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> dict:
+        percentiles = (
+            statistics.quantiles(self.latencies, n=100, method="inclusive")
+            if len(self.latencies) > 1
+            else self.latencies * 99
+        )
+        requests = len(self.latencies)
+        return {
+            "requisicoes": requests,
+            "erros": self.errors,
+            "p50_ms": round(percentiles[49] * 1000, 3),
+            "p95_ms": round(percentiles[94] * 1000, 3),
+            "p99_ms": round(percentiles[98] * 1000, 3),
+            "vazao_rps": round(requests / self.elapsed, 2) if self.elapsed else None,
+            "bytes_medio": round(self.response_bytes / requests) if requests else 0,
+            "rss_mb": _rss_mb(),
+            "rss_pico_mb": _peak_rss_mb(),
+        }
+
+
+def seed(scale: int):
+    """Migrates the database and loads the synthetic tables through the loading script"""
+    # without the ini file, its logging configuration would silence the script
+    alembic_config = AlembicConfig()
+    alembic_config.set_main_option("script_location", "migrations")
+    command.upgrade(alembic_config, "head")
+
+    async def load() -> bool:
+        async with session_maker() as session:
+            stored = await session.scalar(select(func.count(SubSystem.id_subsistema)))
+        await engine.dispose()
+        if stored:
+            logger.error("The database already has rows, seed an empty one instead")
+            return False
+
+        return await save_tables(
+            os.environ["DATABASE_URL"], _synthetic_tables(_subsystems(scale))
+        )
+
+    start = time.perf_counter()
+    if not asyncio.run(load()):
+        sys.exit(1)
+    logger.info(f"Seeded scale {scale} in {time.perf_counter() - start:.1f} s")
+
+
+def _subsystems(scale: int) -> pl.DataFrame:
+    # the copies of the real subsystems get a numeric suffix
+    ids, names = [], []
+    for copy in range(scale):
+        suffix = "" if copy == 0 else str(copy + 1)
+        for id_subsistema, name in SUBSYSTEMS.items():
+            ids.append(f"{id_subsistema}{suffix}")
+            names.append(f"{name} {suffix}".strip())
+    return pl.DataFrame({"id_subsistema": ids, "subsistema": names})
+
+
+async def _synthetic_tables(
+    subsystems: pl.DataFrame,
+) -> AsyncIterator[tuple[str, Iterator[pl.DataFrame]]]:
+    # the hourly table goes first, it is the source of the subsystem names
+    yield "balanco_subsistema_horario", _hourly_statements(subsystems)
+    yield "balanco_subsistema_semihorario", _half_hourly_statements(subsystems)
+    yield "custo_marginal_operacao_semanal", _weekly_costs(subsystems)
+    yield "custo_marginal_operacao_semihorario", _half_hourly_costs(subsystems)
+    yield "custo_variavel_unitario_usinas_termicas", _power_plant_costs(subsystems)
+
+
+def _hourly_statements(subsystems: pl.DataFrame) -> Iterator[pl.DataFrame]:
+    offset = 0
+    for instants in _yearly_instants(HOURLY_STATEMENTS_RANGE, "1h"):
+        data = instants.join(
+            subsystems.rename({"subsistema": "nom_subsistema"}), how="cross"
+        ).with_columns(
+            pl.col("din_instante").dt.date().alias("data"),
+            pl.col("din_instante").dt.time().alias("hora"),
+            (_noise(offset, 1) * 40000).alias("val_gerhidraulica"),
+            (_noise(offset, 2) * 15000).alias("val_gertermica"),
+            (_noise(offset, 3) * 12000).alias("val_gereolica"),
+            # solar generation is only measured after 2017
+            pl.when(pl.col("din_instante").dt.year() >= 2017)
+            .then(_noise(offset, 4) * 8000)
+            .alias("val_gersolar"),
+            (_noise(offset, 5) * 60000).alias("val_carga"),
+            (_noise(offset, 6) * 10000 - 5000).alias("val_intercambio"),
+        )
+        offset += data.height
+        yield data
+
+
+def _half_hourly_statements(subsystems: pl.DataFrame) -> Iterator[pl.DataFrame]:
+    offset = 0
+    for instants in _yearly_instants(HALF_HOURLY_STATEMENTS_RANGE, "30m"):
+        data = _split_instants(instants.join(subsystems, how="cross")).with_columns(
+            (_noise(offset, 7) * 40000).alias("usina_hidraulica_verificada"),
+            (_noise(offset, 8) * 12000).alias("geracao_eolica_verificada"),
+            (_noise(offset, 9) * 8000).alias("geracao_fotovoltaica_verificada"),
+            (_noise(offset, 10) * 15000).alias("geracao_usina_termica_verificada"),
+            (_noise(offset, 11) * 3000).alias(
+                "geracao_pequena_usina_hidraulica_verificada"
+            ),
+            (_noise(offset, 12) * 1000).alias(
+                "geracao_pequena_usina_termica_verificada"
+            ),
+        )
+        offset += data.height
+        yield data
+
+
+def _weekly_costs(subsystems: pl.DataFrame) -> Iterator[pl.DataFrame]:
+    weeks = pl.DataFrame({"data": pl.date_range(*WEEKLY_COSTS_RANGE, "7d", eager=True)})
+    yield weeks.join(subsystems, how="cross").with_columns(
+        (_noise(0, 13) * 800).alias("custo_marginal_operacao_semanal"),
+        (_noise(0, 14) * 800).alias("custo_marginal_operacao_semanal_carga_leve"),
+        (_noise(0, 15) * 800).alias("custo_marginal_operacao_semanal_carga_media"),
+        (_noise(0, 16) * 800).alias("custo_marginal_operacao_semanal_carga_pesada"),
+    )
+
+
+def _half_hourly_costs(subsystems: pl.DataFrame) -> Iterator[pl.DataFrame]:
+    offset = 0
+    for instants in _yearly_instants(HALF_HOURLY_COSTS_RANGE, "30m"):
+        data = _split_instants(instants.join(subsystems, how="cross")).with_columns(
+            (_noise(offset, 17) * 800).alias("custo_marginal_operacao")
+        )
+        offset += data.height
+        yield data
+
+
+def _power_plant_costs(subsystems: pl.DataFrame) -> Iterator[pl.DataFrame]:
+    plant_subsystems = [
+        id_subsistema
+        for id_subsistema in subsystems["id_subsistema"]
+        for _ in range(POWER_PLANTS_PER_SUBSYSTEM)
+    ]
+    plants = subsystems.join(
+        pl.DataFrame(
+            {
+                "id_subsistema": plant_subsystems,
+                "id_modelo_usina": [
+                    f"UTE{number}" for number in range(len(plant_subsystems))
+                ],
+                "usina": [
+                    f"{POWER_PLANT_NAMES[number % len(POWER_PLANT_NAMES)]} "
+                    f"{number // len(POWER_PLANT_NAMES) + 1}"
+                    for number in range(len(plant_subsystems))
+                ],
+            }
+        ),
+        on="id_subsistema",
+    )
+
+    weeks = pl.DataFrame(
+        {"data_inicio": pl.date_range(*POWER_PLANT_COSTS_RANGE, "7d", eager=True)}
+    ).with_columns(
+        (pl.col("data_inicio") + timedelta(days=6)).alias("data_fim"),
+        pl.format(
+            "{}-{}",
+            pl.col("data_inicio").dt.iso_year(),
+            pl.col("data_inicio").dt.week().cast(pl.String).str.zfill(2),
+        ).alias("semana_operativa"),
+    )
+    yield weeks.join(plants, how="cross").with_columns(
+        (_noise(0, 18) * 1500 + 50).alias("custo_variavel_unitario")
+    )
+
+
+def _yearly_instants(
+    date_range: tuple[date, date], interval: str
+) -> Iterator[pl.DataFrame]:
+    # one batch per year keeps the memory used by the largest scales bounded
+    start, end = date_range
+    for year in range(start.year, end.year + 1):
+        year_start = max(start, date(year, 1, 1))
+        year_end = min(end, date(year, 12, 31)) + timedelta(days=1)
+        yield pl.DataFrame(
+            {
+                "din_instante": pl.datetime_range(
+                    year_start, year_end, interval, closed="left", eager=True
+                )
+            }
+        )
+
+
+def _split_instants(data: pl.DataFrame) -> pl.DataFrame:
+    return data.with_columns(
+        pl.col("din_instante").dt.date().alias("data"),
+        pl.col("din_instante").dt.time().alias("hora"),
+    ).drop("din_instante")
+
+
+def _noise(offset: int, salt: int) -> pl.Expr:
+    # quasi-random values in [0, 1) from the row position, the same on every run and
+    # Polars version
+    modulus = pl.lit(2**32, dtype=pl.UInt64)
+    index = pl.int_range(pl.len(), dtype=pl.UInt64) + pl.lit(
+        offset + salt * 7919, dtype=pl.UInt64
+    )
+    return (index % modulus * pl.lit(2654435761, dtype=pl.UInt64) % modulus) / 2**32
+
+
+def _window(
+    generator: random.Random, date_range: tuple[date, date], days: int
+) -> tuple[date, date]:
+    start, end = date_range
+    window_start = start + timedelta(
+        days=generator.randrange(max((end - start).days - days, 1))
+    )
+    return window_start, min(window_start + timedelta(days=days - 1), end)
+
+
+def _time_series_routes(
+    name: str, path: str, date_range: tuple[date, date], window_days: int
+) -> list[BenchmarkRoute]:
+    def request(query: str = "", headers: dict[str, str] | None = None):
+        def build(generator: random.Random) -> BenchmarkRequest:
+            start, end = _window(generator, date_range, window_days)
+            url = f"{path}?data_inicial={start}&data_final={end}{query}"
+            return url, headers or {}
+
+        return build
+
+    def deep_page(generator: random.Random) -> BenchmarkRequest:
+        # offsets available on every table, even the weekly one at scale 1
+        start, end = date_range
+        offset = generator.randrange(2000, 3500)
+        url = f"{path}?data_inicial={start}&data_final={end}&deslocamento={offset}"
+        return url, {}
+
+    def aggregated(generator: random.Random) -> BenchmarkRequest:
+        start, end = _window(generator, date_range, 366)
+        url = f"{path}/agregado?data_inicial={start}&data_final={end}&resolucao=mes"
+        return url, {}
+
+    return [
+        BenchmarkRoute(name, request()),
+        BenchmarkRoute(f"{name} largo", request("&formato=largo")),
+        BenchmarkRoute(f"{name} sem total", request("&contar=false")),
+        BenchmarkRoute(f"{name} página profunda", deep_page),
+        BenchmarkRoute(
+            f"{name} arrow",
+            request(headers={"Accept": "application/vnd.apache.arrow.stream"}),
+        ),
+        BenchmarkRoute(f"{name} agregado", aggregated),
+    ]
+
+
+def _export_route(
+    name: str, path: str, date_range: tuple[date, date], window_days: int
+) -> BenchmarkRoute:
+    def build(generator: random.Random) -> BenchmarkRequest:
+        start, end = _window(generator, date_range, window_days)
+        return f"{path}/exportar?data_inicial={start}&data_final={end}", {}
+
+    return BenchmarkRoute(name, build)
+
+
+async def _routes(client: httpx.AsyncClient) -> list[BenchmarkRoute]:
+    # identifiers used on the path of some routes, read from the api itself
+    subsystem_ids = [
+        subsystem["id_subsistema"]
+        for subsystem in (await client.get("/subsistemas/")).json()
+    ]
+    operative_weeks = [
+        week["semana_operativa"]
+        for week in (await client.get("/usinas-termicas/semanas-operativas")).json()
+    ]
+    power_plant_ids = [
+        power_plant["id_modelo_usina"]
+        for name in POWER_PLANT_NAMES
+        for power_plant in (
+            await client.get(f"/usinas-termicas/busca?nome={name}")
+        ).json()
+    ]
+
+    revalidated_url = (
+        f"/balanco-energia/horario?data_inicial={HOURLY_STATEMENTS_RANGE[0]}"
+        f"&data_final={HOURLY_STATEMENTS_RANGE[0] + timedelta(days=6)}"
+    )
+    entity_tag = (await client.get(revalidated_url)).headers["ETag"]
+
+    return [
+        BenchmarkRoute("subsistemas", lambda _: ("/subsistemas/", {})),
+        BenchmarkRoute(
+            "subsistema",
+            lambda g: (f"/subsistemas/{g.choice(subsystem_ids)}", {}),
+        ),
+        *_time_series_routes(
+            "balanço horário",
+            "/balanco-energia/horario",
+            HOURLY_STATEMENTS_RANGE,
+            7,
+        ),
+        _export_route(
+            "balanço horário exportar",
+            "/balanco-energia/horario",
+            HOURLY_STATEMENTS_RANGE,
+            31,
+        ),
+        BenchmarkRoute(
+            "balanço horário revalidado",
+            lambda _: (revalidated_url, {"If-None-Match": entity_tag}),
+        ),
+        *_time_series_routes(
+            "balanço semihorário",
+            "/balanco-energia/semihorario",
+            HALF_HOURLY_STATEMENTS_RANGE,
+            7,
+        ),
+        _export_route(
+            "balanço semihorário exportar",
+            "/balanco-energia/semihorario",
+            HALF_HOURLY_STATEMENTS_RANGE,
+            31,
+        ),
+        *_time_series_routes(
+            "cmo semanal", "/cmo/semanal", WEEKLY_COSTS_RANGE, 5 * 365
+        ),
+        _export_route("cmo semanal exportar", "/cmo/semanal", WEEKLY_COSTS_RANGE, 365),
+        *_time_series_routes(
+            "cmo semihorário",
+            "/cmo/semihorario",
+            HALF_HOURLY_COSTS_RANGE,
+            7,
+        ),
+        _export_route(
+            "cmo semihorário exportar",
+            "/cmo/semihorario",
+            HALF_HOURLY_COSTS_RANGE,
+            31,
+        ),
+        BenchmarkRoute(
+            "cmo semihorário com balanço",
+            lambda g: (
+                "/cmo/semihorario/balanco-energia?data_inicial={}&data_final={}".format(
+                    *_window(g, HALF_HOURLY_STATEMENTS_RANGE, 7)
+                ),
+                {},
+            ),
+        ),
+        BenchmarkRoute(
+            "semanas operativas",
+            lambda _: ("/usinas-termicas/semanas-operativas", {}),
+        ),
+        BenchmarkRoute(
+            "ordem de mérito",
+            lambda g: (
+                "/usinas-termicas/ordem-merito"
+                f"?semana_operativa={g.choice(operative_weeks)}",
+                {},
+            ),
+        ),
+        BenchmarkRoute(
+            "busca de usinas",
+            lambda g: (
+                "/usinas-termicas/busca"
+                f"?nome={g.choice(POWER_PLANT_NAMES)[: g.randint(2, 6)]}",
+                {},
+            ),
+        ),
+        BenchmarkRoute(
+            "custos da usina",
+            lambda g: (f"/usinas-termicas/{g.choice(power_plant_ids)}/custos", {}),
+        ),
+        BenchmarkRoute("pool de conexões", lambda _: ("/metricas/pool", {})),
+    ]
+
+
+async def _run_route(
+    client: httpx.AsyncClient,
+    route: BenchmarkRoute,
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> RouteResult:
+    generator = random.Random(f"{seed}:{route.name}")
+    pending = [route.request(generator) for _ in range(requests)]
+    result = RouteResult()
+
+    async def worker():
+        while pending:
+            url, headers = pending.pop()
+            start = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            result.latencies.append(time.perf_counter() - start)
+            # bytes received on the wire, the content is already decompressed
+            result.response_bytes += response.num_bytes_downloaded
+            if response.status_code not in (200, 304):
+                result.errors += 1
+                logger.error(f"{route.name}: {response.status_code} on {url}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+async def benchmark(requests: int, concurrency: int, seed: int) -> dict[str, dict]:
+    app.dependency_overrides[validate_token] = lambda: {}
+    results = {}
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://benchmark",
+        headers={"Accept-Encoding": ACCEPT_ENCODING},
+        timeout=None,
+    ) as client:
+        for route in await _routes(client):
+            result = await _run_route(client, route, requests, concurrency, seed)
+            results[route.name] = result.summary()
+            summary = results[route.name]
+            logger.info(
+                f"{route.name}: p50 {summary['p50_ms']:.2f} ms, "
+                f"p95 {summary['p95_ms']:.2f} ms, p99 {summary['p99_ms']:.2f} ms, "
+                f"{summary['vazao_rps']} req/s, {summary['bytes_medio']} bytes, "
+                f"rss {summary['rss_mb']} MB"
+            )
+
+    await engine.dispose()
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict]):
+    for name, summary in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            logger.info(f"{name}: not present on the baseline")
+            continue
+        logger.info(
+            f"{name}: p50 {_ratio(summary, previous, 'p50_ms')}, "
+            f"p95 {_ratio(summary, previous, 'p95_ms')}, "
+            f"p99 {_ratio(summary, previous, 'p99_ms')}, "
+            f"throughput {_ratio(summary, previous, 'vazao_rps')}"
+        )
+
+
+def _ratio(summary: dict, previous: dict, key: str) -> str:
+    if not previous.get(key) or summary.get(key) is None:
+        return "-"
+    return f"{summary[key] / previous[key]:.2f}x"
+
+
+def _rss_mb() -> float | None:
+    # resident memory at the moment, only available on Linux
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except OSError:
+        return None
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # reported in kilobytes on Linux and in bytes on macOS
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args: argparse.Namespace):
+    if args.semear:
+        seed(args.escala)
+
+    if args.sem_cache:
+        response_cache.max_bytes = 0
+
+    results = asyncio.run(benchmark(args.requisicoes, args.concorrencia, args.semente))
+    report = {
+        "commit": _commit(),
+        "executado_em": datetime.now().isoformat(timespec="seconds"),
+        "banco": engine.dialect.name,
+        "python": platform.python_version(),
+        "escala": args.escala,
+        "requisicoes": args.requisicoes,
+        "concorrencia": args.concorrencia,
+        "semente": args.semente,
+        "cache": response_cache.max_bytes > 0,
+        "rotas": results,
+    }
+
+    if args.comparar:
+        with open(args.comparar) as baseline_file:
+            baseline = json.load(baseline_file)
+        settings = ["escala", "banco", "requisicoes", "concorrencia", "cache"]
+        if any(baseline.get(setting) != report[setting] for setting in settings):
+            logger.warning(
+                "The baseline was measured with other settings, "
+                f"compare the same {', '.join(settings)}"
+            )
+        compare(results, baseline["rotas"])
+
+    if args.saida:
+        with open(args.saida, "w") as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        logger.info(f"Results saved on {args.saida}")
+
+    if any(summary["erros"] for summary in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--semear",
+        action="store_true",
+        help="migrate the empty database and fill it with the synthetic tables",
+    )
+    parser.add_argument(
+        "--escala",
+        type=int,
+        default=1,
+        help="multiple of the real volume seeded, usually 1, 10 or 100",
+    )
+    parser.add_argument("--requisicoes", type=int, default=200)
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument(
+        "--sem-cache",
+        action="store_true",
+        help="disable the in-process response cache while measuring",
+    )
+    parser.add_argument("--saida", help="json file receiving the results")
+    parser.add_argument(
+        "--comparar", help="json file with the results of a previous execution"
+    )
+    main(parser.parse_args())
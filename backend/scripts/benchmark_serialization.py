@@ -0,0 +1,213 @@
+"""
+Micro-benchmark of the list endpoints serialization. Compares the ORM path (entities
+validated into Pydantic models and encoded by FastAPI), kept here as the reference
+implementation of the list routes, with the column path encoded straight to bytes by
+orjson, checking that both produce the same body. Must be executed from the backend
+folder against a populated database:
+
+    python -m scripts.benchmark_serialization --limite 500 --repeticoes 50
+"""
+
+import argparse
+import asyncio
+from datetime import date
+import logging
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.cache import response_cache
+from app.core.database import engine, session_maker
+from app.core.pagination import next_page_cursor
+from app.crud.energy_statement_crud import EnergyStatementCrud
+from app.crud.marginal_costs_crud import CostCrud
+from app.exceptions.database import NotFoundException
+from app.models import (
+    Base,
+    HalfHourlySubSystemMarginalCost,
+    HalfHourlySubSystemProductionStatement,
+    HourlySubSystemProductionStatement,
+    WeeklySubSystemMarginalCost,
+)
+from app.schemas import (
+    EnergyStatementResponse,
+    HalfHourlyEnergyStatement,
+    HalfHourlyEnergyStatementResponse,
+    HalfHourlySubSystemMarginalCostResponse,
+    HalfHourlySubSystemMarginalCostSchema,
+    HourlyEnergyStatement,
+    WeeklySubSystemMarginalCostResponse,
+    WeeklySubSystemMarginalCostSchema,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(levelname)s [%(asctime)s] %(filename)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+
+logger = logging.getLogger(__name__)
+
+START_DATE = date(2000, 1, 1)
+END_DATE = date(2025, 12, 31)
+
+
+async def main(limit: int, repetitions: int):
+    # the response cache would hide the cost of both paths
+    response_cache.max_bytes = 0
+
+    energy_crud = EnergyStatementCrud(session_maker)
+    cost_crud = CostCrud(session_maker)
+    benchmarks = [
+        (
+            "balanço horário",
+            HourlySubSystemProductionStatement,
+            EnergyStatementResponse,
+            HourlyEnergyStatement,
+            energy_crud.get_hourly_energy_statements,
+        ),
+        (
+            "balanço semihorário",
+            HalfHourlySubSystemProductionStatement,
+            HalfHourlyEnergyStatementResponse,
+            HalfHourlyEnergyStatement,
+            energy_crud.get_half_hourly_energy_statements,
+        ),
+        (
+            "cmo semanal",
+            WeeklySubSystemMarginalCost,
+            WeeklySubSystemMarginalCostResponse,
+            WeeklySubSystemMarginalCostSchema,
+            cost_crud.get_all_weekly,
+        ),
+        (
+            "cmo semihorário",
+            HalfHourlySubSystemMarginalCost,
+            HalfHourlySubSystemMarginalCostResponse,
+            HalfHourlySubSystemMarginalCostSchema,
+            cost_crud.get_all_half_hourly,
+        ),
+    ]
+
+    mismatches = 0
+    for name, model, response_schema, row_schema, json_method in benchmarks:
+
+        async def orm_path() -> bytes:
+            return await orm_page(
+                session_maker,
+                model,
+                response_schema,
+                row_schema,
+                START_DATE,
+                END_DATE,
+                limit,
+            )
+
+        async def json_path() -> bytes:
+            page = await json_method(START_DATE, END_DATE, limit=limit, offset=0)
+            assert isinstance(page, bytes)
+            return page
+
+        try:
+            orm_body, json_body = await orm_path(), await json_path()
+        except NotFoundException:
+            logger.warning(f"No rows found for '{name}', skipping")
+            continue
+
+        if orm_body != json_body:
+            mismatches += 1
+            logger.error(f"Response bodies of '{name}' differ between the two paths")
+
+        orm_times = await _measure(orm_path, repetitions)
+        json_times = await _measure(json_path, repetitions)
+        orm_median = statistics.median(orm_times)
+        json_median = statistics.median(json_times)
+        logger.info(
+            f"{name}: {len(json_body)} bytes, "
+            f"orm {orm_median * 1000:.2f} ms, "
+            f"json {json_median * 1000:.2f} ms, "
+            f"{orm_median / json_median:.1f}x faster"
+        )
+
+    await engine.dispose()
+
+    if mismatches:
+        sys.exit(1)
+
+
+async def orm_page(
+    session_maker: async_sessionmaker[AsyncSession],
+    model: type[Base],
+    response_schema: type[BaseModel],
+    row_schema: type[BaseModel],
+    start_date: date,
+    end_date: date,
+    limit: int,
+) -> bytes:
+    """
+    First page of a time series read as ORM entities, validated into the Pydantic
+    models and encoded as FastAPI encodes the response model of the list routes
+    """
+    key_columns = [model.data]
+    if "hora" in model.__table__.columns:
+        key_columns.append(model.hora)
+    key_columns.append(model.id_subsistema)
+
+    in_range = model.data.between(start_date, end_date)
+    async with session_maker() as session:
+        rows = (
+            (
+                await session.execute(
+                    select(model)
+                    .where(in_range)
+                    .order_by(*key_columns)
+                    .limit(limit + 1)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if not rows:
+            raise NotFoundException(f"No rows on {model.__tablename__}")
+        total = (
+            await session.execute(
+                select(func.count()).select_from(model).where(in_range)
+            )
+        ).scalar_one()
+
+    response = response_schema(
+        total_registros=total,
+        data_inicial=start_date,
+        data_final=end_date,
+        dados=[
+            row_schema.model_validate(row, from_attributes=True) for row in rows[:limit]
+        ],
+        proximo_cursor=next_page_cursor(rows, limit),
+    )
+    return JSONResponse(content=jsonable_encoder(response)).body
+
+
+async def _measure(
+    function: Callable[[], Awaitable[bytes]], repetitions: int
+) -> list[float]:
+    times = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        await function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limite", type=int, default=500)
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.limite, args.repeticoes))
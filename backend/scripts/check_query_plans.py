@@ -0,0 +1,461 @@
+"""
+This script runs every query issued by the CRUD layer through the database planner
+(EXPLAIN) and fails if a time series table is read with a sequential scan or sorted
+outside of an index, or if a call does not read through the index expected for it.
+Must be executed from the backend folder against a migrated
+database, SQLite and Postgres are supported:
+
+    python -m scripts.check_query_plans
+"""
+
+import asyncio
+from datetime import date, time
+from functools import partial
+import itertools
+import json
+import logging
+import re
+import sys
+from typing import AsyncIterator, Awaitable, Callable, NamedTuple
+
+from sqlalchemy import UniqueConstraint, event
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.database import engine, session_maker
+from app.core.pagination import encode_cursor
+from app.crud.aggregation import rolled_up_models
+from app.crud.energy_statement_crud import EnergyStatementCrud
+from app.crud.marginal_costs_crud import CostCrud
+from app.crud.power_plant_crud import PowerPlantCrud
+from app.crud.power_plant_search import has_trigram_index
+from app.crud.subsystem_crud import SubSystemCrud
+from app.exceptions.database import NotFoundException
+from app.models import (
+    Base,
+    DailySeriesRollup,
+    HalfHourlySubSystemMarginalCost,
+    HalfHourlySubSystemProductionStatement,
+    HourlySubSystemProductionStatement,
+    MonthlySeriesRollup,
+    WeeklySubSystemMarginalCost,
+)
+from app.schemas import (
+    ExportFormat,
+    MeritOrderPowerPlant,
+    OperativeWeek,
+    Resolution,
+    TableLayout,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(levelname)s [%(asctime)s] %(filename)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+
+logger = logging.getLogger(__name__)
+
+# tables that grow with time and must never be read without an index
+FACT_TABLES = {
+    "balanco_subsistema_horario",
+    "balanco_subsistema_semihorario",
+    "custo_marginal_operacao_semanal",
+    "custo_marginal_operacao_semihorario",
+    "custo_variavel_unitario_usinas_termicas",
+}
+
+START_DATE = date(2000, 1, 1)
+END_DATE = date(2025, 12, 31)
+
+
+class CheckedCall(NamedTuple):
+    name: str
+    # every group must have one of its indexes in the plans of the call
+    expected_indexes: list[tuple[str, ...]]
+    # whether the rows of the time series tables must come in index order
+    ordered: bool
+    statements: dict[str, object]
+
+
+async def main():
+    checked_calls: list[CheckedCall] = []
+
+    def capture_statement(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            checked_calls[-1].statements.setdefault(statement, parameters)
+
+    async def check(
+        name: str,
+        call: Callable[[], Awaitable],
+        expected_indexes: list[tuple[str, ...]],
+        ordered: bool = True,
+    ):
+        checked_calls.append(CheckedCall(name, expected_indexes, ordered, {}))
+        try:
+            await call()
+        except NotFoundException:
+            logger.warning(f"No rows found for '{name}', only the first query was run")
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture_statement)
+
+    energy_crud = EnergyStatementCrud(session_maker)
+    cost_crud = CostCrud(session_maker)
+    power_plant_crud = PowerPlantCrud(session_maker)
+    hourly_cursor = encode_cursor(START_DATE, time(12), "SE")
+    weekly_cursor = encode_cursor(START_DATE, None, "SE")
+
+    series = [
+        (
+            "balanço horário",
+            HourlySubSystemProductionStatement,
+            energy_crud.get_hourly_energy_statements,
+            energy_crud.get_aggregated_hourly_energy_statements,
+            energy_crud.stream_hourly_energy_statements,
+            hourly_cursor,
+        ),
+        (
+            "balanço semihorário",
+            HalfHourlySubSystemProductionStatement,
+            energy_crud.get_half_hourly_energy_statements,
+            energy_crud.get_aggregated_half_hourly_energy_statements,
+            energy_crud.stream_half_hourly_energy_statements,
+            hourly_cursor,
+        ),
+        (
+            "cmo semanal",
+            WeeklySubSystemMarginalCost,
+            cost_crud.get_all_weekly,
+            cost_crud.get_aggregated_weekly,
+            cost_crud.stream_weekly,
+            weekly_cursor,
+        ),
+        (
+            "cmo semihorário",
+            HalfHourlySubSystemMarginalCost,
+            cost_crud.get_all_half_hourly,
+            cost_crud.get_aggregated_half_hourly,
+            cost_crud.stream_half_hourly,
+            hourly_cursor,
+        ),
+    ]
+
+    # every list method is called on both layouts, on offset and cursor mode, with and
+    # without the subsystem filter
+    for name, model, list_method, aggregate_method, stream_method, cursor in series:
+        for layout, used_cursor, subsystems in itertools.product(
+            TableLayout, (None, cursor), (None, ("SE",))
+        ):
+            await check(
+                f"{name} {layout}",
+                partial(
+                    list_method,
+                    START_DATE,
+                    END_DATE,
+                    limit=500,
+                    offset=1000,
+                    cursor=used_cursor,
+                    subsystems=subsystems,
+                    layout=layout,
+                ),
+                [_range_indexes(model, subsystems)],
+            )
+
+        # the aggregations group by a computed period, only their scans are checked
+        for resolution, subsystems in itertools.product(Resolution, (None, ("SE",))):
+            await check(
+                f"{name} agregado por {resolution}",
+                partial(
+                    aggregate_method,
+                    START_DATE,
+                    END_DATE,
+                    resolution,
+                    limit=500,
+                    offset=0,
+                    subsystems=subsystems,
+                ),
+                [_aggregation_indexes(model, resolution)],
+                ordered=False,
+            )
+
+        for subsystems in (None, ("SE",)):
+            await check(
+                f"{name} exportado",
+                partial(
+                    _first_chunk,
+                    stream_method(
+                        START_DATE, END_DATE, ExportFormat.NDJSON, subsystems
+                    ),
+                ),
+                [_range_indexes(model, subsystems)],
+            )
+
+    for used_cursor, subsystems in itertools.product(
+        (None, hourly_cursor), (None, ("SE",))
+    ):
+        await check(
+            "cmo e balanço semihorários",
+            partial(
+                cost_crud.get_half_hourly_with_energy_statements,
+                START_DATE,
+                END_DATE,
+                limit=500,
+                offset=1000,
+                cursor=used_cursor,
+                subsystems=subsystems,
+            ),
+            [
+                _range_indexes(HalfHourlySubSystemMarginalCost, subsystems),
+                _range_indexes(HalfHourlySubSystemProductionStatement, subsystems),
+            ],
+        )
+
+    await check("subsistemas", SubSystemCrud(session_maker).get_all, [])
+
+    weeks: list[OperativeWeek] = []
+
+    async def get_operative_weeks():
+        weeks.extend(await power_plant_crud.get_operative_weeks())
+
+    await check(
+        "semanas operativas",
+        get_operative_weeks,
+        [("ix_custo_variavel_unitario_usinas_termicas_semana_operativa",)],
+    )
+    operative_week = weeks[-1].semana_operativa if weeks else "2024-01"
+
+    merit_order: list[MeritOrderPowerPlant] = []
+
+    async def get_merit_order(subsystems: tuple[str, ...] | None):
+        response = await power_plant_crud.get_merit_order(operative_week, subsystems)
+        merit_order.extend(response.dados)
+
+    for subsystems in (None, ("SE",)):
+        await check(
+            "ordem de mérito",
+            partial(get_merit_order, subsystems),
+            [("ix_custo_variavel_unitario_usinas_termicas_semana_operativa",)],
+        )
+    power_plant_id = merit_order[0].id_modelo_usina if merit_order else "UTE"
+
+    for start_date, end_date in ((None, None), (START_DATE, END_DATE)):
+        await check(
+            "histórico de custos da usina",
+            partial(
+                power_plant_crud.get_cost_history, power_plant_id, start_date, end_date
+            ),
+            [("uq_custo_variavel_unitario_usinas_termicas_id_modelo_usina",)],
+        )
+
+    # without the trigram index the search reads every plant once into memory
+    async with session_maker() as session:
+        trigram_search = await has_trigram_index(session)
+    await check(
+        "busca de usinas",
+        partial(power_plant_crud.search, "ang", 10),
+        [("ix_usina_termica_usina",)] if trigram_search else [],
+    )
+
+    event.remove(engine.sync_engine, "before_cursor_execute", capture_statement)
+
+    failures = 0
+    plans: dict[str, QueryPlan] = {}
+    async with engine.connect() as conn:
+        declared_indexes = await _declared_indexes(conn)
+        for checked_call in checked_calls:
+            used_indexes: set[str] = set()
+            for statement, parameters in checked_call.statements.items():
+                if statement not in plans:
+                    plans[statement] = await _explain(conn, statement, parameters)
+                plan = plans[statement]
+                used_indexes.update(
+                    declared_indexes.get(index, index) for index in plan.indexes
+                )
+                problems = plan.scans
+                if checked_call.ordered and _must_read_in_order(statement):
+                    problems = problems + plan.sorts
+                if problems:
+                    failures += 1
+                    logger.error(
+                        "Query plan regression on '%s':\n%s\n%s",
+                        checked_call.name,
+                        statement,
+                        "\n".join(problems),
+                    )
+
+            missing_indexes = [
+                indexes
+                for indexes in checked_call.expected_indexes
+                if not used_indexes.intersection(indexes)
+            ]
+            if missing_indexes:
+                failures += 1
+                logger.error(
+                    "Query plans of '%s' do not use %s, only %s",
+                    checked_call.name,
+                    " and ".join(" or ".join(indexes) for indexes in missing_indexes),
+                    ", ".join(sorted(used_indexes)) or "no index",
+                )
+
+    await engine.dispose()
+
+    logger.info(
+        f"Checked {len(plans)} queries of {len(checked_calls)} calls on "
+        f"{engine.dialect.name}, {failures} regressions"
+    )
+    if failures:
+        sys.exit(1)
+
+
+async def _first_chunk(stream: AsyncIterator[str]):
+    # the export query runs on the first chunk, the rest of the rows are not read
+    async for _ in stream:
+        break
+    await stream.aclose()
+
+
+def _range_indexes(
+    model: type[Base], subsystems: tuple[str, ...] | None
+) -> tuple[str, ...]:
+    # the natural key serves the date range, with the subsystem filter the planner may
+    # pick the subsystem index instead
+    table_name = model.__tablename__
+    if subsystems:
+        return (f"uq_{table_name}_data", f"ix_{table_name}_id_subsistema")
+    return (f"uq_{table_name}_data",)
+
+
+def _aggregation_indexes(model: type[Base], resolution: Resolution) -> tuple[str, ...]:
+    if model in rolled_up_models:
+        # the checked range covers whole months, months and years read the monthly
+        # rollup and days and weeks the daily one
+        rollup = (
+            MonthlySeriesRollup
+            if resolution in (Resolution.MES, Resolution.ANO)
+            else DailySeriesRollup
+        )
+        return (f"uq_{rollup.__tablename__}_tabela",)
+    # the groups are per subsystem, so the subsystem index may serve them even without
+    # the subsystem filter
+    return _range_indexes(model, ("SE",))
+
+
+async def _declared_indexes(conn: AsyncConnection) -> dict[str, str]:
+    # the checks expect the index names declared on the models: SQLite backs the unique
+    # constraints with automatic indexes and Postgres names the indexes of each
+    # partition after it
+    if engine.dialect.name == "postgresql":
+        rows = await conn.exec_driver_sql(
+            "SELECT child.relname, parent.relname FROM pg_inherits"
+            " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+            " JOIN pg_class parent ON parent.oid = pg_inherits.inhparent"
+            " WHERE child.relkind = 'i'"
+        )
+        return dict(rows.all())
+
+    declared_indexes: dict[str, str] = {}
+    for table in Base.metadata.tables.values():
+        constraint_names = {
+            tuple(column.name for column in constraint.columns): constraint.name
+            for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint)
+        }
+        for _, index_name, _, origin, _ in await conn.exec_driver_sql(
+            f"PRAGMA index_list('{table.name}')"
+        ):
+            if origin != "u":
+                continue
+            index_columns = tuple(
+                row[2]
+                for row in await conn.exec_driver_sql(
+                    f"PRAGMA index_info('{index_name}')"
+                )
+            )
+            if index_columns in constraint_names:
+                declared_indexes[index_name] = constraint_names[index_columns]
+    return declared_indexes
+
+
+class QueryPlan(NamedTuple):
+    # sequential scans of the time series tables
+    scans: list[str]
+    # rows sorted outside of an index
+    sorts: list[str]
+    indexes: set[str]
+
+
+async def _explain(conn: AsyncConnection, statement: str, parameters) -> QueryPlan:
+    if engine.dialect.name == "sqlite":
+        return await _explain_sqlite(conn, statement, parameters)
+    if engine.dialect.name == "postgresql":
+        return await _explain_postgres(conn, statement, parameters)
+    raise ValueError(f"Unsupported database {engine.dialect.name}")
+
+
+async def _explain_sqlite(
+    conn: AsyncConnection, statement: str, parameters
+) -> QueryPlan:
+    rows = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+
+    plan = QueryPlan([], [], set())
+    for row in rows:
+        detail: str = row[-1]
+        scanned_table = re.match(r"SCAN (\w+)", detail)
+        used_index = re.search(r"USING (?:COVERING )?INDEX (\w+)", detail)
+        if used_index:
+            plan.indexes.add(used_index.group(1))
+        if (
+            scanned_table
+            and _is_fact_table(scanned_table.group(1))
+            and "INDEX" not in detail
+        ):
+            plan.scans.append(detail)
+        elif "USE TEMP B-TREE" in detail:
+            plan.sorts.append(detail)
+    return plan
+
+
+async def _explain_postgres(
+    conn: AsyncConnection, statement: str, parameters
+) -> QueryPlan:
+    # discouraging the planner from these nodes makes it pick an index whenever one
+    # exists, even when the tables are too small for it to matter
+    await conn.exec_driver_sql("SET enable_seqscan = off")
+    await conn.exec_driver_sql("SET enable_sort = off")
+    explained = (
+        await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+    ).scalar_one()
+    if isinstance(explained, str):
+        explained = json.loads(explained)
+
+    plan = QueryPlan([], [], set())
+    nodes = [explained[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", []))
+        if "Index Name" in node:
+            plan.indexes.add(node["Index Name"])
+        if node["Node Type"] == "Seq Scan" and _is_fact_table(node["Relation Name"]):
+            plan.scans.append(f"Seq Scan on {node['Relation Name']}")
+        elif node["Node Type"] == "Sort":
+            plan.sorts.append(f"Sort on {', '.join(node['Sort Key'])}")
+    return plan
+
+
+def _is_fact_table(relation_name: str) -> bool:
+    # the yearly partitions of a fact table are named after it
+    return re.sub(r"_\d{4}$", "", relation_name) in FACT_TABLES
+
+
+def _reads_fact_table(statement: str) -> bool:
+    return any(table in statement for table in FACT_TABLES)
+
+
+def _must_read_in_order(statement: str) -> bool:
+    # summaries grouping the output of window functions read every row of the range,
+    # only their scans are checked
+    is_windowed_summary = " OVER (" in statement and "GROUP BY" in statement
+    return _reads_fact_table(statement) and not is_windowed_summary
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
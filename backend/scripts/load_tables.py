@@ -1,21 +1,49 @@
 """
 This script uses playwright to scrape over all tables present on the "Base dos Dados" page,
-after downloading the files and loading into a dataframe, inserts all records on the database
+after downloading the files and loading into a dataframe, inserts all records on the database.
+Rows already stored are updated in place, so the script can be executed again safely. With
+--incremental only the rows after the latest measurement of each subsystem are loaded, with
+--replace-years the years present on the files replace the ones stored and with --from-dir
+the csv files of a local directory are loaded instead of the scraped ones
 """
 
+import argparse
 import asyncio
 
+from datetime import date, datetime, timezone
 import errno
+from functools import partial
+import hashlib
+import json
 import logging.config
 import os
 from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator
 import shutil
+import sys
+import time
 
 from dotenv import load_dotenv
-from sqlalchemy import MetaData, Table
+from sqlalchemy import (
+    Column,
+    Date,
+    MetaData,
+    Select,
+    Table,
+    and_,
+    case,
+    cast,
+    func,
+    literal,
+    select,
+    text,
+    true,
+    union_all,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
-from sqlalchemy.sql.expression import insert
-from playwright.async_api import Locator, async_playwright, Page, Browser
+from sqlalchemy.sql.expression import Insert, delete, insert, update
+from playwright.async_api import Locator, async_playwright, Page
 import polars as pl
 
 LOGGING_CONFIG = {
@@ -128,6 +156,65 @@ schemas_for_csv = {
     ),
 }
 
+# time series tables with row counts per day, used by the api to answer the totals
+daily_counted_tables = [
+    "balanco_subsistema_horario",
+    "balanco_subsistema_semihorario",
+    "custo_marginal_operacao_semanal",
+    "custo_marginal_operacao_semihorario",
+]
+
+# sub-daily time series tables with daily and monthly rollups of every value column,
+# used by the api to answer aggregations
+rolled_up_tables = [
+    "balanco_subsistema_horario",
+    "balanco_subsistema_semihorario",
+    "custo_marginal_operacao_semihorario",
+]
+
+# tables partitioned by year on postgres, their rows can also be replaced year by year
+yearly_tables = [
+    "balanco_subsistema_horario",
+    "balanco_subsistema_semihorario",
+    "custo_marginal_operacao_semihorario",
+]
+
+# table with the subsystem names kept on the database, from the original source
+subsystem_source_table = schemas_for_csv["BALANCO_ENERGIA_SUBSISTEMA"][0]
+
+# weekly unit costs of the thermal power plants, the plants searched by the api are
+# recalculated from it
+power_plant_costs_table = "custo_variavel_unitario_usinas_termicas"
+
+# browser pages downloading files at the same time while scraping
+DOWNLOAD_CONCURRENCY = 4
+
+# file kept on the --from-dir directory with the checksums of the files already loaded
+MANIFEST_FILENAME = "manifest.json"
+
+# rows written at a time on the COPY stream of the postgres bulk loader
+COPY_BATCH_ROWS = 50_000
+
+# unique columns of each table, rows already stored are updated instead of duplicated
+natural_keys = {
+    "subsistema": ["id_subsistema"],
+    "balanco_subsistema_horario": ["data", "hora", "id_subsistema"],
+    "balanco_subsistema_semihorario": ["data", "hora", "id_subsistema"],
+    "custo_marginal_operacao_semanal": ["data", "id_subsistema"],
+    "custo_marginal_operacao_semihorario": ["data", "hora", "id_subsistema"],
+    "custo_variavel_unitario_usinas_termicas": ["id_modelo_usina", "data_inicio"],
+}
+
+# columns ordering the measurements of each subsystem, the incremental mode only loads
+# rows after the latest ones stored
+time_columns_for_table = {
+    "balanco_subsistema_horario": ["data", "hora"],
+    "balanco_subsistema_semihorario": ["data", "hora"],
+    "custo_marginal_operacao_semanal": ["data"],
+    "custo_marginal_operacao_semihorario": ["data", "hora"],
+    "custo_variavel_unitario_usinas_termicas": ["data_inicio"],
+}
+
 # maps the column names on the csv files to the column names to be used on the database
 table_mapping_for_csv = {
     # commom columns
@@ -151,53 +238,289 @@ table_mapping_for_csv = {
 }
 
 
-async def main():
+async def main(
+    incremental: bool = False,
+    batch_size: int | None = None,
+    from_dir: str | None = None,
+    concurrency: int = DOWNLOAD_CONCURRENCY,
+    replace_years: bool = False,
+) -> bool:
+    """Loads the csv files on the database, returns if the load was committed"""
     DATABASE_URL = os.getenv("DATABASE_URL")
 
     if not DATABASE_URL:
         raise ValueError("DATABASE_URL not set")
 
-    try:
-        raw_data_paths, treated_data_paths = await scrape_tables()
+    paths: list[str] | None = None
+    if from_dir:
+        manifest = _read_manifest(from_dir)
+        checksums = {path: _file_checksum(path) for path in find_csv_files(from_dir)}
+        paths = []
+        for path, checksum in checksums.items():
+            if manifest.get(Path(path).name, {}).get("sha256") == checksum:
+                logger.info(f"Skipping unchanged file {Path(path).name}")
+            else:
+                paths.append(path)
 
-        # for every table stores a tuple with the table name and the corresponding dataframe
-        data_for_table_name: list[tuple[str, pl.DataFrame]] = []
+        if not paths:
+            logger.info("No csv files to load")
+            return True
 
-        data_for_table_name.append(get_raw_data(raw_data_paths))
+    # each file is parsed and inserted as soon as it's downloaded, the dataframes wait
+    # on a queue of a single item so only one file is kept in memory ahead of the
+    # insertions
+    downloaded: asyncio.Queue[str | None] = asyncio.Queue()
+    parsed: asyncio.Queue[tuple[str, Iterable[pl.DataFrame]] | None] = asyncio.Queue(
+        maxsize=1
+    )
+    downloading = asyncio.create_task(_download_files(downloaded, paths, concurrency))
+    parsing = asyncio.create_task(
+        _parse_files(downloaded, downloading, parsed, batch_size)
+    )
+    try:
+        saved = await save_tables(
+            DATABASE_URL, _queue_items(parsed, parsing), incremental, replace_years
+        )
 
-        for treated in treated_data_paths:
-            data_for_table_name.append(_read_csv(treated))
+        if from_dir and saved:
+            for path in paths or []:
+                manifest[Path(path).name] = {
+                    "sha256": checksums[path],
+                    "rows": _count_csv_rows(path),
+                    "loaded_at": datetime.now().isoformat(),
+                }
+            _write_manifest(from_dir, manifest)
+        return saved
 
-        engine = create_async_engine(DATABASE_URL)
-        async with engine.begin() as conn:
-            metadata = MetaData()
-            await conn.run_sync(metadata.reflect)
-            tables_dict = metadata.tables
+    finally:
+        for task in (downloading, parsing):
+            task.cancel()
+        await asyncio.gather(downloading, parsing, return_exceptions=True)
 
+        if not from_dir:
             try:
-                # all tables have information about subsystems, choosing the first one
-                # by convention
-                await _insert_on_table(
-                    "subsistema",
-                    tables_dict,
-                    data_for_table_name[0][1],
-                    conn,
-                    unique=True,
-                )
-                for table_name, data in data_for_table_name:
-                    await _insert_on_table(table_name, tables_dict, data, conn)
-                await conn.commit()
-                logger.info("Successfully pulled table info from csv files")
-            except Exception:
-                logger.exception("Error saving data on tables")
-                await conn.rollback()
+                shutil.rmtree(os.path.join(os.path.dirname(__file__), "csv"))
+            except OSError as e:
+                if e.errno != errno.ENOENT:
+                    logger.error(f"Unexpected error removing csv files: code {e.errno}")
+
 
+async def _download_files(
+    downloaded: asyncio.Queue[str | None],
+    paths: list[str] | None,
+    concurrency: int,
+):
+    """Puts the local files or the scraped ones on the queue, ending with None"""
+    try:
+        if paths is None:
+            await scrape_tables(downloaded, concurrency)
+        else:
+            for path in paths:
+                await downloaded.put(path)
     finally:
+        await downloaded.put(None)
+
+
+async def _parse_files(
+    downloaded: asyncio.Queue[str | None],
+    downloading: asyncio.Task,
+    parsed: asyncio.Queue[tuple[str, Iterable[pl.DataFrame]] | None],
+    batch_size: int | None,
+):
+    """Reads each downloaded file outside of the event loop, ending with None"""
+    try:
+        async for path in _queue_items(downloaded, downloading):
+            await parsed.put(await asyncio.to_thread(read_table, path, batch_size))
+    except BaseException:
+        # the load fails either way, the file waiting on the queue is dropped so the
+        # end is never blocked on insertions that already stopped reading it
+        while not parsed.empty():
+            parsed.get_nowait()
+        parsed.put_nowait(None)
+        raise
+    await parsed.put(None)
+
+
+async def _queue_items[T](
+    queue: asyncio.Queue[T | None], producer: asyncio.Task
+) -> AsyncIterator[T]:
+    """
+    Yields the items put on the queue until None is found, then raises the errors of
+    the task producing them so a failed download or parse is never committed
+    """
+    while (item := await queue.get()) is not None:
+        yield item
+    await producer
+
+
+def find_csv_files(directory: str) -> list[str]:
+    """Finds the csv files of each table on a local directory"""
+    paths: list[str] = []
+    for path in sorted(Path(directory).glob("*.csv")):
+        if _is_raw_data_file(str(path)) or path.name.split(".")[0] in schemas_for_csv:
+            paths.append(str(path))
+        else:
+            logger.warning(f"Ignoring file {path.name}, it doesn't match any table")
+
+    return paths
+
+
+def _read_manifest(directory: str) -> dict[str, dict]:
+    try:
+        with open(os.path.join(directory, MANIFEST_FILENAME)) as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_manifest(directory: str, manifest: dict[str, dict]):
+    with open(os.path.join(directory, MANIFEST_FILENAME), "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+
+
+def _file_checksum(path: str) -> str:
+    checksum = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(1024 * 1024):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def _count_csv_rows(path: str) -> int:
+    return (
+        pl.scan_csv(path, separator=_separator_for_file(path))
+        .select(pl.len())
+        .collect()
+        .item()
+    )
+
+
+async def save_tables(
+    database_url: str,
+    data_for_table_name: AsyncIterable[tuple[str, Iterable[pl.DataFrame]]],
+    incremental: bool = False,
+    replace_years: bool = False,
+) -> bool:
+    """
+    Saves all dataframes in a single transaction as they are read, returns if it was
+    committed. With `replace_years` the rows of the yearly tables replace all rows
+    stored on the years present on the files
+    """
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        metadata = MetaData()
+        await conn.run_sync(metadata.reflect)
+        tables_dict = metadata.tables
+
         try:
-            shutil.rmtree(os.path.join(os.path.dirname(__file__), "csv"))
-        except OSError as e:
-            if e.errno != errno.ENOENT:
-                logger.error(f"Unexpected error removing csv files: code {e.errno}")
+            # first date changed on each table
+            changed_since: dict[str, date] = {}
+            # latest rows of each table, read before any insertion on it because the
+            # files and batches are not ordered by date
+            latest_for_table: dict[str, pl.DataFrame | None] = {}
+            stored_subsystems: set[str] = set()
+            partitioned_tables = await _partitioned_tables(conn)
+            created_partitions: set[tuple[str, int]] = set()
+            # tables receiving the rows of each year replaced, None when the rows are
+            # inserted on the table itself
+            replacements: dict[tuple[str, int], Table | None] = {}
+            # rows inserted on each table and the seconds spent inserting them
+            insertion_totals: dict[str, tuple[int, float]] = {}
+            async for table_name, batches in data_for_table_name:
+                if incremental and table_name not in latest_for_table:
+                    latest_for_table[table_name] = await _latest_rows(
+                        table_name, tables_dict, conn
+                    )
+                latest = latest_for_table.get(table_name)
+
+                batches_iterator = iter(batches)
+                # batches read lazily from the file are parsed outside of the event loop
+                while (
+                    data := await asyncio.to_thread(next, batches_iterator, None)
+                ) is not None:
+                    # all tables have information about subsystems, the names of the
+                    # original source are kept and the other tables only add the
+                    # subsystems missing
+                    new_subsystems = (
+                        data
+                        if table_name == subsystem_source_table
+                        else data.filter(
+                            ~pl.col("id_subsistema").is_in(stored_subsystems)
+                        )
+                    )
+                    if not new_subsystems.is_empty():
+                        # only the source table updates the names already stored
+                        await _insert_on_table(
+                            "subsistema",
+                            tables_dict,
+                            new_subsystems,
+                            conn,
+                            unique=True,
+                            update=table_name == subsystem_source_table,
+                        )
+                        stored_subsystems.update(new_subsystems["id_subsistema"])
+
+                    start = time.perf_counter()
+                    if replace_years and table_name in yearly_tables:
+                        inserted = await _insert_replacing_years(
+                            table_name,
+                            tables_dict,
+                            data,
+                            conn,
+                            replacements,
+                            table_name in partitioned_tables,
+                        )
+                    else:
+                        if table_name in partitioned_tables:
+                            await _create_partitions(
+                                table_name, data, conn, created_partitions
+                            )
+                        inserted = await _insert_on_table(
+                            table_name, tables_dict, data, conn, latest=latest
+                        )
+                    rows, elapsed = insertion_totals.get(table_name, (0, 0.0))
+                    insertion_totals[table_name] = (
+                        rows + inserted.height,
+                        elapsed + time.perf_counter() - start,
+                    )
+                    date_column = time_columns_for_table.get(table_name, ["data"])[0]
+                    if date_column in inserted.columns and not inserted.is_empty():
+                        first_date: date = inserted[date_column].min()  # type: ignore
+                        changed_since[table_name] = min(
+                            changed_since.get(table_name, first_date), first_date
+                        )
+
+            for table_name, (rows, elapsed) in insertion_totals.items():
+                logger.info(
+                    f"Inserted {rows} rows on table {table_name} in {elapsed:.2f}s "
+                    f"({rows / elapsed:.0f} rows/s)"
+                )
+
+            for table_name, year in replacements:
+                # rows removed from the year are also changes
+                year_start = date(year, 1, 1)
+                changed_since[table_name] = min(
+                    changed_since.get(table_name, year_start), year_start
+                )
+            await _swap_partitions(replacements, conn)
+
+            if changed_since:
+                await _refresh_daily_counts(tables_dict, conn, changed_since)
+                await _refresh_rollups(tables_dict, conn, changed_since)
+                await _refresh_power_plants(tables_dict, conn, changed_since)
+                await _bump_dataset_version(tables_dict, conn)
+            else:
+                logger.info("No new rows found on the csv files")
+            await conn.commit()
+            logger.info("Successfully pulled table info from csv files")
+            saved = True
+        except Exception:
+            logger.exception("Error saving data on tables")
+            await conn.rollback()
+            saved = False
+
+    await engine.dispose()
+    return saved
 
 
 async def _insert_on_table(
@@ -206,7 +529,16 @@ async def _insert_on_table(
     dataframe: pl.DataFrame,
     connection: AsyncConnection,
     unique: bool = False,
-):
+    latest: pl.DataFrame | None = None,
+    into: Table | None = None,
+    update: bool = True,
+) -> pl.DataFrame:
+    """
+    Inserts the dataframe rows on the table, updating the rows already stored with the
+    same natural key, or keeping them when `update` is false. When the latest rows
+    stored are informed only the rows after them are inserted, and `into` writes the
+    rows on another table with the same columns. Returns the inserted rows
+    """
     if table_name not in tables_dict:
         logger.error(f"Table {table_name} do not exists in the database")
         raise ValueError(f"Missing table {table_name}")
@@ -225,79 +557,685 @@ async def _insert_on_table(
     if unique:
         df = df.unique()
 
-    records = df.to_dicts()
+    key = natural_keys.get(table_name)
+    if key:
+        # a statement can't update the same row twice
+        df = df.unique(subset=key, keep="last", maintain_order=True)
+
+    if latest is not None:
+        df = _only_newer_rows(table, df, latest)
+
+    if df.is_empty():
+        logger.info(f"No rows to insert on table {table_name}")
+        return df
+
+    target = into if into is not None else table
+    logger.info(f"Inserting {df.height} rows on table {target.name}")
+    if (
+        connection.dialect.name == "postgresql"
+        and connection.dialect.driver == "psycopg"
+    ):
+        await _copy_rows(target, df, connection, key, update)
+    else:
+        records = df.to_dicts()
+        _ = await connection.execute(
+            _upsert_statement(target, connection, key, update=update), records
+        )
+    return df
+
+
+async def _partitioned_tables(connection: AsyncConnection) -> set[str]:
+    if connection.dialect.name != "postgresql":
+        return set()
+
+    result = await connection.execute(
+        text(
+            "SELECT c.relname FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid"
+        )
+    )
+    return set(result.scalars())
+
+
+def _partition_name(table_name: str, year: int) -> str:
+    return f"{table_name}_{year}"
+
+
+def _year_bounds(year: int) -> str:
+    return f"FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+
+
+async def _create_partitions(
+    table_name: str,
+    dataframe: pl.DataFrame,
+    connection: AsyncConnection,
+    created_partitions: set[tuple[str, int]],
+):
+    """Creates the yearly partitions missing for the dates of the dataframe"""
+    for year in dataframe["data"].dt.year().unique().sort():
+        if (table_name, year) in created_partitions:
+            continue
+
+        await connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {_partition_name(table_name, year)} "
+                f"PARTITION OF {table_name} FOR VALUES {_year_bounds(year)}"
+            )
+        )
+        created_partitions.add((table_name, year))
+
+
+async def _insert_replacing_years(
+    table_name: str,
+    tables_dict: dict[str, Table],
+    dataframe: pl.DataFrame,
+    connection: AsyncConnection,
+    replacements: dict[tuple[str, int], Table | None],
+    partitioned: bool,
+) -> pl.DataFrame:
+    """
+    Inserts the dataframe rows replacing the rows stored on the years they cover. On
+    partitioned tables the rows of each year are loaded on a new table, swapped with
+    the year partition at the end of the load, on the other tables the rows of the
+    year are deleted before the first insertion
+    """
+    table = tables_dict[table_name]
+    inserted: list[pl.DataFrame] = []
+    years = dataframe.with_columns(pl.col("data").dt.year().alias("ano_carga"))
+    for (year,), year_data in years.partition_by("ano_carga", as_dict=True).items():
+        if (table_name, year) not in replacements:
+            replacements[(table_name, year)] = await _start_year_replacement(
+                table, year, connection, partitioned
+            )
+
+        inserted.append(
+            await _insert_on_table(
+                table_name,
+                tables_dict,
+                year_data,
+                connection,
+                into=replacements[(table_name, year)],
+            )
+        )
+    return pl.concat(inserted)
+
+
+async def _start_year_replacement(
+    table: Table, year: int, connection: AsyncConnection, partitioned: bool
+) -> Table | None:
+    if not partitioned:
+        logger.info(f"Deleting rows of {year} from table {table.name}")
+        await connection.execute(
+            delete(table).where(
+                table.c.data >= date(year, 1, 1), table.c.data < date(year + 1, 1, 1)
+            )
+        )
+        return None
+
+    # the indexes are copied so the rows can be upserted and the partition is attached
+    # without building them again
+    new_partition = f"{_partition_name(table.name, year)}_carga"
+    logger.info(f"Loading rows of {year} on table {new_partition}")
+    await connection.execute(text(f"DROP TABLE IF EXISTS {new_partition}"))
+    await connection.execute(
+        text(
+            f"CREATE TABLE {new_partition} "
+            f"(LIKE {table.name} INCLUDING DEFAULTS INCLUDING INDEXES)"
+        )
+    )
+    return await connection.run_sync(
+        lambda sync_connection: Table(
+            new_partition, MetaData(), autoload_with=sync_connection
+        )
+    )
+
+
+async def _swap_partitions(
+    replacements: dict[tuple[str, int], Table | None], connection: AsyncConnection
+):
+    """Replaces the year partitions with the tables loaded with their new rows"""
+    for (table_name, year), new_partition in replacements.items():
+        if new_partition is None:
+            continue
+
+        partition = _partition_name(table_name, year)
+        logger.info(f"Swapping partition {partition} of table {table_name}")
+        # the check constraint lets the attach skip the validation of every row
+        await connection.execute(
+            text(
+                f"ALTER TABLE {new_partition.name} ADD CONSTRAINT "
+                f"{new_partition.name}_ano CHECK "
+                f"(data >= '{year}-01-01' AND data < '{year + 1}-01-01')"
+            )
+        )
+        await connection.execute(text(f"DROP TABLE IF EXISTS {partition}"))
+        await connection.execute(
+            text(f"ALTER TABLE {new_partition.name} RENAME TO {partition}")
+        )
+        await connection.execute(
+            text(
+                f"ALTER TABLE {table_name} ATTACH PARTITION {partition} "
+                f"FOR VALUES {_year_bounds(year)}"
+            )
+        )
+        await connection.execute(
+            text(f"ALTER TABLE {partition} DROP CONSTRAINT {new_partition.name}_ano")
+        )
+
+        # naming the indexes copied from the parent table as postgres names the ones
+        # of the partitions it creates
+        indexes = await connection.execute(
+            text(
+                "SELECT c.relname, i.indisprimary, i.indisunique, "
+                "ARRAY(SELECT a.attname FROM unnest(CAST(i.indkey AS int2[])) "
+                "WITH ORDINALITY AS k(attnum, position) JOIN pg_attribute a "
+                "ON a.attrelid = i.indrelid AND a.attnum = k.attnum "
+                "ORDER BY k.position) "
+                "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid = CAST(:partition AS regclass)"
+            ),
+            {"partition": partition},
+        )
+        for index_name, primary, unique, columns in indexes.all():
+            if primary:
+                suffix = "pkey"
+            else:
+                suffix = f"{'_'.join(columns)}_{'key' if unique else 'idx'}"
+            await connection.execute(
+                text(f"ALTER INDEX {index_name} RENAME TO {partition}_{suffix}")
+            )
+
+
+async def _copy_rows(
+    table: Table,
+    dataframe: pl.DataFrame,
+    connection: AsyncConnection,
+    key: list[str] | None,
+    update: bool = True,
+):
+    """
+    Streams the rows as csv through COPY into a temporary table and upserts them from
+    there, COPY itself can't handle conflicts with the rows already stored
+    """
+    staging_table = Table(
+        f"{table.name}_carga",
+        MetaData(),
+        *[Column(name, table.c[name].type) for name in dataframe.columns],
+        prefixes=["TEMPORARY"],
+    )
+    await connection.run_sync(staging_table.create)
+
+    raw_connection = await connection.get_raw_connection()
+    columns = ", ".join(dataframe.columns)
+    async with raw_connection.driver_connection.cursor() as cursor:  # type: ignore
+        async with cursor.copy(
+            f"COPY {staging_table.name} ({columns}) FROM STDIN (FORMAT csv)"
+        ) as copy:
+            for batch in dataframe.iter_slices(COPY_BATCH_ROWS):
+                await copy.write(batch.write_csv(include_header=False))
+
+    await connection.execute(
+        _upsert_statement(
+            table, connection, key, source=select(staging_table), update=update
+        )
+    )
+    await connection.run_sync(staging_table.drop)
+
+
+def _upsert_statement(
+    table: Table,
+    connection: AsyncConnection,
+    key: list[str] | None,
+    source: Select | None = None,
+    update: bool = True,
+) -> Insert:
+    """
+    Insert statement that updates the rows with the same natural key, with the values
+    passed on execution or selected from `source`. Without `update` the rows already
+    stored are kept
+    """
+    dialect_insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(
+        connection.dialect.name, insert
+    )
+
+    statement = dialect_insert(table)
+    if source is not None:
+        statement = statement.from_select(source.selected_columns.keys(), source)
+    if not key or dialect_insert is insert:
+        return statement
+
+    updated_columns = {
+        column.name: statement.excluded[column.name]
+        for column in table.columns
+        if column.name not in key and column.name != "id"
+    }
+    if not update or not updated_columns:
+        return statement.on_conflict_do_nothing(index_elements=key)
+    return statement.on_conflict_do_update(index_elements=key, set_=updated_columns)
+
 
-    statement = insert(table)
+async def _latest_rows(
+    table_name: str, tables_dict: dict[str, Table], connection: AsyncConnection
+) -> pl.DataFrame | None:
+    """Latest measurement stored for each subsystem, when the table has a time order"""
+    if table_name not in time_columns_for_table or table_name not in tables_dict:
+        return None
+
+    time_columns = time_columns_for_table[table_name]
+    latest_rows = (
+        await connection.execute(
+            _latest_rows_statement(tables_dict[table_name], time_columns)
+        )
+    ).all()
+    logger.info(f"Loading rows of table {table_name} after {latest_rows}")
+
+    return pl.DataFrame(
+        [tuple(row) for row in latest_rows],
+        schema=["id_subsistema", *[f"latest_{column}" for column in time_columns]],
+        orient="row",
+    )
+
+
+def _only_newer_rows(
+    table: Table, dataframe: pl.DataFrame, latest: pl.DataFrame
+) -> pl.DataFrame:
+    """Keeps only the rows after the latest measurement stored for each subsystem"""
+    if latest.is_empty():
+        return dataframe
+
+    time_columns = time_columns_for_table[table.name]
+    latest_columns = [f"latest_{column}" for column in time_columns]
+    return (
+        dataframe.join(latest, on="id_subsistema", how="left")
+        .filter(pl.col(latest_columns[0]).is_null() | _is_after(time_columns))
+        .drop(latest_columns)
+    )
+
+
+def _latest_rows_statement(table: Table, time_columns: list[str]):
+    first_column = table.c[time_columns[0]]
+    latest_first = (
+        select(table.c.id_subsistema, func.max(first_column).label("latest"))
+        .group_by(table.c.id_subsistema)
+        .subquery()
+    )
+    if len(time_columns) == 1:
+        return select(latest_first.c.id_subsistema, latest_first.c.latest)
+
+    # latest time on the latest date of each subsystem
+    return (
+        select(
+            table.c.id_subsistema,
+            first_column,
+            func.max(table.c[time_columns[1]]),
+        )
+        .join(
+            latest_first,
+            and_(
+                table.c.id_subsistema == latest_first.c.id_subsistema,
+                first_column == latest_first.c.latest,
+            ),
+        )
+        .group_by(table.c.id_subsistema, first_column)
+    )
+
+
+def _is_after(time_columns: list[str]) -> pl.Expr:
+    column, *remaining = time_columns
+    current, latest = pl.col(column), pl.col(f"latest_{column}")
+    if not remaining:
+        return current > latest
+    return (current > latest) | ((current == latest) & _is_after(remaining))
+
+
+async def _refresh_daily_counts(
+    tables_dict: dict[str, Table],
+    connection: AsyncConnection,
+    changed_since: dict[str, date],
+):
+    if "contagem_diaria" not in tables_dict:
+        logger.warning(
+            "Table contagem_diaria do not exists in the database, totals will be counted on each request"
+        )
+        return
+
+    counts_table = tables_dict["contagem_diaria"]
+    for table_name in daily_counted_tables:
+        if table_name not in changed_since:
+            continue
+
+        table = tables_dict[table_name]
+        start_date = changed_since[table_name]
+        logger.info(
+            f"Recalculating daily row counts of table {table_name} since {start_date}"
+        )
+        await connection.execute(
+            delete(counts_table).where(
+                counts_table.c.tabela == table_name, counts_table.c.data >= start_date
+            )
+        )
+        await connection.execute(
+            insert(counts_table).from_select(
+                ["tabela", "data", "quantidade"],
+                select(literal(table_name), table.c.data, func.count())
+                .where(table.c.data >= start_date)
+                .group_by(table.c.data),
+            )
+        )
+
+
+async def _refresh_rollups(
+    tables_dict: dict[str, Table],
+    connection: AsyncConnection,
+    changed_since: dict[str, date],
+):
+    if "agregado_diario" not in tables_dict or "agregado_mensal" not in tables_dict:
+        logger.warning(
+            "Rollup tables do not exists in the database, aggregations will read every measurement"
+        )
+        return
+
+    daily_rollup = tables_dict["agregado_diario"]
+    monthly_rollup = tables_dict["agregado_mensal"]
+    rollup_columns = [
+        "tabela",
+        "coluna",
+        "id_subsistema",
+        "periodo",
+        "total_medicoes",
+        "quantidade",
+        "soma",
+        "minimo",
+        "maximo",
+    ]
+    for table_name in rolled_up_tables:
+        if table_name not in changed_since:
+            continue
+
+        table = tables_dict[table_name]
+        start_date = changed_since[table_name]
+        logger.info(f"Recalculating rollups of table {table_name} since {start_date}")
+
+        await connection.execute(
+            delete(daily_rollup).where(
+                daily_rollup.c.tabela == table_name,
+                daily_rollup.c.periodo >= start_date,
+            )
+        )
+        value_columns = [
+            column
+            for column in table.columns
+            if column.name not in ("id", "id_subsistema", "data", "hora")
+        ]
+        await connection.execute(
+            insert(daily_rollup).from_select(
+                rollup_columns,
+                _daily_rollup_statement(table, value_columns, start_date),
+            )
+        )
+
+        # months are recalculated from the daily rollups, starting on the whole month
+        # of the first date changed
+        month_start = start_date.replace(day=1)
+        await connection.execute(
+            delete(monthly_rollup).where(
+                monthly_rollup.c.tabela == table_name,
+                monthly_rollup.c.periodo >= month_start,
+            )
+        )
+        month = _month_start(daily_rollup.c.periodo, connection.dialect.name)
+        await connection.execute(
+            insert(monthly_rollup).from_select(
+                rollup_columns,
+                select(
+                    daily_rollup.c.tabela,
+                    daily_rollup.c.coluna,
+                    daily_rollup.c.id_subsistema,
+                    month,
+                    func.sum(daily_rollup.c.total_medicoes),
+                    func.sum(daily_rollup.c.quantidade),
+                    func.sum(daily_rollup.c.soma),
+                    func.min(daily_rollup.c.minimo),
+                    func.max(daily_rollup.c.maximo),
+                )
+                .where(
+                    daily_rollup.c.tabela == table_name,
+                    daily_rollup.c.periodo >= month_start,
+                )
+                .group_by(
+                    daily_rollup.c.tabela,
+                    daily_rollup.c.coluna,
+                    daily_rollup.c.id_subsistema,
+                    month,
+                ),
+            )
+        )
+
+
+def _daily_rollup_statement(
+    table: Table, value_columns: list[Column], start_date: date
+) -> Select:
+    """
+    Daily rollup rows of every value column of the table since the date. The rows are
+    grouped once with the aggregates of all columns side by side, and each group is
+    unpivoted into one rollup row per column by a cross join with the column names
+    """
+    aggregates = {
+        "quantidade": func.count,
+        "soma": func.sum,
+        "minimo": func.min,
+        "maximo": func.max,
+    }
+    grouped = (
+        select(
+            table.c.id_subsistema,
+            table.c.data,
+            func.count().label("total_medicoes"),
+            *[
+                aggregate(column).label(f"{column.name}_{name}")
+                for column in value_columns
+                for name, aggregate in aggregates.items()
+            ],
+        )
+        .where(table.c.data >= start_date)
+        .group_by(table.c.id_subsistema, table.c.data)
+        .subquery("medicoes")
+    )
+    # a select of literals per column instead of VALUES, SQLite can't name the columns
+    # of a VALUES subquery
+    column_names = union_all(
+        *[select(literal(column.name).label("coluna")) for column in value_columns]
+    ).subquery("colunas")
+
+    def unpivoted(name: str):
+        return case(
+            {
+                column.name: grouped.c[f"{column.name}_{name}"]
+                for column in value_columns
+            },
+            value=column_names.c.coluna,
+        )
+
+    return select(
+        literal(table.name),
+        column_names.c.coluna,
+        grouped.c.id_subsistema,
+        grouped.c.data,
+        grouped.c.total_medicoes,
+        *[unpivoted(name) for name in aggregates],
+    ).select_from(grouped.join(column_names, true()))
+
+
+async def _refresh_power_plants(
+    tables_dict: dict[str, Table],
+    connection: AsyncConnection,
+    changed_since: dict[str, date],
+):
+    """
+    Rebuilds the thermal power plants searched by the api, with the name and subsystem
+    of the latest operative week of each plant
+    """
+    if power_plant_costs_table not in changed_since:
+        return
+    if "usina_termica" not in tables_dict:
+        logger.warning(
+            "Table usina_termica do not exists in the database, power plants can't be searched by name"
+        )
+        return
+
+    logger.info("Recalculating thermal power plants")
+    plants = tables_dict["usina_termica"]
+    costs = tables_dict[power_plant_costs_table]
+    latest_costs = select(
+        costs.c.id_modelo_usina,
+        costs.c.usina,
+        costs.c.id_subsistema,
+        func.row_number()
+        .over(partition_by=costs.c.id_modelo_usina, order_by=costs.c.data_inicio.desc())
+        .label("ordem"),
+    ).subquery()
+    await connection.execute(delete(plants))
+    await connection.execute(
+        insert(plants).from_select(
+            ["id_modelo_usina", "usina", "id_subsistema"],
+            select(
+                latest_costs.c.id_modelo_usina,
+                latest_costs.c.usina,
+                latest_costs.c.id_subsistema,
+            ).where(latest_costs.c.ordem == 1),
+        )
+    )
 
-    logger.info(f"Inserting {len(records)} rows on table {table_name}")
-    _ = await connection.execute(statement, records)
 
+def _month_start(column: Column, dialect_name: str):
+    if dialect_name == "postgresql":
+        return cast(func.date_trunc("month", column), Date)
+    return func.date(column, "start of month")
 
-def get_raw_data(raw_files: list[str]) -> tuple[str, pl.DataFrame]:
-    dataframe_for_table = [_read_csv(file, separator=";") for file in raw_files]
 
-    result_df = pl.concat([pair[1] for pair in dataframe_for_table])
-    return dataframe_for_table[0][0], result_df
+async def _bump_dataset_version(
+    tables_dict: dict[str, Table], connection: AsyncConnection
+):
+    """Invalidates the responses cached by the api for the previous data"""
+    if "versao_dados" not in tables_dict:
+        logger.warning(
+            "Table versao_dados do not exists in the database, cached responses won't be invalidated"
+        )
+        return
+
+    table = tables_dict["versao_dados"]
+    # stored as naive UTC, like the row created by the migration
+    await connection.execute(
+        update(table).values(
+            versao=table.c.versao + 1,
+            atualizado_em=datetime.now(timezone.utc).replace(tzinfo=None),
+        )
+    )
+    logger.info("Dataset version updated")
+
 
+def read_table(
+    path_str: str, batch_size: int | None = None
+) -> tuple[str, Iterable[pl.DataFrame]]:
+    """
+    Reads a csv file returning the table name and its dataframes, the whole file at
+    once or lazily in batches of `batch_size` rows
+    """
+    separator = _separator_for_file(path_str)
+    if batch_size:
+        return _read_csv_batches(path_str, batch_size, separator)
 
-async def scrape_tables() -> tuple[list[str], list[str]]:
+    table_name, data = _read_csv(path_str, separator)
+    return table_name, [data]
+
+
+async def scrape_tables(
+    downloaded: asyncio.Queue[str | None], concurrency: int = DOWNLOAD_CONCURRENCY
+):
+    """
+    Downloads the csv files of all tables using up to `concurrency` browser pages at
+    the same time, putting the path of each file on the queue as soon as it's saved
+    """
     logger.info(f"Starting scraping of csv files in path {BASE_TABLES_URL}")
     async with async_playwright() as playwright:
         browser = await playwright.chromium.launch(headless=True)
+
         page = await browser.new_page()
-        response = await page.goto(BASE_TABLES_URL)
+        table_links_count = len(await _open_table_links(page))
+        await page.close()
 
-        helper_text_identifier = "Tabelas tratadas"
+        page = await browser.new_page()
+        raw_resources_count = len(await _open_raw_resources(page, RAW_DATA_URL))
+        await page.close()
 
-        if not response or response.status == 404:
-            raise ValueError(f"Couldn't access page {BASE_TABLES_URL}")
+        open_pages = asyncio.Semaphore(concurrency)
 
-        table_links_helper_text = await page.locator(
-            "p", has_text=helper_text_identifier
-        ).all()
+        async def download(download_on_page: Callable[[Page], Awaitable[str | None]]):
+            async with open_pages:
+                page = await browser.new_page()
+                try:
+                    path = await download_on_page(page)
+                finally:
+                    await page.close()
+            if path:
+                await downloaded.put(path)
 
-        if len(table_links_helper_text) > 1:
-            raise ValueError(
-                f"More than one occurrence of text '{helper_text_identifier}' identified, can't proceed"
-            )
+        async with asyncio.TaskGroup() as group:
+            # download the first table on the original font
+            for index in range(raw_resources_count):
+                group.create_task(
+                    download(partial(_download_original_table, index=index))
+                )
+            # skipping the first link because first table is not available on the website
+            for index in range(1, table_links_count):
+                group.create_task(download(partial(_download_table, index=index)))
 
-        clickable_links = await (
-            table_links_helper_text[0]
-            .locator("xpath=following-sibling::div")
-            .locator("p")
-        ).all()
+    logger.info("Finished scraping for csv files")
 
-        # download the first table on the original font
-        raw_data_paths = await _download_original_tables(browser, RAW_DATA_URL)
 
-        treated_data_paths: list[str] = []
-        # navigating to next table before download csv because first table is not available on the website
-        for link in clickable_links[1:]:
-            await link.click()
-            treated_data_paths.append(await _download_csv(page))
+async def _open_table_links(page: Page) -> list[Locator]:
+    response = await page.goto(BASE_TABLES_URL)
 
-    logger.info("Finished scraping for csv files")
-    return (raw_data_paths, treated_data_paths)
+    helper_text_identifier = "Tabelas tratadas"
 
+    if not response or response.status == 404:
+        raise ValueError(f"Couldn't access page {BASE_TABLES_URL}")
 
-async def _download_original_tables(browser: Browser, url: str) -> list[str]:
-    logger.info(
-        "Opening new page to get raw files for table 'Balanço de Energia por Subsistema'"
-    )
-    page = await browser.new_page()
+    table_links_helper_text = await page.locator(
+        "p", has_text=helper_text_identifier
+    ).all()
+
+    if len(table_links_helper_text) > 1:
+        raise ValueError(
+            f"More than one occurrence of text '{helper_text_identifier}' identified, can't proceed"
+        )
+
+    return await (
+        table_links_helper_text[0].locator("xpath=following-sibling::div").locator("p")
+    ).all()
+
+
+async def _download_table(page: Page, index: int) -> str:
+    # each page opens the tables listing and navigates to its own table
+    clickable_links = await _open_table_links(page)
+    await clickable_links[index].click()
+    return await _download_csv(page)
+
+
+async def _open_raw_resources(page: Page, url: str) -> list[Locator]:
     response = await page.goto(url)
     if not response or response.status == 404:
         raise ValueError(f"Couldn't access page {url}")
 
-    resources = await page.locator("li.resource-item").all()
+    return await page.locator("li.resource-item").all()
 
-    paths: list[str] = []
-    for resource in resources:
-        download = await _download_raw_csv_resource(page, resource)
-        if download:
-            paths.append(download)
 
-    return paths
+async def _download_original_table(page: Page, index: int) -> str | None:
+    logger.info(
+        f"Opening new page to get raw file {index} for table 'Balanço de Energia por Subsistema'"
+    )
+    resources = await _open_raw_resources(page, RAW_DATA_URL)
+    return await _download_raw_csv_resource(page, resources[index])
 
 
 async def _download_raw_csv_resource(page: Page, resource: Locator) -> str | None:
@@ -349,14 +1287,7 @@ async def _download_csv(page: Page) -> str:
 
 
 def _read_csv(path_str: str, separator: str = ",") -> tuple[str, pl.DataFrame]:
-    path = Path(path_str)
-    full_filename = path.parts[-1]
-    filename_no_suffixes = full_filename.split(".")[0]
-
-    if filename_no_suffixes.startswith("BALANCO_ENERGIA_SUBSISTEMA"):
-        used_schema = schemas_for_csv["BALANCO_ENERGIA_SUBSISTEMA"]
-    else:
-        used_schema = schemas_for_csv[filename_no_suffixes]
+    used_schema = _schema_for_file(path_str)
 
     df = pl.read_csv(
         source=path_str,
@@ -365,6 +1296,60 @@ def _read_csv(path_str: str, separator: str = ",") -> tuple[str, pl.DataFrame]:
         separator=separator,
     )
 
+    return used_schema[0], _with_date_and_time(df)
+
+
+def _read_csv_batches(
+    path_str: str, batch_size: int, separator: str = ","
+) -> tuple[str, Iterator[pl.DataFrame]]:
+    """
+    Reads the csv file lazily in batches of `batch_size` rows, only one batch of the
+    file is kept in memory at a time
+    """
+    used_schema = _schema_for_file(path_str)
+
+    def batches() -> Iterator[pl.DataFrame]:
+        reader = pl.read_csv_batched(
+            source=path_str,
+            columns=used_schema[1].names(),
+            schema_overrides=used_schema[1],
+            separator=separator,
+            batch_size=batch_size,
+        )
+        # the reader splits the file in chunks of varying sizes, regrouping them
+        pending: pl.DataFrame | None = None
+        while chunks := reader.next_batches(1):
+            pending = pl.concat([pending, *chunks] if pending is not None else chunks)
+            while pending.height >= batch_size:
+                yield _with_date_and_time(pending.slice(0, batch_size))
+                pending = pending.slice(batch_size)
+
+        if pending is not None and not pending.is_empty():
+            yield _with_date_and_time(pending)
+
+    return used_schema[0], batches()
+
+
+def _schema_for_file(path_str: str) -> tuple[str, pl.Schema]:
+    path = Path(path_str)
+    full_filename = path.parts[-1]
+    filename_no_suffixes = full_filename.split(".")[0]
+
+    if _is_raw_data_file(path_str):
+        return schemas_for_csv["BALANCO_ENERGIA_SUBSISTEMA"]
+    return schemas_for_csv[filename_no_suffixes]
+
+
+def _is_raw_data_file(path_str: str) -> bool:
+    # the original source splits the table in one file per year
+    return Path(path_str).name.startswith("BALANCO_ENERGIA_SUBSISTEMA")
+
+
+def _separator_for_file(path_str: str) -> str:
+    return ";" if _is_raw_data_file(path_str) else ","
+
+
+def _with_date_and_time(df: pl.DataFrame) -> pl.DataFrame:
     # needed only raw data that doesn't include date and time columns
     if "din_instante" in df.columns and (
         "data" not in df.columns or "hora" not in df.columns
@@ -376,8 +1361,51 @@ def _read_csv(path_str: str, separator: str = ",") -> tuple[str, pl.DataFrame]:
             ]
         )
 
-    return used_schema[0], df
+    return df
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser()
+    load_mode = parser.add_mutually_exclusive_group()
+    load_mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="load only the rows after the latest measurement stored of each subsystem",
+    )
+    load_mode.add_argument(
+        "--replace-years",
+        action="store_true",
+        help="replace all rows stored on the years present on the files of the hourly "
+        "and half-hourly tables, swapping their yearly partitions on postgres",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        help="read the csv files in batches of this many rows instead of all at once, "
+        "limiting the memory used by the script",
+    )
+    parser.add_argument(
+        "--from-dir",
+        help="load the csv files of a local directory instead of scraping them, files "
+        f"unchanged since the last load are skipped using the {MANIFEST_FILENAME} kept "
+        "on the directory",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DOWNLOAD_CONCURRENCY,
+        help="maximum number of browser pages downloading files at the same time",
+    )
+    args = parser.parse_args()
+    saved = asyncio.run(
+        main(
+            incremental=args.incremental,
+            batch_size=args.batch_size,
+            from_dir=args.from_dir,
+            concurrency=args.concurrency,
+            replace_years=args.replace_years,
+        )
+    )
+    # scheduled refreshes detect a failed load by the exit code
+    if not saved:
+        sys.exit(1)
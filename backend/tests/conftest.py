@@ -0,0 +1,73 @@
+import asyncio
+import os
+from pathlib import Path
+import shutil
+import tempfile
+from typing import Callable, Iterator
+
+# the settings and the engine are created on import, the tests always run on a
+# temporary database instead of the one configured for development
+_database_directory = tempfile.mkdtemp(prefix="desafio-igeos-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite+aiosqlite:///{_database_directory}/test.db",
+    AUTH0_DOMAIN="tests",
+    AUTH0_ISSUER="tests",
+    AUTH0_AUDIENCE="tests",
+    AUTH0_ALGORITHM="RS256",
+    # every lookup sees the dataset version bumped by the tests
+    CACHE_VERSION_CHECK_SECONDS="0",
+)
+
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import update
+
+from app.core.database import engine, session_maker
+from app.core.security import validate_token
+from app.main import app
+from app.models import DatasetVersion
+from scripts import load_tables
+from tests.dataset import DATASET_DAYS, DATASET_START, write_csv_files
+
+BACKEND_DIRECTORY = Path(__file__).parent.parent
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database(tmp_path_factory: pytest.TempPathFactory):
+    """Banco migrado com as medições de DATASET_START carregadas pelo script de carga"""
+    alembic_config = Config()
+    alembic_config.set_main_option(
+        "script_location", str(BACKEND_DIRECTORY / "migrations")
+    )
+    command.upgrade(alembic_config, "head")
+
+    csv_directory = tmp_path_factory.mktemp("csv")
+    write_csv_files(csv_directory, DATASET_START, DATASET_DAYS)
+    assert asyncio.run(load_tables.main(from_dir=str(csv_directory)))
+    yield
+
+    asyncio.run(engine.dispose())
+    shutil.rmtree(_database_directory)
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    """Cliente da API com a validação do token dispensada"""
+    app.dependency_overrides[validate_token] = lambda: {}
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def bump_dataset_version() -> Callable[[], None]:
+    """Incrementa a versão dos dados como ao final de uma carga"""
+
+    async def bump():
+        async with session_maker.begin() as session:
+            await session.execute(
+                update(DatasetVersion).values(versao=DatasetVersion.versao + 1)
+            )
+
+    return lambda: asyncio.run(bump())
@@ -0,0 +1,136 @@
+"""Medições sintéticas no formato dos arquivos csv das fontes originais"""
+
+import csv
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+import random
+
+from scripts import load_tables
+
+SUBSYSTEMS = {"N": "NORTE", "NE": "NORDESTE", "S": "SUL"}
+
+# the measurements loaded cross a month and a year boundary
+DATASET_START = date(2023, 12, 30)
+DATASET_DAYS = 4
+DATASET_END = DATASET_START + timedelta(days=DATASET_DAYS - 1)
+
+# written on the first half-hourly cost of each file, below 1e-4 orjson and the json
+# module write floats differently
+SMALL_COST = 0.00003
+
+
+def write_csv_files(directory: Path, start: date, days: int):
+    """
+    Escreve arquivos csv no formato das fontes originais com medições de todos os
+    subsistemas entre `start` e os `days` dias seguintes. Os valores dependem apenas
+    da data, arquivos do mesmo período têm sempre as mesmas medições
+    """
+    dates = [start + timedelta(days=day) for day in range(days)]
+    hours = [time(hour) for hour in range(24)]
+    half_hours = [time(hour, minute) for hour in range(24) for minute in (0, 30)]
+
+    def values(day: date, count: int) -> list[float]:
+        generator = random.Random(day.toordinal() * count)
+        return [round(generator.uniform(0, 1000), 4) for _ in range(count)]
+
+    hourly_rows: dict[int, list[list]] = {}
+    for day in dates:
+        for id_subsistema, nome in SUBSYSTEMS.items():
+            for hour, measurements in zip(hours, _chunks(values(day, 24 * 6), 6)):
+                # the north has no solar generation on the original source
+                if id_subsistema == "N":
+                    measurements[3] = ""
+                hourly_rows.setdefault(day.year, []).append(
+                    [
+                        id_subsistema,
+                        nome,
+                        datetime.combine(day, hour).isoformat(sep=" "),
+                        *measurements,
+                    ]
+                )
+    for year, rows in hourly_rows.items():
+        _write_csv(
+            directory / f"BALANCO_ENERGIA_SUBSISTEMA_{year}.csv",
+            load_tables.schemas_for_csv["BALANCO_ENERGIA_SUBSISTEMA"][1].names(),
+            rows,
+            delimiter=";",
+        )
+
+    half_hourly_rows = []
+    cost_rows = []
+    for day in dates:
+        for index, (id_subsistema, nome) in enumerate(SUBSYSTEMS.items()):
+            for hour, measurements in zip(half_hours, _chunks(values(day, 48 * 7), 7)):
+                half_hourly_rows.append(
+                    [day, hour, id_subsistema, nome, *measurements[:6]]
+                )
+                cost = measurements[6] + index
+                if day == start and hour == time(0) and id_subsistema == "S":
+                    cost = SMALL_COST
+                cost_rows.append([day, hour, id_subsistema, nome, cost])
+    _write_csv(
+        directory / "br_ons_estimativa_custos_balanco_energia_subsistemas_dessem.csv",
+        _csv_columns("br_ons_estimativa_custos_balanco_energia_subsistemas_dessem"),
+        half_hourly_rows,
+    )
+    _write_csv(
+        directory / "br_ons_estimativa_custos_custo_marginal_operacao_semi_horario.csv",
+        _csv_columns("br_ons_estimativa_custos_custo_marginal_operacao_semi_horario"),
+        cost_rows,
+    )
+
+    # one weekly cost per day, the table is keyed only by date and subsystem
+    _write_csv(
+        directory / "br_ons_estimativa_custos_custo_marginal_operacao_semanal.csv",
+        _csv_columns("br_ons_estimativa_custos_custo_marginal_operacao_semanal"),
+        [
+            [day, id_subsistema, nome, *values(day, 4)]
+            for day in dates
+            for id_subsistema, nome in SUBSYSTEMS.items()
+        ],
+    )
+
+    # two plants per subsystem, with a cost on each operative week starting on saturday
+    plants = [
+        (f"UT{index}", id_subsistema, nome, f"USINA SÃO JOSÉ {index}")
+        for index, (id_subsistema, nome) in enumerate(2 * list(SUBSYSTEMS.items()))
+    ]
+    _write_csv(
+        directory
+        / "br_ons_estimativa_custos_custo_variavel_unitario_usinas_termicas.csv",
+        _csv_columns(
+            "br_ons_estimativa_custos_custo_variavel_unitario_usinas_termicas"
+        ),
+        [
+            [
+                day,
+                day + timedelta(days=6),
+                "{}-{:02d}".format(*day.isocalendar()[:2]),
+                id_modelo_usina,
+                id_subsistema,
+                nome,
+                usina,
+                cost,
+            ]
+            for day in dates
+            if day.weekday() == 5
+            for (id_modelo_usina, id_subsistema, nome, usina), cost in zip(
+                plants, values(day, len(plants))
+            )
+        ],
+    )
+
+
+def _csv_columns(file_name: str) -> list[str]:
+    return load_tables.schemas_for_csv[file_name][1].names()
+
+
+def _chunks(values: list, size: int) -> list[list]:
+    return [values[start : start + size] for start in range(0, len(values), size)]
+
+
+def _write_csv(path: Path, columns: list[str], rows: list[list], delimiter=","):
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file, delimiter=delimiter)
+        writer.writerow(columns)
+        writer.writerows(rows)
@@ -0,0 +1,109 @@
+import asyncio
+from typing import Callable, Iterator
+
+import orjson
+import pytest
+from sqlalchemy import update
+
+from app.core import cache
+from app.core.config import config
+from app.core.database import session_maker
+from app.crud.marginal_costs_crud import CostCrud
+from app.models import WeeklySubSystemMarginalCost
+from app.schemas import Resolution
+from tests.dataset import DATASET_END, DATASET_START
+
+
+def weekly_costs() -> list[float]:
+    page = asyncio.run(
+        CostCrud(session_maker).get_all_weekly(
+            start_date=DATASET_START, end_date=DATASET_END, limit=500, offset=0
+        )
+    )
+    return [
+        row["custo_marginal_operacao_semanal"] for row in orjson.loads(page)["dados"]
+    ]
+
+
+def negate_weekly_costs():
+    """Inverte o sinal dos custos semanais no banco, sem mudar a versão dos dados"""
+
+    async def negate():
+        column = WeeklySubSystemMarginalCost.custo_marginal_operacao_semanal
+        async with session_maker.begin() as session:
+            await session.execute(
+                update(WeeklySubSystemMarginalCost).values({column: -column})
+            )
+
+    asyncio.run(negate())
+
+
+@pytest.fixture
+def cached_costs(bump_dataset_version: Callable[[], None]) -> Iterator[list[float]]:
+    """
+    Custos semanais guardados em cache antes de serem alterados no banco. Ao final os
+    custos voltam aos originais em uma nova versão dos dados
+    """
+    costs = weekly_costs()
+    negate_weekly_costs()
+    yield costs
+
+    negate_weekly_costs()
+    bump_dataset_version()
+
+
+def test_cached_pages_are_served_until_the_version_changes(
+    cached_costs: list[float], bump_dataset_version: Callable[[], None]
+):
+    assert weekly_costs() == cached_costs
+
+    bump_dataset_version()
+
+    assert weekly_costs() == [-cost for cost in cached_costs]
+
+
+def test_entries_of_older_versions_are_dropped(
+    bump_dataset_version: Callable[[], None],
+):
+    weekly_costs()
+    asyncio.run(
+        CostCrud(session_maker).get_all_weekly(DATASET_START, DATASET_END, 5, 0)
+    )
+    assert len(cache.response_cache) >= 2
+
+    bump_dataset_version()
+    weekly_costs()
+
+    # the other page is dropped too, it would never be served again
+    assert len(cache.response_cache) == 1
+
+
+def test_version_is_checked_once_per_interval(
+    cached_costs: list[float],
+    bump_dataset_version: Callable[[], None],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(config, "CACHE_VERSION_CHECK_SECONDS", 60 * 60)
+    bump_dataset_version()
+
+    # the version read before the load is kept until the interval ends
+    assert weekly_costs() == cached_costs
+
+    monkeypatch.setattr(config, "CACHE_VERSION_CHECK_SECONDS", 0)
+
+    assert weekly_costs() == [-cost for cost in cached_costs]
+
+
+def test_cached_models_are_sized_close_to_their_json():
+    page = asyncio.run(
+        CostCrud(session_maker).get_aggregated_half_hourly(
+            start_date=DATASET_START,
+            end_date=DATASET_END,
+            resolution=Resolution.DIA,
+            limit=500,
+            offset=0,
+        )
+    )
+
+    json_size = len(page.model_dump_json())
+    assert json_size / 2 < cache._estimate_size(page) < json_size * 2
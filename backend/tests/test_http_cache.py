@@ -0,0 +1,185 @@
+from typing import Callable, Iterator
+
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import event
+
+from app.core.database import engine
+from app.core.http_cache import ConditionalRoute, check_not_modified
+from app.main import app
+from tests.dataset import DATASET_START
+
+URL = (
+    f"/cmo/semihorario?data_inicial={DATASET_START}&data_final={DATASET_START}&limite=5"
+)
+
+
+@pytest.fixture
+def executed_statements() -> Iterator[Callable[[], list[str]]]:
+    """Consultas executadas no banco a partir da chamada da função retornada"""
+    statements: list[str] = []
+
+    def capture(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+
+    def start() -> list[str]:
+        statements.clear()
+        return statements
+
+    yield start
+    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+
+def test_matching_etag_answers_304_without_reading_the_page(
+    client: TestClient, executed_statements: Callable[[], list[str]]
+):
+    response = client.get(URL)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.headers["vary"] == "Accept, Accept-Encoding"
+
+    statements = executed_statements()
+    not_modified = client.get(URL, headers={"If-None-Match": etag})
+
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert not_modified.headers["last-modified"] == response.headers["last-modified"]
+    # only the dataset version is read
+    assert statements
+    assert all("versao_dados" in statement for statement in statements)
+
+
+@pytest.mark.parametrize(
+    "if_none_match", ["{etag}", 'W/{etag}, "other"', '"other", {etag}', "*"]
+)
+def test_any_listed_etag_answers_304(client: TestClient, if_none_match: str):
+    etag = client.get(URL).headers["etag"]
+
+    response = client.get(
+        URL, headers={"If-None-Match": if_none_match.format(etag=etag)}
+    )
+
+    assert response.status_code == 304
+
+
+def test_etag_ignores_the_order_of_the_parameters(client: TestClient):
+    etag = client.get(URL).headers["etag"]
+    reordered = (
+        f"/cmo/semihorario?limite=5&data_final={DATASET_START}"
+        f"&data_inicial={DATASET_START}"
+    )
+
+    assert client.get(reordered, headers={"If-None-Match": etag}).status_code == 304
+
+
+@pytest.mark.parametrize(
+    ("url", "headers"),
+    [
+        (URL.replace("limite=5", "limite=6"), {}),
+        (URL, {"Accept": "application/x-parquet"}),
+        (URL, {"Accept-Encoding": "identity"}),
+    ],
+)
+def test_other_representations_have_other_etags(
+    client: TestClient, url: str, headers: dict[str, str]
+):
+    etag = client.get(URL).headers["etag"]
+
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_if_modified_since(client: TestClient):
+    last_modified = client.get(URL).headers["last-modified"]
+
+    assert (
+        client.get(URL, headers={"If-Modified-Since": last_modified}).status_code == 304
+    )
+    assert (
+        client.get(
+            URL, headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}
+        ).status_code
+        == 200
+    )
+    # a stale etag takes precedence over a valid date
+    assert (
+        client.get(
+            URL,
+            headers={"If-Modified-Since": last_modified, "If-None-Match": '"other"'},
+        ).status_code
+        == 200
+    )
+
+
+def test_new_dataset_version_changes_the_etag(
+    client: TestClient, bump_dataset_version: Callable[[], None]
+):
+    etag = client.get(URL).headers["etag"]
+
+    bump_dataset_version()
+    response = client.get(URL, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert (
+        client.get(URL, headers={"If-None-Match": response.headers["etag"]}).status_code
+        == 304
+    )
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/subsistemas/",
+        "/balanco-energia/horario/agregado"
+        f"?data_inicial={DATASET_START}&data_final={DATASET_START}&resolucao=dia",
+        f"/cmo/semanal/exportar?data_inicial={DATASET_START}&data_final={DATASET_START}",
+        "/usinas-termicas/semanas-operativas",
+    ],
+)
+def test_read_routes_answer_304(client: TestClient, url: str):
+    response = client.get(url)
+    assert response.status_code == 200
+
+    assert (
+        client.get(url, headers={"If-None-Match": response.headers["etag"]}).status_code
+        == 304
+    )
+
+
+def test_errors_and_metrics_have_no_validators(client: TestClient):
+    error = client.get("/cmo/semihorario?data_inicial=2024-01-03&data_final=2024-01-02")
+
+    assert error.status_code == 422
+    assert "etag" not in error.headers
+    assert "etag" not in client.get("/metricas/pool").headers
+
+
+def test_requests_without_token_never_answer_304(client: TestClient):
+    etag = client.get(URL).headers["etag"]
+    app.dependency_overrides.clear()
+
+    response = client.get(URL, headers={"If-None-Match": etag})
+
+    assert response.status_code in (401, 403)
+
+
+def test_validators_are_checked_once_per_route():
+    conditional_routes = [
+        route for route in app.routes if isinstance(route, ConditionalRoute)
+    ]
+
+    assert conditional_routes
+    for route in conditional_routes:
+        checks = [
+            dependency
+            for dependency in route.dependencies
+            if dependency.dependency is check_not_modified
+        ]
+        assert len(checks) == 1, route.path
@@ -0,0 +1,117 @@
+import asyncio
+import csv
+from datetime import timedelta
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.database import session_maker
+from app.models import (
+    DatasetVersion,
+    HalfHourlySubSystemProductionStatement,
+    HourlySubSystemProductionStatement,
+    WeeklySubSystemMarginalCost,
+)
+from scripts import load_tables
+from tests.dataset import DATASET_END, write_csv_files
+
+BACKEND_DIRECTORY = Path(__file__).parent.parent
+
+# seconds before a load that never ends is considered hung
+LOAD_TIMEOUT = 30
+
+
+@pytest.fixture
+def csv_directory(tmp_path: Path) -> Path:
+    """Arquivos com os dias seguintes aos carregados, que mudariam o banco"""
+    write_csv_files(tmp_path, DATASET_END + timedelta(days=1), 2)
+    return tmp_path
+
+
+def replace_first_value(path: Path, column: str, value: str):
+    delimiter = ";" if load_tables._is_raw_data_file(str(path)) else ","
+    with open(path, newline="") as csv_file:
+        rows = list(csv.reader(csv_file, delimiter=delimiter))
+    rows[1][rows[0].index(column)] = value
+    with open(path, "w", newline="") as csv_file:
+        csv.writer(csv_file, delimiter=delimiter).writerows(rows)
+
+
+def stored_state() -> tuple[int, list[int]]:
+    """Versão dos dados e quantidade de medições das tabelas carregadas"""
+
+    async def read():
+        async with session_maker() as session:
+            version = await session.scalar(select(DatasetVersion.versao))
+            counts = [
+                await session.scalar(select(func.count()).select_from(model))
+                for model in (
+                    HourlySubSystemProductionStatement,
+                    HalfHourlySubSystemProductionStatement,
+                    WeeklySubSystemMarginalCost,
+                )
+            ]
+        return version, counts
+
+    return asyncio.run(read())
+
+
+def load(csv_directory: Path) -> bool:
+    return asyncio.run(
+        asyncio.wait_for(
+            load_tables.main(from_dir=str(csv_directory)), timeout=LOAD_TIMEOUT
+        )
+    )
+
+
+def test_failed_insert_rolls_back_the_load(csv_directory: Path):
+    # the hourly file is inserted first, the half-hourly one fails on a required
+    # column while the next files wait parsed on the queue
+    replace_first_value(
+        csv_directory
+        / "br_ons_estimativa_custos_balanco_energia_subsistemas_dessem.csv",
+        "geracao_pequena_usina_hidraulica_verificada",
+        "",
+    )
+    before = stored_state()
+
+    assert load(csv_directory) is False
+
+    assert stored_state() == before
+    assert not (csv_directory / load_tables.MANIFEST_FILENAME).exists()
+
+
+def test_failed_parse_rolls_back_the_load(csv_directory: Path):
+    replace_first_value(
+        csv_directory / "br_ons_estimativa_custos_custo_marginal_operacao_semanal.csv",
+        "custo_marginal_operacao_semanal",
+        "not a number",
+    )
+    before = stored_state()
+
+    assert load(csv_directory) is False
+
+    assert stored_state() == before
+    assert not (csv_directory / load_tables.MANIFEST_FILENAME).exists()
+
+
+def test_failed_load_exits_with_an_error_code(csv_directory: Path):
+    replace_first_value(
+        csv_directory / "br_ons_estimativa_custos_custo_marginal_operacao_semanal.csv",
+        "custo_marginal_operacao_semanal",
+        "not a number",
+    )
+
+    process = subprocess.run(
+        [sys.executable, "scripts/load_tables.py", "--from-dir", str(csv_directory)],
+        cwd=BACKEND_DIRECTORY,
+        env=os.environ,
+        capture_output=True,
+        timeout=LOAD_TIMEOUT,
+    )
+
+    assert process.returncode == 1
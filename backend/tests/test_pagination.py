@@ -0,0 +1,128 @@
+from datetime import date, time
+import math
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.core.pagination import encode_cursor
+from tests.dataset import DATASET_END, DATASET_START, SUBSYSTEMS
+
+PERIOD = {
+    "data_inicial": DATASET_START.isoformat(),
+    "data_final": DATASET_END.isoformat(),
+}
+
+
+def walk_pages(client: TestClient, route: str, **params) -> tuple[list[dict], int]:
+    """Percorre todas as páginas de uma rota pelo `proximo_cursor`"""
+    rows = []
+    pages = 0
+    cursor = None
+    while True:
+        response = client.get(
+            route, params={**PERIOD, **params, **({"cursor": cursor} if cursor else {})}
+        )
+        assert response.status_code == 200, response.text
+        page = response.json()
+        rows.extend(page["dados"])
+        pages += 1
+        cursor = page["proximo_cursor"]
+        if cursor is None:
+            return rows, pages
+
+
+def all_rows(client: TestClient, route: str, **params) -> list[dict]:
+    response = client.get(route, params={**PERIOD, **params, "limite": 100000})
+    assert response.status_code == 200
+    assert response.json()["proximo_cursor"] is None
+    return response.json()["dados"]
+
+
+@pytest.mark.parametrize(
+    ("route", "params"),
+    [
+        ("/cmo/semihorario", {}),
+        ("/cmo/semanal", {}),
+        ("/balanco-energia/horario", {}),
+        ("/cmo/semihorario", {"id_subsistema": ["S", "N"]}),
+        ("/cmo/semihorario", {"formato": "largo"}),
+        ("/cmo/semanal", {"formato": "largo"}),
+    ],
+)
+def test_cursor_pages_cover_every_row_once(
+    client: TestClient, route: str, params: dict
+):
+    expected = all_rows(client, route, **params)
+
+    # a page size that doesn't divide the rows, the last page is partial
+    rows, pages = walk_pages(client, route, limite=7, **params)
+
+    assert rows == expected
+    assert pages == math.ceil(len(expected) / 7)
+
+
+def test_page_ending_on_the_last_row_has_no_cursor(client: TestClient):
+    total = len(all_rows(client, "/cmo/semihorario"))
+
+    exact = client.get("/cmo/semihorario", params={**PERIOD, "limite": total}).json()
+    assert len(exact["dados"]) == total
+    assert exact["proximo_cursor"] is None
+
+    short = client.get(
+        "/cmo/semihorario", params={**PERIOD, "limite": total - 1}
+    ).json()
+    assert short["proximo_cursor"] is not None
+    last = client.get(
+        "/cmo/semihorario",
+        params={**PERIOD, "limite": total - 1, "cursor": short["proximo_cursor"]},
+    ).json()
+    assert last["dados"] == [exact["dados"][-1]]
+    assert last["proximo_cursor"] is None
+
+
+def test_cursor_crosses_the_end_of_the_day(client: TestClient):
+    last_subsystem = max(SUBSYSTEMS)
+    cursor = encode_cursor(date(2023, 12, 31), time(23, 30), last_subsystem)
+
+    page = client.get(
+        "/cmo/semihorario", params={**PERIOD, "limite": 2, "cursor": cursor}
+    ).json()
+
+    assert [
+        (row["data"], row["hora"], row["id_subsistema"]) for row in page["dados"]
+    ] == [("2024-01-01", "00:00:00", subsystem) for subsystem in sorted(SUBSYSTEMS)[:2]]
+
+
+def test_cursor_ignores_the_offset(client: TestClient):
+    first = client.get("/cmo/semihorario", params={**PERIOD, "limite": 5}).json()
+    params = {**PERIOD, "limite": 5, "cursor": first["proximo_cursor"]}
+
+    without_offset = client.get("/cmo/semihorario", params=params).json()
+    with_offset = client.get(
+        "/cmo/semihorario", params={**params, "deslocamento": 50}
+    ).json()
+
+    assert with_offset == without_offset
+
+
+@pytest.mark.parametrize(
+    ("route", "params", "cursor"),
+    [
+        ("/cmo/semihorario", {}, "not-a-cursor"),
+        ("/cmo/semihorario", {}, encode_cursor(DATASET_START, None, "N")),
+        # wide pages are keyed without the subsystem
+        ("/cmo/semihorario", {}, encode_cursor(DATASET_START, time(0), None)),
+        (
+            "/cmo/semihorario",
+            {"formato": "largo"},
+            encode_cursor(DATASET_START, None, None),
+        ),
+    ],
+)
+def test_invalid_cursors_are_rejected(
+    client: TestClient, route: str, params: dict, cursor: str
+):
+    response = client.get(route, params={**PERIOD, **params, "cursor": cursor})
+
+    assert response.status_code == 422
+    assert "Cursor inválido" in response.json()["detail"]
@@ -0,0 +1,138 @@
+import asyncio
+from datetime import date, time
+
+import pytest
+from sqlalchemy import MetaData, delete, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.database import engine
+from app.crud.aggregation import _grouped_statement, _rollup_grouped_statement
+from app.crud.energy_statement_crud import (
+    half_hourly_energy_statements,
+    hourly_energy_statements,
+)
+from app.crud.marginal_costs_crud import half_hourly_costs
+from app.crud.time_series import TimeSeries
+from app.models import DailySeriesRollup, MonthlySeriesRollup, SeriesRollup
+from app.schemas import Resolution
+from scripts import load_tables
+
+rolled_up_series = [
+    hourly_energy_statements,
+    half_hourly_energy_statements,
+    half_hourly_costs,
+]
+
+# whole months around the measurements loaded, answered by both rollups
+WHOLE_MONTHS = (date(2023, 12, 1), date(2024, 1, 31))
+
+
+async def assert_rollups_match(
+    connection: AsyncConnection,
+    rollup: type[SeriesRollup],
+    series: TimeSeries,
+    start_date: date,
+    end_date: date,
+    resolution: Resolution,
+):
+    """Compara a agregação lida do agregado com a agrupada sobre as medições"""
+    arguments = (series.model, series.value_columns, start_date, end_date, resolution)
+    rolled_up = (
+        await connection.execute(
+            _rollup_grouped_statement(rollup, *arguments).order_by(
+                "periodo", "id_subsistema"
+            )
+        )
+    ).mappings()
+    grouped = (
+        await connection.execute(
+            _grouped_statement(*arguments).order_by("periodo", "id_subsistema")
+        )
+    ).mappings()
+
+    rows = [dict(row) for row in rolled_up]
+    assert rows
+    # the sums are added in a different order, only their last digits may differ
+    assert rows == [pytest.approx(dict(row)) for row in grouped]
+
+
+@pytest.mark.parametrize(
+    "series", rolled_up_series, ids=lambda series: series.model.__tablename__
+)
+@pytest.mark.parametrize("rollup", [DailySeriesRollup, MonthlySeriesRollup])
+@pytest.mark.parametrize("resolution", [Resolution.MES, Resolution.ANO])
+def test_monthly_resolutions_match_a_raw_group_by(
+    series: TimeSeries, rollup: type[SeriesRollup], resolution: Resolution
+):
+    async def check():
+        async with engine.connect() as connection:
+            await assert_rollups_match(
+                connection, rollup, series, *WHOLE_MONTHS, resolution
+            )
+
+    asyncio.run(check())
+
+
+@pytest.mark.parametrize(
+    "series", rolled_up_series, ids=lambda series: series.model.__tablename__
+)
+@pytest.mark.parametrize("resolution", [Resolution.DIA, Resolution.SEMANA])
+@pytest.mark.parametrize(
+    ("start_date", "end_date"),
+    [WHOLE_MONTHS, (date(2023, 12, 31), date(2024, 1, 1))],
+)
+def test_daily_resolutions_match_a_raw_group_by(
+    series: TimeSeries, resolution: Resolution, start_date: date, end_date: date
+):
+    async def check():
+        async with engine.connect() as connection:
+            await assert_rollups_match(
+                connection, DailySeriesRollup, series, start_date, end_date, resolution
+            )
+
+    asyncio.run(check())
+
+
+@pytest.mark.parametrize(
+    "series", rolled_up_series, ids=lambda series: series.model.__tablename__
+)
+@pytest.mark.parametrize("changed_since", [date(2023, 12, 31), date(2024, 1, 1)])
+def test_refreshed_rollups_match_a_raw_group_by(
+    series: TimeSeries, changed_since: date
+):
+    # the measurements since the date change and lose a row, as on a new load, and
+    # the rollups are recalculated from it on a transaction that is rolled back
+    model = series.model
+    value_column = getattr(model, series.value_columns[0])
+
+    async def check():
+        async with engine.connect() as connection:
+            metadata = MetaData()
+            await connection.run_sync(metadata.reflect)
+
+            await connection.execute(
+                update(model)
+                .where(model.data >= changed_since)
+                .values({value_column: value_column * 2 + 1})
+            )
+            await connection.execute(
+                delete(model).where(
+                    model.data == changed_since,
+                    model.hora == time(12),
+                    model.id_subsistema == "N",
+                )
+            )
+            await load_tables._refresh_rollups(
+                metadata.tables, connection, {model.__tablename__: changed_since}
+            )
+
+            for rollup in (DailySeriesRollup, MonthlySeriesRollup):
+                await assert_rollups_match(
+                    connection, rollup, series, *WHOLE_MONTHS, Resolution.MES
+                )
+            await assert_rollups_match(
+                connection, DailySeriesRollup, series, *WHOLE_MONTHS, Resolution.DIA
+            )
+            await connection.rollback()
+
+    asyncio.run(check())
@@ -0,0 +1,135 @@
+import asyncio
+from datetime import date
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+import pytest
+from sqlalchemy import func, select
+
+from app.core.database import session_maker
+from app.core.pagination import next_page_cursor
+from app.crud.energy_statement_crud import (
+    half_hourly_energy_statements,
+    hourly_energy_statements,
+)
+from app.crud.marginal_costs_crud import half_hourly_costs, weekly_costs
+from app.crud.time_series import TimeSeries
+from app.schemas import (
+    EnergyStatementResponse,
+    HalfHourlyEnergyStatementResponse,
+    HalfHourlySubSystemMarginalCostResponse,
+    WeeklySubSystemMarginalCostResponse,
+)
+from tests.dataset import DATASET_END, DATASET_START, SMALL_COST
+
+# every series listed by the routes serialized straight from the column tuples
+list_routes = [
+    ("/balanco-energia/horario", hourly_energy_statements, EnergyStatementResponse),
+    (
+        "/balanco-energia/semihorario",
+        half_hourly_energy_statements,
+        HalfHourlyEnergyStatementResponse,
+    ),
+    ("/cmo/semanal", weekly_costs, WeeklySubSystemMarginalCostResponse),
+    ("/cmo/semihorario", half_hourly_costs, HalfHourlySubSystemMarginalCostResponse),
+]
+
+
+def pydantic_page(
+    series: TimeSeries,
+    response_model: type[BaseModel],
+    start_date: date,
+    end_date: date,
+    limit: int,
+    offset: int,
+    count: bool,
+) -> bytes:
+    """Página serializada pelo FastAPI a partir dos modelos ORM e do schema"""
+    model = series.model
+
+    async def fetch():
+        in_range = model.data.between(start_date, end_date)
+        async with session_maker() as session:
+            rows = (
+                await session.scalars(
+                    select(model)
+                    .where(in_range)
+                    .order_by(*series.time_columns, model.id_subsistema)
+                    .limit(limit + 1)
+                    .offset(offset)
+                )
+            ).all()
+            total = (
+                await session.scalar(select(func.count()).where(in_range))
+                if count
+                else None
+            )
+        return rows, total
+
+    rows, total = asyncio.run(fetch())
+    response = response_model(
+        total_registros=total,
+        data_inicial=start_date,
+        data_final=end_date,
+        dados=[
+            series.schema.model_validate(row, from_attributes=True)
+            for row in rows[:limit]
+        ],
+        proximo_cursor=next_page_cursor(rows, limit),
+    )
+    return JSONResponse(jsonable_encoder(response)).body
+
+
+@pytest.mark.parametrize(("route", "series", "response_model"), list_routes)
+@pytest.mark.parametrize(
+    ("limit", "offset", "count"),
+    [(10, 0, True), (25, 7, False), (1000, 0, True)],
+)
+def test_list_pages_match_the_pydantic_json(
+    client: TestClient,
+    route: str,
+    series: TimeSeries,
+    response_model: type[BaseModel],
+    limit: int,
+    offset: int,
+    count: bool,
+):
+    response = client.get(
+        route,
+        params={
+            "data_inicial": DATASET_START.isoformat(),
+            "data_final": DATASET_END.isoformat(),
+            "limite": limit,
+            "deslocamento": offset,
+            "contar": count,
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.content == pydantic_page(
+        series, response_model, DATASET_START, DATASET_END, limit, offset, count
+    )
+
+
+def test_small_floats_match_the_pydantic_json(client: TestClient):
+    # the first half-hourly cost is written by the json module, like FastAPI does
+    response = client.get(
+        "/cmo/semihorario",
+        params={"data_inicial": DATASET_START.isoformat(), "data_final": "2024-01-01"},
+    )
+
+    assert response.status_code == 200
+    assert SMALL_COST in [
+        row["custo_marginal_operacao"] for row in response.json()["dados"]
+    ]
+    assert response.content == pydantic_page(
+        half_hourly_costs,
+        HalfHourlySubSystemMarginalCostResponse,
+        DATASET_START,
+        date(2024, 1, 1),
+        500,
+        0,
+        True,
+    )